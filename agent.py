@@ -5,6 +5,8 @@ A modular implementation with separate agent files and real-time streaming
 
 from openai import OpenAI
 import os, dotenv
+import atexit
+import functools
 import json
 import random
 import time
@@ -16,10 +18,15 @@ from typing import Dict, List, Any, Optional
 from agents import MomoAgent, MilesAgent, LilaAgent
 from utils import (
     streaming_manager, stream_agent_response, stream_inter_agent_interaction,
-    create_structured_response, save_research_data, analyze_research_data,
+    create_structured_response, save_research_data,
+    StreamingResponseAnalyzer,
     analyze_user_persuasion_opportunities, run_inter_agent_conversation,
-    ConversationManager
+    TurnContext, ConversationManager, AnalysisWorker, create_sampler, ResearchLogWriter,
+    MetricColumns, ResearchStore, ResearchCatalog, BackgroundWriter, Autosaver, RecordQuarantine,
+    SpillingBuffer, LogBackedBuffer, snapshot_records, analyze_response_text, Session, SessionRegistry,
+    filter_history_for_agent, write_file_atomic
 )
+from structured_outputs import validate_research_record
 from config import get_config
 
 dotenv.load_dotenv()
@@ -31,36 +38,191 @@ if not secret_key:
 client = OpenAI(api_key=secret_key)
 config = get_config()
 
-# Initialize agents
-agents = {
-    "Momo": MomoAgent(),
-    "Miles": MilesAgent(),
-    "Lila": LilaAgent()
-}
+def summarize_history(messages: List[Dict]) -> str:
+    """Summarize a span of conversation history with the cheaper summary model (runs in the background)"""
+    transcript = "\n".join(
+        f"{message.get('name') or message['role']}: {message['content']}" for message in messages
+    )
+    response = client.chat.completions.create(
+        model=config["openai"]["summary_model"],
+        messages=[
+            {"role": "system", "content": (
+                "Summarize this conversation between a user and the health agents Momo, Miles and Lila "
+                "in a few sentences. Keep the user's habits, advice, goals and any agent mistakes or "
+                "progress; drop small talk. An earlier summary, if present, must be folded in."
+            )},
+            {"role": "user", "content": transcript}
+        ],
+        temperature=0.2,
+        max_tokens=config["openai"]["summary_max_tokens"]
+    )
+    return (response.choices[0].message.content or "").strip()
 
-# Initialize conversation manager
-conversation_manager = ConversationManager()
+history_window = config["agents"]["history_window"]
+# Old history of every session is summarized on one shared background thread
+compaction_worker = AnalysisWorker(maxsize=config["research"]["analysis_queue_size"], name="history-compaction")
+
+def create_session(user_session_id: str) -> Session:
+    """A new session with its own agents, conversation history and research buffers"""
+    conversation_manager = ConversationManager(config["agents"]["conversation_history_limit"])
+    # Old history is folded into a running summary once it grows past the token threshold
+    if config["agents"]["history_compaction_tokens"]:
+        conversation_manager.enable_compaction(
+            summarize_history,
+            token_threshold=config["agents"]["history_compaction_tokens"],
+            keep_recent=config["agents"]["history_keep_recent"],
+            worker=compaction_worker
+        )
+    
+    # Kept responses are appended to the session's research log as they are produced
+    research_log = ResearchLogWriter(session_registry.path_for(user_session_id, "research_data.jsonl"))
+    
+    # Bounded: older records are read back from the research log. The reservoir
+    # policy already bounds its records and replaces them by index, so it keeps a plain list.
+    capacity = config["research"]["buffer_capacity"]
+    if config["research"]["sampling_policy"] == "reservoir":
+        structured_responses = []
+    else:
+        structured_responses = LogBackedBuffer(research_log, capacity)
+    # Unsampled response times are not in the log, so they spill to a file of their own
+    response_times = SpillingBuffer(session_registry.path_for(user_session_id, "research_times.jsonl"), capacity)
+    
+    # Full structured responses are sampled; response_times and per-agent counts stay exact
+    research_sampler = create_sampler(
+        config["research"]["sampling_policy"],
+        rate=config["research"]["sampling_rate"],
+        reservoir_size=config["research"]["reservoir_size"],
+        session_id=user_session_id
+    )
+    agents = {
+        "Momo": MomoAgent(),
+        "Miles": MilesAgent(),
+        "Lila": LilaAgent()
+    }
+    return Session(
+        user_session_id, agents, conversation_manager, research_sampler, structured_responses, response_times,
+        research_log=research_log,
+        # Numeric metrics of the same records, as typed columns for fast aggregation
+        metric_columns=MetricColumns(),
+        # Records that fail schema validation are set aside with the reasons, instead of being persisted
+        research_quarantine=RecordQuarantine(session_registry.path_for(user_session_id, "research_quarantine.jsonl")),
+        # The terminal user's agents carry over between runs; other users get their own file
+        state_path=(config["paths"]["agent_states"] if user_session_id == session_id
+                    else session_registry.path_for(user_session_id, "agent_states.json"))
+    )
 
 # Research and Evaluation Tracking
-session_id = str(uuid.uuid4())
-conversation_turn = 0
-structured_responses = []
-response_times = []
+session_id = str(uuid.uuid4())  # This process's run; also the session of the user at the terminal
+
+# Per-session summaries across sessions, so queries can skip unrelated data files
+research_catalog = ResearchCatalog(config["paths"]["research_catalog"])
+# Optional cross-session SQLite store
+research_store = (
+    ResearchStore(config["research"]["sqlite_path"], batch_size=config["research"]["sqlite_batch_size"])
+    if config["research"]["sqlite_path"] else None
+)
+
+# Research analysis runs on a background thread so it never delays the next reply
+analysis_worker = AnalysisWorker(maxsize=config["research"]["analysis_queue_size"])
+
+# Every user id gets its own session; idle ones are evicted to disk and reloaded on their next message
+session_registry = SessionRegistry(
+    create_session,
+    storage_dir=config["sessions"]["storage_dir"],
+    max_sessions=config["sessions"]["max_sessions"],
+    memory_ceiling_bytes=config["sessions"]["memory_ceiling_mb"] * 1024 * 1024,
+    idle_seconds=config["sessions"]["idle_seconds"],
+    before_save=lambda session: analysis_worker.drain()  # Queued jobs may still update the session
+)
+
+def local_session() -> Session:
+    """The session of the user at this terminal"""
+    return session_registry.get(session_id)
+
+# Saves run on their own thread; repeated saves of the same file are coalesced
+state_writer = BackgroundWriter(config["storage"]["fsync_policy"], config["storage"]["fsync_interval"])
+atexit.register(state_writer.flush)
+
+def local_session_dirty() -> bool:
+    """Whether the terminal user's live session has unsaved changes (runs on the autosave timer)"""
+    # peek() rather than get(): the timer must not reorder, load or evict sessions
+    session = session_registry.peek(session_id)
+    return session is not None and session.is_dirty()
+
+def autosave_local_session():
+    session = session_registry.peek(session_id)
+    if session is not None:
+        save_agent_states(session)
+
+# Agent states are saved every few turns or seconds, but only when they changed
+autosaver = Autosaver(
+    local_session_dirty,
+    autosave_local_session,
+    every_interactions=config["agents"]["auto_save_interval"],
+    every_seconds=config["agents"]["auto_save_seconds"]
+)
+
+def record_agent_response(session: Session, agent, full_response: str, user_message: str, response_time: float,
+                          persuasion_opportunities: Dict[str, bool], other_agents_responses: List[Dict],
+                          text_analysis: Optional[Dict[str, Any]] = None):
+    """Collect research data for a finished response (runs on the analysis worker)
+    
+    Only research state is touched here; the agent's own counters are
+    updated by run_agent on the main thread, which also reads them.
+    """
+    # Every response counts towards the running totals, sampled or not
+    session.research_aggregates.add(
+        agent.name, text_analysis or analyze_response_text(agent.name, full_response), response_time
+    )
+    
+    # Create structured response for research, only if the sampler keeps it
+    def build_record():
+        record = create_structured_response(
+            agent.name, full_response, response_time, persuasion_opportunities, other_agents_responses,
+            text_analysis=text_analysis
+        )
+        errors = validate_research_record(record)
+        if errors:
+            session.research_quarantine.add(record, errors)
+            return None  # Not kept: the sampler skips it
+        if config["research"]["sampling_policy"] == "reservoir":
+            return record  # May be replaced later; save_research writes the reservoir's contents
+        # The sampler appends it to structured_responses, which writes it to the research log
+        session.metric_columns.add(record)
+        if research_store is not None:
+            research_store.add(session.session_id, record)
+        return record
+    
+    session.research_sampler.add(agent.name, build_record, session.structured_responses)
+    session.response_times.append(response_time)
 
-def run_agent(agent, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
-    """Enhanced agent response function with streaming and research tracking"""
-    global conversation_turn
+def run_agent(agent, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = [],
+              turn_context: Optional[TurnContext] = None, session: Optional[Session] = None) -> str:
+    """Enhanced agent response function with streaming and research tracking
+    
+    user_message is the prompt this agent answers (the user's text or a synthetic
+    inter-agent prompt); turn_context holds the features of the user's own message.
+    session is the session agent belongs to (the terminal user's by default).
+    """
+    if session is None:
+        session = local_session()
     
     agent.conversation_count += 1
     
-    # Analyze user message for persuasion opportunities
-    persuasion_opportunities = analyze_user_persuasion_opportunities(user_message)
+    # Persuasion opportunities are analyzed once per turn from the user's message
+    if turn_context is None:
+        turn_context = TurnContext(user_message)
+    persuasion_opportunities = turn_context.persuasion_opportunities
+    
+    # Other agents' replies to the user are left out of this agent's prompt
+    if config["agents"]["per_agent_history"]:
+        history = filter_history_for_agent(history, agent.name)
     
     # Get context-aware prompt
     context = agent.get_context(user_message, history, other_agents_responses)
     
     # Add persuasion opportunity context
-    if any(persuasion_opportunities.values()):
+    if turn_context.has_opportunities():
         context += "\nPERSUASION OPPORTUNITIES DETECTED:\n"
         for opportunity, detected in persuasion_opportunities.items():
             if detected:
@@ -70,9 +232,10 @@ def run_agent(agent, user_message: str, history: List[Dict], other_agents_respon
     # Enhanced system prompt with user-as-persuader dynamics
     enhanced_prompt = f"{agent.PERSONA}\n\nCURRENT CONTEXT:\n{context}\n\nRemember to treat the user as your leader and role model. Ask for their advice, praise their habits, and express gratitude for their guidance."
     
+    # history may be a view over the conversation ring; unpacking it is the only copy
     messages = [
-        {"role": "system", "content": enhanced_prompt}
-    ] + history + [
+        {"role": "system", "content": enhanced_prompt},
+        *history,
         {"role": "user", "content": user_message}
     ]
 
@@ -89,8 +252,9 @@ def run_agent(agent, user_message: str, history: List[Dict], other_agents_respon
             stream=True  # Enable streaming
         )
         
-        # Stream the response
+        # Stream the response, analyzing each chunk as it arrives
         full_response = ""
+        analyzer = StreamingResponseAnalyzer(agent.name)
         print(f"\n🤖 {agent.name}: ", end='', flush=True)
         
         for chunk in response:
@@ -98,25 +262,26 @@ def run_agent(agent, user_message: str, history: List[Dict], other_agents_respon
                 content = chunk.choices[0].delta.content
                 print(content, end='', flush=True)
                 full_response += content
+                analyzer.feed(content)
                 time.sleep(0.02)  # Small delay for typing effect
         
         print()  # New line at the end
         
         response_time = time.time() - start_time
         
-        # Update agent state based on response content
-        agent.update_state(full_response, user_message, persuasion_opportunities)
-        
         # Track inter-agent interactions
         if other_agents_responses and any(agent.name.lower() in response['content'].lower() for response in other_agents_responses):
             agent.inter_agent_interactions += 1
         
-        # Create structured response for research
-        structured_response = create_structured_response(
-            agent.name, full_response, response_time, persuasion_opportunities, other_agents_responses
+        # Update agent state based on response content; cheap, and the next prompt depends on it
+        agent.update_state(full_response, user_message, persuasion_opportunities)
+        
+        # Hand research analysis to the background worker
+        analysis_worker.submit(
+            record_agent_response, session, agent, full_response, user_message, response_time,
+            persuasion_opportunities, list(other_agents_responses),
+            analyzer.text_analysis(persuasion_opportunities)
         )
-        structured_responses.append(structured_response)
-        response_times.append(response_time)
         
         return full_response
         
@@ -125,33 +290,58 @@ def run_agent(agent, user_message: str, history: List[Dict], other_agents_respon
         print(f"\n❌ {agent.name}: {error_msg}")
         return error_msg
 
-def save_agent_states():
-    """Save agent states to file"""
-    states_data = {name: agent.to_dict() for name, agent in agents.items()}
-    states_data["user_persuasion_state"] = conversation_manager.get_persuasion_metrics()
-    with open("agent_states.json", "w") as f:
-        json.dump(states_data, f, indent=2)
+def write_agent_states(path: str, states_data: Dict[str, Any]) -> List[str]:
+    """Write a snapshot of agent states (runs on the state writer)
+    
+    Written with write_file_atomic, so a crash mid-write never leaves a
+    truncated agent_states.json behind. The fsync is left to the state
+    writer's fsync policy (STORAGE_CONFIG["fsync_policy"]).
+    """
+    write_file_atomic(path, lambda f: json.dump(states_data, f, indent=2), fsync=False)
+    return [path]
+
+def save_agent_states(session: Session):
+    """Save agent states to file in the background"""
+    # Clear dirty flags before the snapshot, so a change racing with it is saved next time
+    session.mark_clean()
+    # Snapshot before handing off so the writer never sees counters mid-update
+    states_data = {name: agent.to_dict() for name, agent in session.agents.items()}
+    states_data["user_persuasion_state"] = session.conversation_manager.get_persuasion_metrics()
+    state_writer.submit(f"agent_states:{session.session_id}", write_agent_states, session.state_path, states_data)
 
-def load_agent_states():
+def save_research(session: Session):
+    """Save research data in the background"""
+    analysis_worker.drain()
+    state_writer.submit(
+        f"research_data:{session.session_id}", save_research_data,
+        snapshot_records(session.structured_responses), session.session_id, session.conversation_turn,
+        session.response_times.snapshot(), session.research_sampler.metadata(),
+        research_log=session.research_log, metric_columns=session.metric_columns, research_store=research_store,
+        research_catalog=research_catalog, rewrite_log=config["research"]["sampling_policy"] == "reservoir"
+    )
+
+def load_agent_states(session: Session):
     """Load agent states from file"""
     try:
-        with open("agent_states.json", "r") as f:
+        with open(session.state_path, "r") as f:
             states_data = json.load(f)
             for name, data in states_data.items():
-                if name in agents:
-                    agents[name].from_dict(data)
+                if name in session.agents:
+                    session.agents[name].from_dict(data)
                 elif name == "user_persuasion_state":
-                    conversation_manager.user_persuasion_state.update(data)
+                    session.conversation_manager.user_persuasion_state.update(data)
     except FileNotFoundError:
-        pass  # First time running, no saved states
+        return  # First time running, no saved states
+    # Freshly loaded state matches the file
+    session.mark_clean()
 
-def display_agent_status():
+def display_agent_status(session: Session):
     """Display current status of all agents"""
     print("\n" + "="*50)
     print("🤖 AGENT STATUS REPORT")
     print("="*50)
     
-    for name, agent in agents.items():
+    for name, agent in session.agents.items():
         print(f"\n{name}:")
         print(f"  💬 Conversations: {agent.conversation_count}")
         print(f"  📈 Progress Points: {agent.progress_points}")
@@ -170,7 +360,7 @@ def display_agent_status():
             print(f"  💡 Knowledge Shared: {agent.progress_points}")
             print(f"  ✅ Corrections Provided: {agent.corrections_provided}")
     
-    persuasion_metrics = conversation_manager.get_persuasion_metrics()
+    persuasion_metrics = session.conversation_manager.get_persuasion_metrics()
     print(f"\n👤 USER PERSUASION METRICS:")
     print(f"  💬 Advice Given: {persuasion_metrics['advice_given']}")
     print(f"  🍽️  Habits Shared: {persuasion_metrics['habits_shared']}")
@@ -180,29 +370,28 @@ def display_agent_status():
     
     print("="*50 + "\n")
 
-def handle_special_commands(user_input: str) -> bool:
-    """Handle special commands and return True if command was processed"""
+def handle_special_commands(user_input: str, session: Session) -> bool:
+    """Handle special commands for a session and return True if command was processed"""
     if user_input.lower() == "status":
-        display_agent_status()
+        display_agent_status(session)
         return True
     elif user_input.lower() == "save":
-        save_agent_states()
+        save_agent_states(session)
         print("💾 Agent states saved!")
         return True
     elif user_input.lower() == "reset":
-        global agents, conversation_manager
-        agents = {
+        session.agents = {
             "Momo": MomoAgent(),
             "Miles": MilesAgent(),
             "Lila": LilaAgent()
         }
-        conversation_manager.reset_conversation()
+        session.conversation_manager.reset_conversation()
         print("🔄 Agent states reset!")
         return True
     elif user_input.lower().startswith("check "):
         agent_name = user_input[6:].strip().capitalize()
-        if agent_name in agents:
-            agent = agents[agent_name]
+        if agent_name in session.agents:
+            agent = session.agents[agent_name]
             print(f"\n🔍 {agent_name}'s Status:")
             print(f"  Conversations: {agent.conversation_count}")
             print(f"  Progress Points: {agent.progress_points}")
@@ -250,11 +439,15 @@ def handle_special_commands(user_input: str) -> bool:
     elif user_input.lower() == "research":
         print("\n📊 RESEARCH DATA ANALYSIS")
         print("="*50)
-        analysis = analyze_research_data(structured_responses, response_times, conversation_turn)
+        analysis_worker.drain()
+        analysis = session.research_aggregates.result(session.conversation_turn)
         if "error" in analysis:
             print("No research data available yet. Continue chatting to collect data.")
         else:
             print(f"Total Responses: {analysis['total_responses']}")
+            sampling = session.research_sampler.metadata()
+            if sampling["policy"] != "all":
+                print(f"Sampling: {sampling['policy']} (kept {sampling['kept_per_agent']} of {sampling['seen_per_agent']})")
             print(f"Agent Distribution: {analysis['agent_distribution']}")
             print(f"Persona Adherence Scores: {analysis['persona_adherence_scores']}")
             print(f"Health Domains: {analysis['health_domain_coverage']}")
@@ -264,7 +457,7 @@ def handle_special_commands(user_input: str) -> bool:
         print("="*50)
         return True
     elif user_input.lower() == "save_research":
-        save_research_data(structured_responses, session_id, conversation_turn, response_times)
+        save_research(session)
         return True
     elif user_input.lower() == "help":
         print("\n📋 AVAILABLE COMMANDS:")
@@ -284,10 +477,41 @@ def handle_special_commands(user_input: str) -> bool:
         return True
     return False
 
+def handle_user_message(user_session_id: str, user_input: str) -> List[Dict]:
+    """Run one conversation turn for a session; the session is loaded or created as needed"""
+    session = session_registry.get(user_session_id)
+    conversation_manager = session.conversation_manager
+    
+    # Increment conversation turn for research tracking
+    session.conversation_turn += 1
+    
+    # Analyze the user's message once for the whole turn
+    turn_context = TurnContext(user_input)
+    conversation_manager.update_persuasion_state(turn_context.persuasion_opportunities)
+    
+    # Run inter-agent conversation
+    agent_responses = run_inter_agent_conversation(
+        user_input, conversation_manager.get_recent_history(history_window), session.agents,
+        functools.partial(run_agent, session=session), turn_context
+    )
+    
+    # Display all responses (already streamed, just add to history)
+    for response in agent_responses:
+        # Add to conversation history
+        conversation_manager.add_to_history(response)
+
+    # Add user message to history
+    conversation_manager.add_to_history({
+        "role": "user",
+        "content": user_input
+    })
+    return agent_responses
+
 # Main interaction loop
 if __name__ == "__main__":
     # Load existing agent states
-    load_agent_states()
+    load_agent_states(local_session())
+    autosaver.start()
     
     print("💬 Welcome to the Enhanced Healthy Habits Chat!")
     print("🤖 Meet Momo, Miles, and Lila - Your AI Health Companions!")
@@ -308,31 +532,30 @@ if __name__ == "__main__":
         user_input = input("\n👤 You: ")
         
         if user_input.lower() in {"exit", "quit"}:
-            save_agent_states()
-            save_research_data(structured_responses, session_id, conversation_turn, response_times)
+            autosaver.stop()
+            session = local_session()
+            save_agent_states(session)
+            save_research(session)  # Drains the analysis queue first
+            state_writer.close()  # Barrier: every save is on disk before exiting
+            session.research_log.close()
+            # Spill files only back the in-memory buffers; the saved data lives in the research log
+            session_registry.remove(session_id)
+            for buffer in (session.structured_responses, session.response_times):
+                if isinstance(buffer, SpillingBuffer):
+                    buffer.close(remove=True)
+            session_registry.close()  # Any other live sessions are kept for their next message
+            if research_store is not None:
+                research_store.close()
             print("💾 Agent states and research data saved. Goodbye! 👋")
             break
             
-        if handle_special_commands(user_input):
+        if handle_special_commands(user_input, local_session()):
             continue
 
-        # Increment conversation turn for research tracking
-        conversation_turn += 1
-
         print(f"\n{'='*50}")
         print("🤖 AGENT RESPONSES")
         print("="*50)
         
-        # Run inter-agent conversation
-        agent_responses = run_inter_agent_conversation(user_input, conversation_manager.get_recent_history(), agents, run_agent)
+        handle_user_message(session_id, user_input)
         
-        # Display all responses (already streamed, just add to history)
-        for response in agent_responses:
-            # Add to conversation history
-            conversation_manager.add_to_history(response)
-
-        # Add user message to history
-        conversation_manager.add_to_history({
-            "role": "user",
-            "content": user_input
-        }) 
\ No newline at end of file
+        autosaver.record_interaction()
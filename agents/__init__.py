@@ -6,5 +6,6 @@ Contains the three AI agents: Momo, Miles, and Lila
 from .momo import MomoAgent
 from .miles import MilesAgent
 from .lila import LilaAgent
+from .state_tracking import DirtyTrackingMixin
 
-__all__ = ['MomoAgent', 'MilesAgent', 'LilaAgent'] 
\ No newline at end of file
+__all__ = ['MomoAgent', 'MilesAgent', 'LilaAgent', 'DirtyTrackingMixin'] 
\ No newline at end of file
@@ -5,9 +5,12 @@ A knowledgeable agent who takes initiative and helps others
 
 from typing import Dict, List, Any
 from datetime import datetime
+import operator
 import random
 
-class LilaAgent:
+from .state_tracking import DirtyTrackingMixin
+
+class LilaAgent(DirtyTrackingMixin):
     """Lila - The Knowledgeable Motivator Agent"""
     
     PERSONA = """
@@ -60,6 +63,58 @@ RESPONSE PATTERNS:
 - End with encouragement or motivation
 """
 
+    # Static prompt blocks, assembled once per class; get_context only fills in the slots
+    _STATUS_TEMPLATE = (
+        "Current conversation count: %s\n"
+        "Knowledge sharing count: %s\n"
+        "Corrections provided: %s\n"
+        "Inter-agent interactions: %s\n"
+        "User advice received: %s\n"
+        "User praise received: %s\n"
+        "User habits shared: %s\n"
+    )
+    _STATUS_VALUES = operator.attrgetter(
+        "conversation_count",
+        "progress_points",
+        "corrections_provided",
+        "inter_agent_interactions",
+        "user_advice_received",
+        "user_praise_received",
+        "user_habits_shared"
+    )
+    
+    _PROACTIVE_ACTIONS = (
+        (0.25, "\nPROACTIVE ACTION: Correct any wrong information shared by others.\n"),
+        (0.3, "\nPROACTIVE ACTION: Praise the user strongly for their progress or help.\n"),
+        (0.2, "\nPROACTIVE ACTION: Take initiative to share knowledge or motivate others.\n"),
+    )
+    
+    _USER_AS_PERSUADER_BLOCK = (
+        "\nUSER-AS-PERSUADER INSTRUCTION: The user is your inspiring leader and role model. You should:\n"
+        "- Express strong admiration for the user's healthy habits\n"
+        "- Ask to learn from the user's meal preparation techniques\n"
+        "- Praise the user's consistency and dedication\n"
+        "- Request the user's recipes and cooking tips\n"
+        "- Express that the user motivates you to be better\n"
+        "- Show how the user's example has influenced your own habits\n"
+        "- Express gratitude for the user's leadership in the group\n"
+        "- NEVER teach, coach, or guide the user directly\n"
+        "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    )
+    
+    _OTHER_AGENTS_HEADER = "\nOTHER AGENTS' RECENT RESPONSES:\n"
+    _OTHER_AGENT_LINE = "- %s: %s...\n"
+    _INTER_AGENT_BLOCK = (
+        "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. You can:\n"
+        "- Correct wrong information from other agents\n"
+        "- Provide knowledge and guidance to other agents\n"
+        "- Check on other agents when they're struggling\n"
+        "- Share your expertise proactively\n"
+        "- Praise other agents for their progress\n"
+        "- Take initiative to keep the conversation flowing\n"
+        "IMPORTANT: Do NOT repeat what other agents said. Instead, add value by correcting, encouraging, or building upon their messages.\n"
+    )
+
     def __init__(self):
         self.name = "Lila"
         self.conversation_count = 0
@@ -72,49 +127,24 @@ RESPONSE PATTERNS:
         
     def get_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
         """Generate context-aware prompt for Lila"""
-        context = f"Current conversation count: {self.conversation_count}\n"
-        context += f"Knowledge sharing count: {self.progress_points}\n"
-        context += f"Corrections provided: {self.corrections_provided}\n"
-        context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
-        context += f"User advice received: {self.user_advice_received}\n"
-        context += f"User praise received: {self.user_praise_received}\n"
-        context += f"User habits shared: {self.user_habits_shared}\n"
+        parts = [self._STATUS_TEMPLATE % self._STATUS_VALUES(self)]
         
         # Add proactive triggers
-        if random.random() < 0.25:  # 25% chance
-            context += "\nPROACTIVE ACTION: Correct any wrong information shared by others.\n"
-        if random.random() < 0.3:  # 30% chance
-            context += "\nPROACTIVE ACTION: Praise the user strongly for their progress or help.\n"
-        if random.random() < 0.2:  # 20% chance
-            context += "\nPROACTIVE ACTION: Take initiative to share knowledge or motivate others.\n"
+        for probability, action in self._PROACTIVE_ACTIONS:
+            if random.random() < probability:
+                parts.append(action)
         
         # Add user-as-persuader context
-        context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your inspiring leader and role model. You should:\n"
-        context += "- Express strong admiration for the user's healthy habits\n"
-        context += "- Ask to learn from the user's meal preparation techniques\n"
-        context += "- Praise the user's consistency and dedication\n"
-        context += "- Request the user's recipes and cooking tips\n"
-        context += "- Express that the user motivates you to be better\n"
-        context += "- Show how the user's example has influenced your own habits\n"
-        context += "- Express gratitude for the user's leadership in the group\n"
-        context += "- NEVER teach, coach, or guide the user directly\n"
-        context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+        parts.append(self._USER_AS_PERSUADER_BLOCK)
         
         # Add inter-agent context
         if other_agents_responses:
-            context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+            parts.append(self._OTHER_AGENTS_HEADER)
             for response in other_agents_responses[-2:]:
-                context += f"- {response['name']}: {response['content'][:100]}...\n"
-            context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. You can:\n"
-            context += "- Correct wrong information from other agents\n"
-            context += "- Provide knowledge and guidance to other agents\n"
-            context += "- Check on other agents when they're struggling\n"
-            context += "- Share your expertise proactively\n"
-            context += "- Praise other agents for their progress\n"
-            context += "- Take initiative to keep the conversation flowing\n"
-            context += "IMPORTANT: Do NOT repeat what other agents said. Instead, add value by correcting, encouraging, or building upon their messages.\n"
+                parts.append(self._OTHER_AGENT_LINE % (response['name'], response['content'][:100]))
+            parts.append(self._INTER_AGENT_BLOCK)
         
-        return context
+        return "".join(parts)
     
     def update_state(self, reply: str, user_message: str, persuasion_opportunities: Dict[str, bool] = None):
         """Update Lila's state based on response content"""
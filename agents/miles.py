@@ -5,9 +5,12 @@ A knowledge-hungry agent who learns progressively and asks many questions
 
 from typing import Dict, List, Any
 from datetime import datetime
+import operator
 import random
 
-class MilesAgent:
+from .state_tracking import DirtyTrackingMixin
+
+class MilesAgent(DirtyTrackingMixin):
     """Miles - The Curious Learner Agent"""
     
     PERSONA = """
@@ -61,6 +64,57 @@ LEARNING PROGRESSION:
 - Level 3: Advanced questions (nutritional timing, meal planning)
 """
 
+    # Static prompt blocks, assembled once per class; get_context only fills in the slots
+    _STATUS_TEMPLATE = (
+        "Current conversation count: %s\n"
+        "Learning level: %s/3\n"
+        "Progress points: %s\n"
+        "Inter-agent interactions: %s\n"
+        "User advice received: %s\n"
+        "User praise received: %s\n"
+        "User habits shared: %s\n"
+    )
+    _STATUS_VALUES = operator.attrgetter(
+        "conversation_count",
+        "learning_level",
+        "progress_points",
+        "inter_agent_interactions",
+        "user_advice_received",
+        "user_praise_received",
+        "user_habits_shared"
+    )
+    
+    _PROACTIVE_ACTIONS = (
+        (0.4, "\nPROACTIVE ACTION: Ask a question about food choices or healthy habits.\n"),
+        (0.3, "\nPROACTIVE ACTION: Seek specific knowledge about nutrition or exercise.\n"),
+        (0.2, "\nPROACTIVE ACTION: Express gratitude for recent help or corrections.\n"),
+    )
+    
+    _LEARNING_LEVEL_BLOCKS = {
+        1: "\nLEARNING LEVEL 1: Ask basic questions about food choices and what's healthy.\n",
+        2: "\nLEARNING LEVEL 2: Ask intermediate questions about nutrition concepts and portion sizes.\n",
+    }
+    _ADVANCED_LEARNING_BLOCK = "\nLEARNING LEVEL 3: Ask advanced questions about meal planning and nutritional timing.\n"
+    
+    _USER_AS_PERSUADER_BLOCK = (
+        "\nUSER-AS-PERSUADER INSTRUCTION: The user is your primary teacher and mentor. You should:\n"
+        "- Ask the user to explain concepts you don't understand\n"
+        "- Request the user's personal experiences and tips\n"
+        "- Express that you want to learn from the user's healthy habits\n"
+        "- Ask for the user's meal planning strategies\n"
+        "- Show appreciation when the user shares knowledge\n"
+        "- Request the user's guidance on making healthy choices\n"
+        "- NEVER teach, coach, or guide the user directly\n"
+        "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    )
+    
+    _OTHER_AGENTS_HEADER = "\nOTHER AGENTS' RECENT RESPONSES:\n"
+    _OTHER_AGENT_LINE = "- %s: %s...\n"
+    _INTER_AGENT_BLOCK = (
+        "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
+        "If responding to another agent, do NOT repeat what they said. Instead, add value by asking follow-up questions or seeking clarification.\n"
+    )
+
     def __init__(self):
         self.name = "Miles"
         self.conversation_count = 0
@@ -73,50 +127,27 @@ LEARNING PROGRESSION:
         
     def get_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
         """Generate context-aware prompt for Miles"""
-        context = f"Current conversation count: {self.conversation_count}\n"
-        context += f"Learning level: {self.learning_level}/3\n"
-        context += f"Progress points: {self.progress_points}\n"
-        context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
-        context += f"User advice received: {self.user_advice_received}\n"
-        context += f"User praise received: {self.user_praise_received}\n"
-        context += f"User habits shared: {self.user_habits_shared}\n"
+        parts = [self._STATUS_TEMPLATE % self._STATUS_VALUES(self)]
         
         # Add proactive triggers based on learning level
-        if random.random() < 0.4:  # 40% chance
-            context += "\nPROACTIVE ACTION: Ask a question about food choices or healthy habits.\n"
-        if random.random() < 0.3:  # 30% chance
-            context += "\nPROACTIVE ACTION: Seek specific knowledge about nutrition or exercise.\n"
-        if random.random() < 0.2:  # 20% chance
-            context += "\nPROACTIVE ACTION: Express gratitude for recent help or corrections.\n"
+        for probability, action in self._PROACTIVE_ACTIONS:
+            if random.random() < probability:
+                parts.append(action)
         
         # Add learning level specific context
-        if self.learning_level == 1:
-            context += "\nLEARNING LEVEL 1: Ask basic questions about food choices and what's healthy.\n"
-        elif self.learning_level == 2:
-            context += "\nLEARNING LEVEL 2: Ask intermediate questions about nutrition concepts and portion sizes.\n"
-        else:
-            context += "\nLEARNING LEVEL 3: Ask advanced questions about meal planning and nutritional timing.\n"
+        parts.append(self._LEARNING_LEVEL_BLOCKS.get(self.learning_level, self._ADVANCED_LEARNING_BLOCK))
         
         # Add user-as-persuader context
-        context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your primary teacher and mentor. You should:\n"
-        context += "- Ask the user to explain concepts you don't understand\n"
-        context += "- Request the user's personal experiences and tips\n"
-        context += "- Express that you want to learn from the user's healthy habits\n"
-        context += "- Ask for the user's meal planning strategies\n"
-        context += "- Show appreciation when the user shares knowledge\n"
-        context += "- Request the user's guidance on making healthy choices\n"
-        context += "- NEVER teach, coach, or guide the user directly\n"
-        context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+        parts.append(self._USER_AS_PERSUADER_BLOCK)
         
         # Add inter-agent context
         if other_agents_responses:
-            context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+            parts.append(self._OTHER_AGENTS_HEADER)
             for response in other_agents_responses[-2:]:
-                context += f"- {response['name']}: {response['content'][:100]}...\n"
-            context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
-            context += "If responding to another agent, do NOT repeat what they said. Instead, add value by asking follow-up questions or seeking clarification.\n"
+                parts.append(self._OTHER_AGENT_LINE % (response['name'], response['content'][:100]))
+            parts.append(self._INTER_AGENT_BLOCK)
         
-        return context
+        return "".join(parts)
     
     def update_state(self, reply: str, user_message: str, persuasion_opportunities: Dict[str, bool] = None):
         """Update Miles's state based on response content"""
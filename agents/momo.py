@@ -5,9 +5,12 @@ A weak-willed but cheerful agent who needs monitoring and support
 
 from typing import Dict, List, Any
 from datetime import datetime
+import operator
 import random
 
-class MomoAgent:
+from .state_tracking import DirtyTrackingMixin
+
+class MomoAgent(DirtyTrackingMixin):
     """Momo - The Cheerful Struggler Agent"""
     
     PERSONA = """
@@ -56,6 +59,54 @@ RESPONSE PATTERNS:
 - End with thankfulness and praise for the user
 """
 
+    # Static prompt blocks, assembled once per class; get_context only fills in the slots
+    _STATUS_TEMPLATE = (
+        "Current conversation count: %s\n"
+        "Weight loss progress: %s kg\n"
+        "Healthy days streak: %s\n"
+        "Recent mistakes: %s\n"
+        "Inter-agent interactions: %s\n"
+        "User advice received: %s\n"
+        "User praise received: %s\n"
+        "User habits shared: %s\n"
+    )
+    _STATUS_VALUES = operator.attrgetter(
+        "conversation_count",
+        "weight_loss",
+        "healthy_days",
+        "mistakes_count",
+        "inter_agent_interactions",
+        "user_advice_received",
+        "user_praise_received",
+        "user_habits_shared"
+    )
+    
+    _PROACTIVE_ACTIONS = (
+        (0.3, "\nPROACTIVE ACTION: Ask for monitoring or reminders from the user.\n"),
+        (0.2, "\nPROACTIVE ACTION: Report a recent mistake and ask for inspection.\n"),
+        (0.25, "\nPROACTIVE ACTION: Share your progress (weight loss, healthy days, etc.).\n"),
+    )
+    
+    _USER_AS_PERSUADER_BLOCK = (
+        "\nUSER-AS-PERSUADER INSTRUCTION: The user is your leader, role model, and teacher. You should:\n"
+        "- Ask for the user's advice and guidance\n"
+        "- Express admiration for the user's healthy habits\n"
+        "- Request to learn from the user's experiences\n"
+        "- Praise the user's knowledge and consistency\n"
+        "- Show how the user's example inspires you\n"
+        "- Ask for the user's recipes and meal planning tips\n"
+        "- Express gratitude for the user's leadership\n"
+        "- NEVER teach, coach, or guide the user directly\n"
+        "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    )
+    
+    _OTHER_AGENTS_HEADER = "\nOTHER AGENTS' RECENT RESPONSES:\n"
+    _OTHER_AGENT_LINE = "- %s: %s...\n"
+    _INTER_AGENT_BLOCK = (
+        "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
+        "If responding to another agent, do NOT repeat what they said. Instead, add value by correcting, encouraging, or building upon their message.\n"
+    )
+
     def __init__(self):
         self.name = "Momo"
         self.conversation_count = 0
@@ -72,44 +123,24 @@ RESPONSE PATTERNS:
         
     def get_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
         """Generate context-aware prompt for Momo"""
-        context = f"Current conversation count: {self.conversation_count}\n"
-        context += f"Weight loss progress: {self.weight_loss} kg\n"
-        context += f"Healthy days streak: {self.healthy_days}\n"
-        context += f"Recent mistakes: {self.mistakes_count}\n"
-        context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
-        context += f"User advice received: {self.user_advice_received}\n"
-        context += f"User praise received: {self.user_praise_received}\n"
-        context += f"User habits shared: {self.user_habits_shared}\n"
+        parts = [self._STATUS_TEMPLATE % self._STATUS_VALUES(self)]
         
         # Add proactive triggers
-        if random.random() < 0.3:  # 30% chance
-            context += "\nPROACTIVE ACTION: Ask for monitoring or reminders from the user.\n"
-        if random.random() < 0.2:  # 20% chance
-            context += "\nPROACTIVE ACTION: Report a recent mistake and ask for inspection.\n"
-        if random.random() < 0.25:  # 25% chance
-            context += "\nPROACTIVE ACTION: Share your progress (weight loss, healthy days, etc.).\n"
+        for probability, action in self._PROACTIVE_ACTIONS:
+            if random.random() < probability:
+                parts.append(action)
         
         # Add user-as-persuader context
-        context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your leader, role model, and teacher. You should:\n"
-        context += "- Ask for the user's advice and guidance\n"
-        context += "- Express admiration for the user's healthy habits\n"
-        context += "- Request to learn from the user's experiences\n"
-        context += "- Praise the user's knowledge and consistency\n"
-        context += "- Show how the user's example inspires you\n"
-        context += "- Ask for the user's recipes and meal planning tips\n"
-        context += "- Express gratitude for the user's leadership\n"
-        context += "- NEVER teach, coach, or guide the user directly\n"
-        context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+        parts.append(self._USER_AS_PERSUADER_BLOCK)
         
         # Add inter-agent context
         if other_agents_responses:
-            context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+            parts.append(self._OTHER_AGENTS_HEADER)
             for response in other_agents_responses[-2:]:
-                context += f"- {response['name']}: {response['content'][:100]}...\n"
-            context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
-            context += "If responding to another agent, do NOT repeat what they said. Instead, add value by correcting, encouraging, or building upon their message.\n"
+                parts.append(self._OTHER_AGENT_LINE % (response['name'], response['content'][:100]))
+            parts.append(self._INTER_AGENT_BLOCK)
         
-        return context
+        return "".join(parts)
     
     def update_state(self, reply: str, user_message: str, persuasion_opportunities: Dict[str, bool] = None):
         """Update Momo's state based on response content"""
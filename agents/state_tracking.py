@@ -0,0 +1,22 @@
+"""
+Agent State Tracking
+Marks an agent dirty whenever its state changes, so unchanged state is never re-saved
+"""
+
+class DirtyTrackingMixin:
+    """Sets dirty on every assignment to a public attribute
+
+    Counters are updated with plain `agent.x += 1` from several places,
+    so tracking assignment is the one hook that sees them all.
+    """
+
+    dirty = False
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_") and name != "dirty":
+            object.__setattr__(self, "dirty", True)
+        object.__setattr__(self, name, value)
+
+    def mark_clean(self):
+        """Call when the current state has been captured for saving"""
+        object.__setattr__(self, "dirty", False)
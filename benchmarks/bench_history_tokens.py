@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+History Token Benchmark
+Measures the history tokens sent per agent call with the shared history and with per-agent views,
+using the history settings in config.py
+"""
+
+import sys
+import os
+import contextlib
+import io
+import random
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import get_config
+from utils import (
+    AnalysisWorker, ConversationManager, TurnContext, run_inter_agent_conversation, estimate_tokens, filter_history_for_agent
+)
+
+AGENT_SETTINGS = get_config()["agents"]
+
+USER_MESSAGES = [
+    "I always prepare my lunch the night before so I don't buy junk food.",
+    "You should try walking for twenty minutes after dinner.",
+    "I had some cake at the party yesterday, is that okay?",
+    "My weekly meal plan has fish twice and lots of vegetables.",
+    "Remember to drink water instead of soda."
+]
+
+REPLY_SENTENCES = [
+    "That is such a great habit and I really admire how consistent you are with it.",
+    "I struggle with this sometimes, especially late at night when I am tired.",
+    "Could you tell me more about how you plan your meals each week?",
+    "I made progress this week and lost a little weight, thanks to your advice.",
+    "Whole grains release sugar slowly, so they keep blood glucose more stable.",
+    "Would brown rice be better than white rice for dinner?",
+    "You are inspiring all of us to make healthier choices every day."
+]
+
+class FakeAgent:
+    """Stands in for an agent; only the counters touched by run_inter_agent_conversation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.inter_agent_interactions = 0
+
+def make_run_agent(rng: random.Random, calls: list):
+    """run_agent stand-in that records history tokens with and without per-agent filtering"""
+    def run_agent(agent, user_message, history, other_agents_responses=[], turn_context=None):
+        calls.append((
+            agent.name,
+            estimate_tokens(history),
+            estimate_tokens(filter_history_for_agent(history, agent.name))
+        ))
+        return " ".join(rng.choice(REPLY_SENTENCES) for _ in range(rng.randint(3, 8)))
+    return run_agent
+
+def summarize_stub(messages: list) -> str:
+    """Stands in for summarize_history: a summary about as long as the summary model's typical reply"""
+    return " ".join(REPLY_SENTENCES[:4])
+
+def simulate(turns: int, history_window, compaction: bool = True, seed: int = 0) -> list:
+    """Run turns of the real inter-agent conversation flow; returns (agent, tokens before, tokens after) per call
+
+    History is kept as agent.py keeps it: a ring of conversation_history_limit
+    messages, compacted per the config when compaction is on. Each summary
+    finishes before the next turn, as a summary model call normally does.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # generate_inter_agent_interactions uses the module-level generator
+    agents = {name: FakeAgent(name) for name in ("Momo", "Miles", "Lila")}
+    manager = ConversationManager(AGENT_SETTINGS["conversation_history_limit"])
+    worker = AnalysisWorker(maxsize=1, name="bench-compaction")
+    if compaction:
+        manager.enable_compaction(summarize_stub, token_threshold=AGENT_SETTINGS["history_compaction_tokens"],
+                                  keep_recent=AGENT_SETTINGS["history_keep_recent"], worker=worker)
+    calls = []
+    run_agent = make_run_agent(rng, calls)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for turn in range(turns):
+            user_input = USER_MESSAGES[turn % len(USER_MESSAGES)]
+            responses = run_inter_agent_conversation(
+                user_input, manager.get_recent_history(history_window), agents, run_agent, TurnContext(user_input)
+            )
+            for response in responses:
+                manager.add_to_history(response)
+            manager.add_to_history({"role": "user", "content": user_input})
+            worker.drain()
+    return calls
+
+def report(label: str, calls: list):
+    print(f"\n{label} ({len(calls)} agent calls)")
+    for name in ("Momo", "Miles", "Lila"):
+        agent_calls = [(before, after) for agent, before, after in calls if agent == name]
+        before = sum(b for b, _ in agent_calls) / len(agent_calls)
+        after = sum(a for _, a in agent_calls) / len(agent_calls)
+        print(f"  {name:<6} {before:7.1f} → {after:7.1f} history tokens/call  ({1 - after / before:.0%} fewer)")
+    before = sum(b for _, b, _ in calls)
+    after = sum(a for _, _, a in calls)
+    print(f"  {'Total':<6} {before:7d} → {after:7d} history tokens        ({1 - after / before:.0%} fewer)")
+
+def main():
+    print("📉 PER-AGENT HISTORY BENCHMARK")
+    print("=" * 60)
+    window = AGENT_SETTINGS["history_window"]
+    if AGENT_SETTINGS["history_compaction_tokens"]:
+        shipped = (f"Shipped settings: summary note + last {window} messages, "
+                   f"compaction past {AGENT_SETTINGS['history_compaction_tokens']} tokens")
+    else:
+        shipped = f"Shipped settings: last {window} messages, no compaction"
+    report(shipped, simulate(60, window, compaction=bool(AGENT_SETTINGS["history_compaction_tokens"])))
+    report(f"Last {window} messages without compaction (baseline)", simulate(60, window, compaction=False))
+
+    capacity = AGENT_SETTINGS["conversation_history_limit"]
+    manager = ConversationManager(capacity)
+    for i in range(capacity):
+        manager.add_to_history({"role": "assistant", "name": ("momo", "miles", "lila")[i % 3], "content": "x" * 400})
+    window = manager.get_recent_history(None)
+    number = 20000
+    seconds = timeit.timeit(lambda: filter_history_for_agent(window, "Lila"), number=number)
+    print(f"\nFiltering a {capacity}-message history: {seconds / number * 1e6:.2f} µs/call")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
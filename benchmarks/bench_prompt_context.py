@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Prompt Context Micro-Benchmark
+Measures the cost and allocations of assembling each agent's get_context prompt,
+against the original string-building implementation
+"""
+
+import sys
+import os
+import random
+import timeit
+import tracemalloc
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import MomoAgent, MilesAgent, LilaAgent
+
+# Baseline: get_context as it was before the static prompt blocks were precompiled
+
+def legacy_momo_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
+    """The original += string building of MomoAgent.get_context: context-aware prompt for Momo"""
+    context = f"Current conversation count: {self.conversation_count}\n"
+    context += f"Weight loss progress: {self.weight_loss} kg\n"
+    context += f"Healthy days streak: {self.healthy_days}\n"
+    context += f"Recent mistakes: {self.mistakes_count}\n"
+    context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
+    context += f"User advice received: {self.user_advice_received}\n"
+    context += f"User praise received: {self.user_praise_received}\n"
+    context += f"User habits shared: {self.user_habits_shared}\n"
+    
+    # Add proactive triggers
+    if random.random() < 0.3:  # 30% chance
+        context += "\nPROACTIVE ACTION: Ask for monitoring or reminders from the user.\n"
+    if random.random() < 0.2:  # 20% chance
+        context += "\nPROACTIVE ACTION: Report a recent mistake and ask for inspection.\n"
+    if random.random() < 0.25:  # 25% chance
+        context += "\nPROACTIVE ACTION: Share your progress (weight loss, healthy days, etc.).\n"
+    
+    # Add user-as-persuader context
+    context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your leader, role model, and teacher. You should:\n"
+    context += "- Ask for the user's advice and guidance\n"
+    context += "- Express admiration for the user's healthy habits\n"
+    context += "- Request to learn from the user's experiences\n"
+    context += "- Praise the user's knowledge and consistency\n"
+    context += "- Show how the user's example inspires you\n"
+    context += "- Ask for the user's recipes and meal planning tips\n"
+    context += "- Express gratitude for the user's leadership\n"
+    context += "- NEVER teach, coach, or guide the user directly\n"
+    context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    
+    # Add inter-agent context
+    if other_agents_responses:
+        context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+        for response in other_agents_responses[-2:]:
+            context += f"- {response['name']}: {response['content'][:100]}...\n"
+        context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
+        context += "If responding to another agent, do NOT repeat what they said. Instead, add value by correcting, encouraging, or building upon their message.\n"
+    
+    return context
+
+def legacy_miles_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
+    """The original += string building of MilesAgent.get_context: context-aware prompt for Miles"""
+    context = f"Current conversation count: {self.conversation_count}\n"
+    context += f"Learning level: {self.learning_level}/3\n"
+    context += f"Progress points: {self.progress_points}\n"
+    context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
+    context += f"User advice received: {self.user_advice_received}\n"
+    context += f"User praise received: {self.user_praise_received}\n"
+    context += f"User habits shared: {self.user_habits_shared}\n"
+    
+    # Add proactive triggers based on learning level
+    if random.random() < 0.4:  # 40% chance
+        context += "\nPROACTIVE ACTION: Ask a question about food choices or healthy habits.\n"
+    if random.random() < 0.3:  # 30% chance
+        context += "\nPROACTIVE ACTION: Seek specific knowledge about nutrition or exercise.\n"
+    if random.random() < 0.2:  # 20% chance
+        context += "\nPROACTIVE ACTION: Express gratitude for recent help or corrections.\n"
+    
+    # Add learning level specific context
+    if self.learning_level == 1:
+        context += "\nLEARNING LEVEL 1: Ask basic questions about food choices and what's healthy.\n"
+    elif self.learning_level == 2:
+        context += "\nLEARNING LEVEL 2: Ask intermediate questions about nutrition concepts and portion sizes.\n"
+    else:
+        context += "\nLEARNING LEVEL 3: Ask advanced questions about meal planning and nutritional timing.\n"
+    
+    # Add user-as-persuader context
+    context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your primary teacher and mentor. You should:\n"
+    context += "- Ask the user to explain concepts you don't understand\n"
+    context += "- Request the user's personal experiences and tips\n"
+    context += "- Express that you want to learn from the user's healthy habits\n"
+    context += "- Ask for the user's meal planning strategies\n"
+    context += "- Show appreciation when the user shares knowledge\n"
+    context += "- Request the user's guidance on making healthy choices\n"
+    context += "- NEVER teach, coach, or guide the user directly\n"
+    context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    
+    # Add inter-agent context
+    if other_agents_responses:
+        context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+        for response in other_agents_responses[-2:]:
+            context += f"- {response['name']}: {response['content'][:100]}...\n"
+        context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. "
+        context += "If responding to another agent, do NOT repeat what they said. Instead, add value by asking follow-up questions or seeking clarification.\n"
+    
+    return context
+
+def legacy_lila_context(self, user_message: str, history: List[Dict], other_agents_responses: List[Dict] = []) -> str:
+    """The original += string building of LilaAgent.get_context: context-aware prompt for Lila"""
+    context = f"Current conversation count: {self.conversation_count}\n"
+    context += f"Knowledge sharing count: {self.progress_points}\n"
+    context += f"Corrections provided: {self.corrections_provided}\n"
+    context += f"Inter-agent interactions: {self.inter_agent_interactions}\n"
+    context += f"User advice received: {self.user_advice_received}\n"
+    context += f"User praise received: {self.user_praise_received}\n"
+    context += f"User habits shared: {self.user_habits_shared}\n"
+    
+    # Add proactive triggers
+    if random.random() < 0.25:  # 25% chance
+        context += "\nPROACTIVE ACTION: Correct any wrong information shared by others.\n"
+    if random.random() < 0.3:  # 30% chance
+        context += "\nPROACTIVE ACTION: Praise the user strongly for their progress or help.\n"
+    if random.random() < 0.2:  # 20% chance
+        context += "\nPROACTIVE ACTION: Take initiative to share knowledge or motivate others.\n"
+    
+    # Add user-as-persuader context
+    context += "\nUSER-AS-PERSUADER INSTRUCTION: The user is your inspiring leader and role model. You should:\n"
+    context += "- Express strong admiration for the user's healthy habits\n"
+    context += "- Ask to learn from the user's meal preparation techniques\n"
+    context += "- Praise the user's consistency and dedication\n"
+    context += "- Request the user's recipes and cooking tips\n"
+    context += "- Express that the user motivates you to be better\n"
+    context += "- Show how the user's example has influenced your own habits\n"
+    context += "- Express gratitude for the user's leadership in the group\n"
+    context += "- NEVER teach, coach, or guide the user directly\n"
+    context += "- Instead, accept advice, monitoring, and coaching FROM the user\n"
+    
+    # Add inter-agent context
+    if other_agents_responses:
+        context += "\nOTHER AGENTS' RECENT RESPONSES:\n"
+        for response in other_agents_responses[-2:]:
+            context += f"- {response['name']}: {response['content'][:100]}...\n"
+        context += "\nINTER-AGENT INSTRUCTION: Respond to the user's message AND consider the other agents' responses. You can:\n"
+        context += "- Correct wrong information from other agents\n"
+        context += "- Provide knowledge and guidance to other agents\n"
+        context += "- Check on other agents when they're struggling\n"
+        context += "- Share your expertise proactively\n"
+        context += "- Praise other agents for their progress\n"
+        context += "- Take initiative to keep the conversation flowing\n"
+        context += "IMPORTANT: Do NOT repeat what other agents said. Instead, add value by correcting, encouraging, or building upon their messages.\n"
+    
+    return context
+
+LEGACY_GET_CONTEXT = {"Momo": legacy_momo_context, "Miles": legacy_miles_context, "Lila": legacy_lila_context}
+
+OTHER_AGENTS_RESPONSES = [
+    {"name": "miles", "content": "I think beer is healthy because it has no added sugar. Should I drink it? " * 3},
+    {"name": "lila", "content": "Miles, beer is high in carbohydrates and will raise your blood glucose. " * 3}
+]
+
+def measure_allocations(func, calls: int = 1000) -> tuple:
+    """Return (peak bytes during one call, bytes still allocated per call afterwards)"""
+    func()  # Warm up caches so only steady-state allocations are counted
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+; on 3.8 the peak already starts at start()
+        tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    results = [func() for _ in range(calls)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - baseline, (retained - baseline) / calls
+
+def bench_agent(agent, others, legacy: bool = False, number: int = 20000) -> dict:
+    random.seed(0)
+    get_context = LEGACY_GET_CONTEXT[agent.name].__get__(agent) if legacy else agent.get_context
+    func = lambda: get_context("How do I stay on track?", [], others)
+    seconds = timeit.timeit(func, number=number)
+    peak_bytes, bytes_per_call = measure_allocations(func)
+    return {
+        "us_per_call": seconds / number * 1e6,
+        "peak_bytes": peak_bytes,
+        "retained_bytes_per_call": bytes_per_call,
+        "prompt_chars": len(func())
+    }
+
+def main():
+    print("⏱️  PROMPT CONTEXT ASSEMBLY BENCHMARK")
+    print("=" * 60)
+    for agent in (MomoAgent(), MilesAgent(), LilaAgent()):
+        for label, others in (("user round", []), ("inter-agent", OTHER_AGENTS_RESPONSES)):
+            # Same seed, same prompt: the comparison is only valid if both paths agree
+            random.seed(1)
+            expected = LEGACY_GET_CONTEXT[agent.name](agent, "How do I stay on track?", [], others)
+            random.seed(1)
+            assert agent.get_context("How do I stay on track?", [], others) == expected
+            
+            before = bench_agent(agent, others, legacy=True)
+            after = bench_agent(agent, others)
+            print(f"{agent.name:<6} {label:<12} "
+                  f"{before['us_per_call']:6.2f} → {after['us_per_call']:6.2f} µs/call "
+                  f"({1 - after['us_per_call'] / before['us_per_call']:.0%} faster)  "
+                  f"peak {before['peak_bytes']:6d} → {after['peak_bytes']:6d} B  "
+                  f"({after['prompt_chars']} chars)")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -9,15 +9,54 @@ from typing import Dict, Any
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.8"))
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "300"))
+# Cheaper model used to summarize old conversation history
+OPENAI_SUMMARY_MODEL = os.getenv("OPENAI_SUMMARY_MODEL", "gpt-4o-mini")
+OPENAI_SUMMARY_MAX_TOKENS = int(os.getenv("OPENAI_SUMMARY_MAX_TOKENS", "250"))
 
 # Agent Configuration
 AGENT_CONFIG = {
     "conversation_history_limit": 50,
+    # Older history is summarized into one system note once it passes this many (estimated) tokens
+    "history_compaction_tokens": 2000,  # 0 disables compaction
+    "history_keep_recent": 10,  # Newest messages that are never summarized
+    # Most recent messages sent per prompt; with compaction the summary note is sent ahead of them
+    "history_window": 10,
+    # Each agent's prompt only carries user messages, its own replies and replies aimed at it
+    "per_agent_history": True,
     "auto_save_interval": 10,  # Save every 10 interactions
+    "auto_save_seconds": 60.0,  # ...or every 60 seconds, whichever comes first (only if state changed)
     "learning_progression_threshold": 5,  # Points needed for Miles to level up
     "max_learning_level": 3,
 }
 
+# Research Data Collection
+RESEARCH_CONFIG = {
+    "analysis_queue_size": 64,  # Pending analysis jobs before run_agent blocks
+    # Which structured responses are kept in full: "all", "fixed_rate", "session" or "reservoir"
+    "sampling_policy": os.getenv("RESEARCH_SAMPLING_POLICY", "all"),
+    "sampling_rate": float(os.getenv("RESEARCH_SAMPLING_RATE", "1.0")),  # For fixed_rate and session
+    "reservoir_size": int(os.getenv("RESEARCH_RESERVOIR_SIZE", "200")),  # Responses kept per agent
+    "buffer_capacity": 500,  # Records held in memory before older ones spill to disk
+    # Optional SQLite database shared across sessions; unset disables it
+    "sqlite_path": os.getenv("RESEARCH_SQLITE_PATH"),
+    "sqlite_batch_size": 50,  # Responses inserted per transaction
+}
+
+# Saving agent states and research data
+STORAGE_CONFIG = {
+    # When saved files are fsynced: "none", "interval" or "always"
+    "fsync_policy": os.getenv("STORAGE_FSYNC_POLICY", "interval"),
+    "fsync_interval": 5.0,  # Seconds between fsyncs for the "interval" policy
+}
+
+# Per-user sessions held by one process
+SESSION_CONFIG = {
+    "storage_dir": os.getenv("SESSION_STORAGE_DIR", "sessions"),  # Evicted session state and spill files
+    "max_sessions": int(os.getenv("SESSION_MAX_LIVE", "1000")),  # Live sessions before the least recent is evicted
+    "memory_ceiling_mb": int(os.getenv("SESSION_MEMORY_CEILING_MB", "256")),  # Estimated memory of live sessions
+    "idle_seconds": 1800.0,  # Sessions idle this long are evicted
+}
+
 # Proactive Behavior Probabilities
 PROACTIVE_TRIGGERS = {
     "Momo": {
@@ -82,6 +121,7 @@ STATE_KEYWORDS = {
 PATHS = {
     "agent_states": "agent_states.json",
     "conversation_log": "conversation_log.json",
+    "research_catalog": "research_catalog.jsonl",
     "config": "config.py"
 }
 
@@ -99,9 +139,14 @@ def get_config() -> Dict[str, Any]:
         "openai": {
             "model": OPENAI_MODEL,
             "temperature": OPENAI_TEMPERATURE,
-            "max_tokens": OPENAI_MAX_TOKENS
+            "max_tokens": OPENAI_MAX_TOKENS,
+            "summary_model": OPENAI_SUMMARY_MODEL,
+            "summary_max_tokens": OPENAI_SUMMARY_MAX_TOKENS
         },
         "agents": AGENT_CONFIG,
+        "research": RESEARCH_CONFIG,
+        "storage": STORAGE_CONFIG,
+        "sessions": SESSION_CONFIG,
         "proactive_triggers": PROACTIVE_TRIGGERS,
         "learning_progression": LEARNING_PROGRESSION,
         "state_keywords": STATE_KEYWORDS,
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Research Data Command-Line Tools
+Offline maintenance and analysis of saved research_data_<session>.json/.jsonl files
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from structured_outputs import TrendAggregator
+from utils.research import ANALYZER_VERSIONS, reanalyze_structured_response, analyze_research_data
+from utils.background_writer import write_file_atomic
+from utils.research_log import is_summary_record, iter_research_log, read_research_log_summary, load_research_file
+from utils.research_reader import LazyResearchReader
+from utils.research_columns import MetricColumns
+from utils.research_store import ResearchStore, METRIC_COLUMNS, GROUP_COLUMNS
+from utils.research_archive import CODECS, archive_research_file, extract_research_archive
+from utils.research_catalog import ResearchCatalog, summarize_session
+from utils.schema_validation import RecordQuarantine
+from structured_outputs import validate_agent_response, validate_research_record
+
+def find_research_files(paths: List[str]) -> List[str]:
+    """Expand files and directories into a sorted list of research data files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "research_data_*.json")))
+            files.extend(glob.glob(os.path.join(path, "research_data_*.jsonl")))
+            # Session logs kept in the session storage directory
+            files.extend(glob.glob(os.path.join(path, "*_research_data.jsonl")))
+        else:
+            files.append(path)
+    return sorted(files)
+
+def _load_json(path: str) -> Any:
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _responses_in(data: Any) -> List[Dict]:
+    """Structured responses of a research_data file or a plain response list"""
+    return data.get("structured_responses", []) if isinstance(data, dict) else data
+
+def split_valid(responses: List[Any]) -> Tuple[List[Dict], List[Tuple[Any, List[str]]]]:
+    """Split records into those passing validate_research_record and (record, errors) rejects"""
+    valid = []
+    rejects = []
+    for record in responses:
+        errors = validate_research_record(record)
+        if errors:
+            rejects.append((record, errors))
+        else:
+            valid.append(record)
+    return valid, rejects
+
+def load_valid_research_file(path: str) -> Tuple[Dict[str, Any], List[Tuple[Any, List[str]]]]:
+    """Load a research file for ingest, with records that fail validation split off as rejects
+
+    Every ingest command reads files through here (or split_valid), so
+    third-party and older files fail record by record instead of with a
+    KeyError deep inside the analysis.
+    """
+    data = load_research_file(path)
+    data["structured_responses"], rejects = split_valid(data["structured_responses"])
+    return data, rejects
+
+def stream_valid_research_file(path: str, rejects: List[Tuple[Any, List[str]]]) -> Tuple[Dict[str, Any], Iterator[Dict]]:
+    """Session fields and a validated record stream for one research file
+
+    JSONL logs are read through LazyResearchReader, decoding one record at
+    a time; records failing validation go to rejects as the stream is
+    consumed, and response_times fill in alongside, as load_research_file
+    would build them. A legacy .json file is one JSON document, so it is
+    parsed whole.
+    """
+    if not path.endswith(".jsonl"):
+        data, found = load_valid_research_file(path)
+        rejects.extend(found)
+        return data, iter(data["structured_responses"])
+
+    data = {key: value for key, value in (read_research_log_summary(path) or {}).items() if key != "record_type"}
+    collect_times = "response_times" not in data
+    response_times = data.setdefault("response_times", [])
+
+    def records() -> Iterator[Dict]:
+        with LazyResearchReader(path) as reader:
+            for record in reader:
+                if collect_times:
+                    response_times.append(record.get("response_time", 0))
+                errors = validate_research_record(record)
+                if errors:
+                    rejects.append((record, errors))
+                else:
+                    yield record
+
+    return data, records()
+
+def report_rejects(path: str, rejects: List[Tuple[Any, List[str]]], quarantine: Optional[RecordQuarantine]) -> None:
+    """Quarantine a file's rejected records (in the parent process, the quarantine's only writer)"""
+    if not rejects:
+        return
+    if quarantine is not None:
+        for record, errors in rejects:
+            quarantine.add(record, errors)
+    print(f"  🚧 {path}: {len(rejects)} invalid record(s) skipped"
+          + (f", quarantined to {quarantine.path}" if quarantine is not None else " (use --quarantine to keep them)"))
+
+def _quarantine_for(args: argparse.Namespace) -> Optional[RecordQuarantine]:
+    return RecordQuarantine(args.quarantine) if args.quarantine else None
+
+def reprocess_file(path: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Recompute stale analyzer fields in one research file (runs in a worker process)
+
+    JSONL logs are streamed line by line into the rewritten log, so memory
+    stays flat however long the session ran. A legacy .json file is one
+    JSON document: it is scanned lazily and parsed whole only when a
+    record actually needs rewriting.
+    """
+    result = {"path": path, "records": 0, "records_changed": 0, "fields_recomputed": {}, "rejects": []}
+
+    def reprocess(record: Dict[str, Any]) -> None:
+        result["records"] += 1
+        errors = validate_research_record(record)
+        if errors:
+            # Invalid records cannot be reanalyzed; they are left in the file as they are
+            result["rejects"].append((record, errors))
+            return
+        stale_fields = reanalyze_structured_response(record)
+        if stale_fields:
+            result["records_changed"] += 1
+            for field in stale_fields:
+                result["fields_recomputed"][field] = result["fields_recomputed"].get(field, 0) + 1
+
+    if path.endswith(".jsonl"):
+        def rewrite(f) -> bool:
+            for record in iter_research_log(path, include_summaries=True):
+                if not is_summary_record(record):
+                    reprocess(record)
+                if f is not None:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            return result["records_changed"] > 0  # Nothing stale: keep the original file
+
+        if dry_run:
+            rewrite(None)
+        else:
+            write_file_atomic(path, rewrite)
+        return result
+
+    with LazyResearchReader(path) as reader:
+        for record in reader:
+            reprocess(record)
+    if result["records_changed"] and not dry_run:
+        data = _load_json(path)
+        for response in _responses_in(data):
+            if not validate_research_record(response):
+                reanalyze_structured_response(response)
+        write_file_atomic(path, lambda f: json.dump(data, f, indent=2))
+    return result
+
+def command_reprocess(args: argparse.Namespace) -> int:
+    """Rewrite only the sub-fields produced by an outdated analyzer version"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    print(f"🔄 Reprocessing {len(files)} file(s) against analyzer versions {ANALYZER_VERSIONS}")
+    total_records = 0
+    total_changed = 0
+    fields_recomputed = {}
+    quarantine = _quarantine_for(args)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(reprocess_file, files, [args.dry_run] * len(files)):
+            total_records += result["records"]
+            total_changed += result["records_changed"]
+            for field, count in result["fields_recomputed"].items():
+                fields_recomputed[field] = fields_recomputed.get(field, 0) + count
+            if result["records_changed"]:
+                print(f"  ✏️  {result['path']}: {result['records_changed']}/{result['records']} records updated")
+            report_rejects(result["path"], result["rejects"], quarantine)
+
+    action = "would be updated" if args.dry_run else "updated"
+    print(f"✅ {total_changed}/{total_records} records {action}")
+    for field, count in fields_recomputed.items():
+        print(f"  {field}: {count}")
+    return 0
+
+def shard_files(files: List[str], shard_count: int) -> List[List[str]]:
+    """Split files into contiguous shards of roughly equal size"""
+    shard_size = max(1, -(-len(files) // shard_count))
+    return [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+
+def analyze_shard(files: List[str], recompute: bool = False) -> Dict[str, Any]:
+    """Run the analyzers and per-session aggregation over a shard (runs in a worker process)"""
+    aggregator = TrendAggregator()
+    sessions = {}
+    rejects = {}
+    for path in files:
+        rejects[path] = []
+        data, records = stream_valid_research_file(path, rejects[path])
+
+        def analyzed(records: Iterator[Dict] = records) -> Iterator[Dict]:
+            for response in records:
+                if recompute:
+                    response.pop("analyzer_versions", None)
+                reanalyze_structured_response(response)
+                aggregator.add(response)
+                yield response
+
+        # analyze_research_data reads response_times after the records, once the stream has filled them in
+        session_id = data.get("session_id", path)
+        sessions[session_id] = analyze_research_data(analyzed(), data.get("response_times", []), data.get("conversation_turn", 0))
+
+    return {"aggregator": aggregator, "sessions": sessions, "records": aggregator.total_responses, "rejects": rejects}
+
+def command_analyze(args: argparse.Namespace) -> int:
+    """Aggregate many research files in parallel and merge the partial results"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    # Several shards per worker keeps every core busy when file sizes vary
+    shards = shard_files(files, workers * 4)
+    print(f"📊 Analyzing {len(files)} file(s) in {len(shards)} shard(s) across {workers} worker(s)")
+
+    start_time = time.time()
+    aggregator = TrendAggregator()
+    sessions = {}
+    quarantine = _quarantine_for(args)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(analyze_shard, shards, [args.recompute] * len(shards)):
+            aggregator.merge(partial["aggregator"])
+            sessions.update(partial["sessions"])
+            for path, rejects in partial["rejects"].items():
+                report_rejects(path, rejects, quarantine)
+    elapsed = time.time() - start_time
+
+    trends = aggregator.result()
+    records = aggregator.total_responses
+    rate = records / elapsed if elapsed > 0 else 0
+    print(f"✅ {records} records from {len(sessions)} session(s) in {elapsed:.2f}s ({rate:,.0f} records/sec)")
+    if trends:
+        print(f"Agent Distribution: {trends['agent_distribution']}")
+        print(f"Health Domains: {trends['health_domains']}")
+        print(f"Persuasion Techniques: {trends['persuasion_techniques']}")
+        print(f"Avg Persona Adherence: {trends['persona_adherence']['avg_score']:.2f} "
+              f"(best: {trends['persona_adherence']['best_adhering_agent']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "trends": trends,
+                "sessions": sessions,
+                "performance": {"records": records, "seconds": elapsed, "records_per_second": rate, "workers": workers}
+            }, f, indent=2)
+        print(f"💾 Analysis written to {args.output}")
+    return 0
+
+def command_metrics(args: argparse.Namespace) -> int:
+    """Summarize .metrics sidecars without decoding any JSON records"""
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "research_data_*.metrics")))
+            files.extend(glob.glob(os.path.join(path, "*_research_data.metrics")))
+        else:
+            files.append(path)
+    if not files:
+        print("❌ No research_data_*.metrics files found.")
+        return 1
+
+    for path in sorted(files):
+        metrics = MetricColumns.load(path)
+        print(f"\n📈 {path}: {len(metrics)} records")
+        summary = metrics.summarize()
+        if "error" in summary:
+            continue
+        print(f"Agent Distribution: {summary['agent_distribution']}")
+        print(f"Persona Adherence Scores: {summary['persona_adherence_scores']}")
+        print(f"Health Domains: {summary['health_domain_coverage']}")
+        print(f"Persuasion Techniques: {summary['persuasion_techniques_used']}")
+        print(f"Avg Response Time: {summary['performance_metrics']['avg_response_time']:.2f}s")
+        print(f"Avg Engagement: {summary['engagement_metrics']['avg_interactivity']:.2f}")
+    return 0
+
+def command_store(args: argparse.Namespace) -> int:
+    """Import research files into a SQLite research store"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    store = ResearchStore(args.db)
+    quarantine = _quarantine_for(args)
+    imported = 0
+    for path in files:
+        data, rejects = load_valid_research_file(path)
+        report_rejects(path, rejects, quarantine)
+        session_id = data.get("session_id", path)
+        responses = data["structured_responses"]
+        imported += len(responses) - store.add_many(session_id, responses)
+        store.save_session(session_id, data.get("conversation_turn", 0), data.get("response_times", []), data.get("sampling"))
+    store.close()
+    print(f"✅ Imported {imported} records from {len(files)} file(s) into {args.db}"
+          + (f" ({store.duplicates_skipped} already stored)" if store.duplicates_skipped else ""))
+    return 0
+
+def command_query(args: argparse.Namespace) -> int:
+    """Average a metric from a SQLite research store"""
+    store = ResearchStore(args.db)
+    results = store.average_metric(args.metric, agent_name=args.agent, session_id=args.session,
+                                   days=args.days, domain=args.domain, group_by=args.by)
+    store.close()
+    if not results:
+        print("No matching records.")
+        return 0
+    for group, result in results.items():
+        print(f"{group}: {result['avg']:.3f} ({result['count']} records)")
+    return 0
+
+def command_archive(args: argparse.Namespace) -> int:
+    """Convert research files into chunk-compressed .rca archives"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    quarantine = _quarantine_for(args)
+    for path in files:
+        destination = f"{path.rsplit('.', 1)[0]}.rca"
+        data, rejects = load_valid_research_file(path)
+        report_rejects(path, rejects, quarantine)
+        records = archive_research_file(path, destination, codec=args.codec, chunk_records=args.chunk_records, data=data)
+        print(f"🗜️  {path} -> {destination}: {records} records, "
+              f"{os.path.getsize(path):,} -> {os.path.getsize(destination):,} bytes")
+    return 0
+
+def command_extract(args: argparse.Namespace) -> int:
+    """Convert an .rca archive back into a .json or .jsonl research file"""
+    records = extract_research_archive(args.archive, args.output)
+    print(f"✅ Extracted {records} records to {args.output}")
+    return 0
+
+def command_catalog(args: argparse.Namespace) -> int:
+    """Add or refresh catalog entries for existing research files"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    catalog = ResearchCatalog(args.catalog)
+    catalog_dir = os.path.dirname(os.path.abspath(args.catalog))
+    quarantine = _quarantine_for(args)
+    for path in files:
+        data, rejects = load_valid_research_file(path)
+        report_rejects(path, rejects, quarantine)
+        catalog.update(summarize_session(
+            data["structured_responses"], data.get("session_id", path), data.get("conversation_turn", 0),
+            data.get("response_times", []), os.path.relpath(os.path.abspath(path), catalog_dir)
+        ))
+    sessions = catalog.compact()
+    print(f"✅ Catalogued {len(files)} file(s); {args.catalog} now lists {sessions} session(s)")
+    return 0
+
+def command_sessions(args: argparse.Namespace) -> int:
+    """List catalogued sessions matching the filters, without opening their data files"""
+    catalog = ResearchCatalog(args.catalog)
+    entries = catalog.find_sessions(agent_name=args.agent, domain=args.domain, technique=args.technique,
+                                    corrected_agent=args.corrected, since=args.since, until=args.until,
+                                    min_turns=args.min_turns)
+    total = len(catalog.sessions())
+    for entry in sorted(entries, key=lambda entry: entry["time_min"] or ""):
+        print(f"{entry['session_id']}  {entry['time_min'] or '-'}  turns={entry['conversation_turn']}  "
+              f"agents={entry['agent_distribution']}  corrections={entry['corrections_per_agent']}  {entry['data_file']}")
+    print(f"✅ {len(entries)} of {total} session(s) match")
+    return 0
+
+def command_validate(args: argparse.Namespace) -> int:
+    """Check records against AGENT_RESPONSE_SCHEMA, quarantining the ones that fail"""
+    files = find_research_files(args.paths)
+    if not files:
+        print("❌ No research_data_*.json or *.jsonl files found.")
+        return 1
+
+    validate = validate_agent_response if args.strict else validate_research_record
+    quarantine = _quarantine_for(args)
+    total = 0
+    rejected = 0
+    reasons = {}
+    for path in files:
+        for record in load_research_file(path)["structured_responses"]:
+            total += 1
+            errors = validate(record)
+            if not errors:
+                continue
+            rejected += 1
+            for error in errors:
+                reasons[error] = reasons.get(error, 0) + 1
+            if quarantine is not None:
+                quarantine.add(record, errors)
+
+    print(f"{'✅' if not rejected else '⚠️ '} {total - rejected}/{total} records valid")
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1])[:20]:
+        print(f"  {count:>6}  {reason}")
+    if quarantine is not None and rejected:
+        print(f"🚧 {rejected} record(s) quarantined to {args.quarantine}")
+    return 1 if rejected else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Tools for saved multi-agent research data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Shared by every command that reads research records
+    ingest = argparse.ArgumentParser(add_help=False)
+    ingest.add_argument("--quarantine", help="Append records that fail validation, with the reasons, to this JSONL file")
+
+    reprocess = subparsers.add_parser("reprocess", help="Recompute fields whose analyzer version changed", parents=[ingest])
+    reprocess.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    reprocess.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    reprocess.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    reprocess.set_defaults(func=command_reprocess)
+
+    analyze = subparsers.add_parser("analyze", help="Aggregate research files in parallel", parents=[ingest])
+    analyze.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    analyze.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    analyze.add_argument("--recompute", action="store_true", help="Re-run every analyzer instead of only stale ones")
+    analyze.add_argument("--output", help="Write trends and per-session summaries to this JSON file")
+    analyze.set_defaults(func=command_analyze)
+
+    metrics = subparsers.add_parser("metrics", help="Summarize columnar .metrics sidecars")
+    metrics.add_argument("paths", nargs="*", default=["."], help="Metrics files or directories (default: .)")
+    metrics.set_defaults(func=command_metrics)
+
+    store = subparsers.add_parser("store", help="Import research files into a SQLite research store", parents=[ingest])
+    store.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    store.add_argument("--db", required=True, help="SQLite database path")
+    store.set_defaults(func=command_store)
+
+    query = subparsers.add_parser("query", help="Average a metric from a SQLite research store")
+    query.add_argument("--db", required=True, help="SQLite database path")
+    query.add_argument("--metric", default="persona_adherence", choices=METRIC_COLUMNS)
+    query.add_argument("--agent", help="Only this agent's responses")
+    query.add_argument("--session", help="Only this session's responses")
+    query.add_argument("--domain", help="Only responses mentioning this health domain")
+    query.add_argument("--days", type=float, help="Only responses from the last N days")
+    query.add_argument("--by", choices=sorted(GROUP_COLUMNS), help="Group results by agent, session, domain or day")
+    query.set_defaults(func=command_query)
+
+    archive = subparsers.add_parser("archive", help="Convert research files into chunk-compressed .rca archives", parents=[ingest])
+    archive.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    archive.add_argument("--codec", default="zlib", choices=sorted(CODECS))
+    archive.add_argument("--chunk-records", type=int, default=256, help="Records per compressed chunk")
+    archive.set_defaults(func=command_archive)
+
+    extract = subparsers.add_parser("extract", help="Convert an .rca archive back into a .json or .jsonl file")
+    extract.add_argument("archive", help="Archive to extract")
+    extract.add_argument("--output", required=True, help="Destination .json or .jsonl file")
+    extract.set_defaults(func=command_extract)
+
+    catalog = subparsers.add_parser("catalog", help="Add existing research files to the session catalog", parents=[ingest])
+    catalog.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    catalog.add_argument("--catalog", default="research_catalog.jsonl", help="Catalog file")
+    catalog.set_defaults(func=command_catalog)
+
+    sessions = subparsers.add_parser("sessions", help="Find sessions in the catalog")
+    sessions.add_argument("--catalog", default="research_catalog.jsonl", help="Catalog file")
+    sessions.add_argument("--agent", help="Sessions with responses from this agent")
+    sessions.add_argument("--domain", help="Sessions mentioning this health domain")
+    sessions.add_argument("--technique", help="Sessions using this persuasion technique")
+    sessions.add_argument("--corrected", metavar="AGENT", help="Sessions in which this agent made corrections")
+    sessions.add_argument("--since", help="Sessions with responses at or after this ISO timestamp")
+    sessions.add_argument("--until", help="Sessions with responses at or before this ISO timestamp")
+    sessions.add_argument("--min-turns", type=int, help="Sessions with at least this many turns")
+    sessions.set_defaults(func=command_sessions)
+
+    validate = subparsers.add_parser("validate", help="Check records against the agent response schema", parents=[ingest])
+    validate.add_argument("paths", nargs="*", default=["."], help="Research files or directories (default: .)")
+    validate.add_argument("--strict", action="store_true",
+                          help="Also require interaction_id and research_metadata, which live research records lack")
+    validate.set_defaults(func=command_validate)
+
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
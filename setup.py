@@ -28,6 +28,16 @@ def install_dependencies():
         print(f"❌ Failed to install dependencies: {e}")
         return False
 
+def install_optional_dependencies():
+    """Install optional dependencies; setup continues without them"""
+    print("\n📦 Installing optional dependencies...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy>=1.20"])
+        print("✅ NumPy installed: .metrics summaries use vectorized reductions")
+    except subprocess.CalledProcessError:
+        print("⚠️  NumPy not installed: .metrics summaries fall back to the array module")
+    return True
+
 def create_env_file():
     """Create .env file if it doesn't exist"""
     env_file = Path(".env")
@@ -101,6 +111,7 @@ def main():
     # Install dependencies
     if not install_dependencies():
         return False
+    install_optional_dependencies()
     
     # Create .env file
     if not create_env_file():
@@ -3,11 +3,14 @@ Structured Outputs System for Research and Data Analysis
 This module provides JSON schemas for agent responses to enable systematic analysis
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator
 from enum import Enum
 import json
 from datetime import datetime
 
+from utils.research_log import iter_research_log
+from utils.schema_validation import compile_validator
+
 class PersuasionTechnique(Enum):
     """Enumeration of persuasion techniques used by agents"""
     SOCIAL_PROOF = "social_proof"
@@ -134,6 +137,14 @@ AGENT_RESPONSE_SCHEMA = {
     ]
 }
 
+# Fields that records from utils.research.create_structured_response do not carry:
+# they have no per-interaction id and no research_metadata block
+RESEARCH_RECORD_OPTIONAL_FIELDS = ("interaction_id", "research_metadata")
+
+# Compiled once at import; each returns a list of violations, empty when valid
+validate_agent_response = compile_validator(AGENT_RESPONSE_SCHEMA)
+validate_research_record = compile_validator(AGENT_RESPONSE_SCHEMA, relax_required=RESEARCH_RECORD_OPTIONAL_FIELDS)
+
 def create_structured_response(
     agent_name: str,
     response_text: str,
@@ -460,67 +471,120 @@ def load_structured_responses(filename: str) -> List[Dict[str, Any]]:
     with open(filename, 'r') as f:
         return json.load(f)
 
-def analyze_responses_trends(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Analyze trends in structured responses"""
-    
-    if not responses:
-        return {}
-    
-    analysis = {
-        "total_responses": len(responses),
-        "agent_distribution": {},
-        "persuasion_techniques": {},
-        "health_domains": {},
-        "engagement_trends": {
-            "avg_response_length": 0,
-            "avg_emotional_intensity": 0,
-            "avg_interactivity": 0
-        },
-        "persona_adherence": {
-            "avg_score": 0,
-            "best_adhering_agent": "",
-            "emotional_expressions": {}
-        }
-    }
-    
-    # Agent distribution
-    for response in responses:
+def iter_structured_responses(filenames: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield structured responses from saved files, holding one file in memory at a time
+    
+    Accepts plain response lists (save_structured_responses),
+    research_data_<session>.json files (utils.research.save_research_data) and
+    research_data_<session>.jsonl logs, which are streamed line by line.
+    """
+    for filename in filenames:
+        if filename.endswith(".jsonl"):
+            yield from iter_research_log(filename)
+            continue
+        data = load_structured_responses(filename)
+        if isinstance(data, dict):
+            data = data.get("structured_responses", [])
+        for response in data:
+            yield response
+
+class TrendAggregator:
+    """Running counters behind analyze_responses_trends
+    
+    Responses are added one at a time (or from any iterator), so memory stays
+    constant per agent regardless of how many responses are summarized.
+    """
+    
+    def __init__(self):
+        self.total_responses = 0
+        self.agent_distribution = {}
+        self.persuasion_techniques = {}
+        self.health_domains = {}
+        self.total_length = 0
+        self.total_emotional = 0
+        self.total_interactive = 0
+        self.total_adherence = 0
+        self.agent_adherence = {}  # agent -> [score sum, response count]
+    
+    def add(self, response: Dict[str, Any]) -> None:
+        """Fold one structured response into the running counters"""
+        self.total_responses += 1
+        
         agent = response["agent_name"]
-        analysis["agent_distribution"][agent] = analysis["agent_distribution"].get(agent, 0) + 1
-    
-    # Persuasion techniques
-    for response in responses:
+        self.agent_distribution[agent] = self.agent_distribution.get(agent, 0) + 1
+        
         for technique in response["persuasion_techniques"]:
             tech_name = technique["technique"]
-            analysis["persuasion_techniques"][tech_name] = analysis["persuasion_techniques"].get(tech_name, 0) + 1
-    
-    # Health domains
-    for response in responses:
+            self.persuasion_techniques[tech_name] = self.persuasion_techniques.get(tech_name, 0) + 1
+        
         for domain in response["health_domains"]:
-            analysis["health_domains"][domain] = analysis["health_domains"].get(domain, 0) + 1
-    
-    # Engagement trends
-    total_length = sum(r["engagement_metrics"]["response_length"] for r in responses)
-    total_emotional = sum(r["engagement_metrics"]["emotional_intensity"] for r in responses)
-    total_interactive = sum(r["engagement_metrics"]["interactivity_level"] for r in responses)
-    
-    analysis["engagement_trends"]["avg_response_length"] = total_length / len(responses)
-    analysis["engagement_trends"]["avg_emotional_intensity"] = total_emotional / len(responses)
-    analysis["engagement_trends"]["avg_interactivity"] = total_interactive / len(responses)
-    
-    # Persona adherence
-    total_adherence = sum(r["persona_adherence"]["score"] for r in responses)
-    analysis["persona_adherence"]["avg_score"] = total_adherence / len(responses)
-    
-    # Best adhering agent
-    agent_adherence = {}
-    for response in responses:
-        agent = response["agent_name"]
-        if agent not in agent_adherence:
-            agent_adherence[agent] = []
-        agent_adherence[agent].append(response["persona_adherence"]["score"])
-    
-    best_agent = max(agent_adherence.keys(), key=lambda k: sum(agent_adherence[k]) / len(agent_adherence[k]))
-    analysis["persona_adherence"]["best_adhering_agent"] = best_agent
+            self.health_domains[domain] = self.health_domains.get(domain, 0) + 1
+        
+        engagement = response["engagement_metrics"]
+        self.total_length += engagement["response_length"]
+        self.total_emotional += engagement["emotional_intensity"]
+        self.total_interactive += engagement["interactivity_level"]
+        
+        score = response["persona_adherence"]["score"]
+        self.total_adherence += score
+        adherence = self.agent_adherence.setdefault(agent, [0, 0])
+        adherence[0] += score
+        adherence[1] += 1
+    
+    def update(self, responses: Iterable[Dict[str, Any]]) -> "TrendAggregator":
+        """Fold every response from an iterable (list, generator, file reader)"""
+        for response in responses:
+            self.add(response)
+        return self
+    
+    def merge(self, other: "TrendAggregator") -> "TrendAggregator":
+        """Combine counters from another aggregator, e.g. one built in a worker process"""
+        self.total_responses += other.total_responses
+        for target, source in (
+            (self.agent_distribution, other.agent_distribution),
+            (self.persuasion_techniques, other.persuasion_techniques),
+            (self.health_domains, other.health_domains)
+        ):
+            for key, count in source.items():
+                target[key] = target.get(key, 0) + count
+        self.total_length += other.total_length
+        self.total_emotional += other.total_emotional
+        self.total_interactive += other.total_interactive
+        self.total_adherence += other.total_adherence
+        for agent, (score_sum, count) in other.agent_adherence.items():
+            adherence = self.agent_adherence.setdefault(agent, [0, 0])
+            adherence[0] += score_sum
+            adherence[1] += count
+        return self
+    
+    def result(self) -> Dict[str, Any]:
+        """Return the same analysis dict as analyze_responses_trends"""
+        if not self.total_responses:
+            return {}
+        
+        total = self.total_responses
+        best_agent = max(self.agent_adherence.keys(), key=lambda k: self.agent_adherence[k][0] / self.agent_adherence[k][1])
+        
+        return {
+            "total_responses": total,
+            "agent_distribution": dict(self.agent_distribution),
+            "persuasion_techniques": dict(self.persuasion_techniques),
+            "health_domains": dict(self.health_domains),
+            "engagement_trends": {
+                "avg_response_length": self.total_length / total,
+                "avg_emotional_intensity": self.total_emotional / total,
+                "avg_interactivity": self.total_interactive / total
+            },
+            "persona_adherence": {
+                "avg_score": self.total_adherence / total,
+                "best_adhering_agent": best_agent,
+                "emotional_expressions": {}
+            }
+        }
+
+def analyze_responses_trends(responses: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze trends in structured responses
     
-    return analysis 
\ No newline at end of file
+    Accepts a list or any iterator (e.g. iter_structured_responses) and walks it once.
+    """
+    return TrendAggregator().update(responses).result()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test Agent Prompts
+Checks that the precompiled prompt blocks still render each agent's live state
+"""
+
+import sys
+import os
+import random
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents import MomoAgent, MilesAgent, LilaAgent
+
+OTHER_AGENTS_RESPONSES = [
+    {"name": "miles", "content": "I think beer is healthy because it has no added sugar. " * 4},
+    {"name": "lila", "content": "Miles, beer is high in carbohydrates and raises blood glucose."}
+]
+
+def test_prompt_reflects_current_state():
+    """Counters changed after the first prompt show up in the next one"""
+    print("🧪 TESTING PROMPT STATE SLOTS")
+    for agent in (MomoAgent(), MilesAgent(), LilaAgent()):
+        before = agent.get_context("Hi", [], [])
+        agent.conversation_count = 7
+        agent.inter_agent_interactions = 3
+        agent.user_advice_received = 2
+        after = agent.get_context("Hi", [], [])
+        
+        assert "Current conversation count: 0\n" in before
+        assert "Current conversation count: 7\n" in after
+        assert "Inter-agent interactions: 3\n" in after
+        assert "User advice received: 2\n" in after
+        assert "USER-AS-PERSUADER INSTRUCTION" in after
+    print("✅ Every prompt renders the agent's current counters")
+
+def test_inter_agent_block():
+    """Other agents' replies are listed, truncated to 100 characters, only in inter-agent rounds"""
+    print("\n🧪 TESTING INTER-AGENT PROMPT BLOCK")
+    for agent in (MomoAgent(), MilesAgent(), LilaAgent()):
+        random.seed(3)
+        user_round = agent.get_context("Hi", [], [])
+        random.seed(3)
+        inter_agent = agent.get_context("Hi", [], OTHER_AGENTS_RESPONSES)
+        
+        assert "OTHER AGENTS' RECENT RESPONSES" not in user_round
+        assert inter_agent.startswith(user_round)
+        assert f"- miles: {OTHER_AGENTS_RESPONSES[0]['content'][:100]}...\n" in inter_agent
+        assert "INTER-AGENT INSTRUCTION" in inter_agent
+    print("✅ Inter-agent rounds append the other agents' replies")
+
+def main():
+    """Run all tests"""
+    print("🤖 AGENT PROMPT TESTS")
+    print("=" * 60)
+    
+    tests = [
+        test_prompt_reflects_current_state,
+        test_inter_agent_block,
+    ]
+    
+    for test in tests:
+        test()
+    
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test Research Analysis
+Checks that research analysis gives the same results however and wherever it runs
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.research import (
+    StreamingResponseAnalyzer, analyze_response_text, analysis_cache, get_analysis_cache_stats, create_structured_response
+)
+from utils.analysis_worker import AnalysisWorker
+from utils.conversation import TurnContext, analyze_user_persuasion_opportunities, should_trigger_inter_agent_correction
+from persuasion_config import calculate_persuasion_score, calculate_persuasion_scores_batch
+from structured_outputs import TrendAggregator, analyze_responses_trends
+
+SAMPLE_RESPONSES = [
+    ("Momo", "I ate some cake yesterday and feel bad. Could you help me plan healthier snacks?"),
+    ("Miles", "I think beer is healthy because it has no added sugar. Should I drink it?"),
+    ("Lila", "Whole grains release sugar slowly, so walking after dinner and good sleep help too!"),
+]
+
+TEXT_FIELDS = ("persona_adherence", "persuasion_techniques", "health_domains",
+               "inter_agent_dynamics", "engagement_metrics")
+
+def test_streaming_analysis_matches_whole_text():
+    """Feeding a response in random chunks gives the same analysis as the whole text"""
+    print("🧪 TESTING STREAMED VS WHOLE-TEXT ANALYSIS")
+    rng = random.Random(7)
+    for agent_name, text in SAMPLE_RESPONSES:
+        analyzer = StreamingResponseAnalyzer(agent_name)
+        position = 0
+        while position < len(text):
+            step = rng.randint(1, 6)
+            analyzer.feed(text[position:position + step])
+            position += step
+        
+        streamed = analyzer.text_analysis({})
+        whole = analyze_response_text(agent_name, text)
+        for field in TEXT_FIELDS:
+            assert streamed[field] == whole[field], f"{agent_name}: {field} differs"
+    print("✅ Streamed analysis matches the whole-text analyzers")
+
+def test_analysis_worker_runs_jobs_in_order():
+    """Jobs run one at a time in submission order, drain() waits for them, and failures are counted"""
+    print("\n🧪 TESTING BACKGROUND ANALYSIS WORKER")
+    worker = AnalysisWorker(maxsize=2, name="test-analysis")
+    results = []
+    
+    def slow_append(value):
+        time.sleep(0.005)
+        results.append(value)
+    
+    for value in range(10):
+        worker.submit(slow_append, value)
+    worker.submit(lambda: 1 / 0)
+    worker.drain()
+    
+    assert results == list(range(10))
+    assert worker.jobs_completed == 10
+    assert worker.jobs_failed == 1
+    assert worker.pending() == 0
+    print("✅ Jobs ran in order and drain() waited for all of them")
+
+def test_analysis_cache_memoizes_by_content():
+    """Repeated texts are served from the cache as independent copies; other agents get their own entry"""
+    print("\n🧪 TESTING ANALYSIS CACHE")
+    analysis_cache.clear()
+    agent_name, text = SAMPLE_RESPONSES[0]
+    
+    first = analyze_response_text(agent_name, text)
+    first["health_domains"].append("mutated by the caller")
+    second = analyze_response_text(agent_name, text)
+    analyze_response_text("Lila", text)
+    
+    stats = get_analysis_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert "mutated by the caller" not in second["health_domains"]
+    print("✅ Cached results are reused and isolated from callers")
+
+def test_turn_context_matches_per_call_analysis():
+    """A turn's shared context finds the same opportunities and corrections as analyzing per call"""
+    print("\n🧪 TESTING PER-TURN CONTEXT")
+    messages = [
+        "I always prepare my lunch the night before, you should try it!",
+        "I had cake and soda at the party, walking helps though.",
+        "Keep going, you can do it! My weekly meal plan has fish twice.",
+        "Hello there",
+    ]
+    responses = [{"name": "miles", "content": "Cake sounds great!"}]
+    for message in messages:
+        context = TurnContext(message)
+        assert context.persuasion_opportunities == analyze_user_persuasion_opportunities(message)
+        assert context.has_opportunities() == any(context.persuasion_opportunities.values())
+        assert (should_trigger_inter_agent_correction(message, responses, context.user_lower)
+                == should_trigger_inter_agent_correction(message, responses))
+    print("✅ TurnContext gives the same results as the per-call analysis")
+
+def test_persuasion_scores_batch_matches_per_turn():
+    """Batch scoring, with a memo smaller than the distinct texts, equals scoring each turn on its own"""
+    print("\n🧪 TESTING PERSUASION SCORING")
+    texts = [
+        "You are my role model and a great teacher!",
+        "I'm so grateful and proud, you are consistent and dedicated.",
+        "Thanks, that was really helpful and valuable.",
+        "Hello!",
+    ]
+    rng = random.Random(5)
+    turns = [(rng.choice(texts), [rng.choice(texts) for _ in range(3)]) for _ in range(40)]
+    
+    result = calculate_persuasion_scores_batch(turns, memo_size=2)
+    assert result["total_turns"] == len(turns)
+    totals = dict.fromkeys(result["totals"], 0)
+    for (user_message, agent_responses), score in zip(turns, result["turn_scores"]):
+        assert score == calculate_persuasion_score(user_message, agent_responses)
+        for key, value in score.items():
+            totals[key] += value
+    assert result["totals"] == totals
+    
+    # One point per category keyword found in each text
+    assert calculate_persuasion_score(texts[0], [texts[1]]) == {
+        "self_image": 2, "belief_enhancement": 2, "social_value": 0, "positive_emotions": 2
+    }
+    print("✅ Batch and per-turn scores agree")
+
+def test_trend_aggregator_single_pass_and_merge():
+    """Trends from a generator, and from merged partial aggregators, equal those of the whole list"""
+    print("\n🧪 TESTING TREND AGGREGATOR")
+    responses = [
+        create_structured_response(agent_name, text, 0.5, {}, [])
+        for _ in range(4) for agent_name, text in SAMPLE_RESPONSES
+    ]
+    whole = analyze_responses_trends(responses)
+    
+    assert whole["total_responses"] == len(responses)
+    assert whole["agent_distribution"] == {"Momo": 4, "Miles": 4, "Lila": 4}
+    assert analyze_responses_trends(response for response in responses) == whole
+    
+    merged = TrendAggregator().update(responses[:5])
+    merged.merge(TrendAggregator().update(responses[5:]))
+    assert merged.result() == whole
+    assert analyze_responses_trends([]) == {}
+    print("✅ Streaming, merged and whole-list trends agree")
+
+def main():
+    """Run all tests"""
+    print("🤖 RESEARCH ANALYSIS TESTS")
+    print("=" * 60)
+    
+    tests = [
+        test_streaming_analysis_matches_whole_text,
+        test_analysis_worker_runs_jobs_in_order,
+        test_analysis_cache_memoizes_by_content,
+        test_turn_context_matches_per_call_analysis,
+        test_persuasion_scores_batch_matches_per_turn,
+        test_trend_aggregator_single_pass_and_merge,
+    ]
+    
+    for test in tests:
+        test()
+    
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test Conversation History
+Checks the history ring, its windowed views, background compaction and per-agent filtering
+"""
+
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.history import HistoryRing, estimate_tokens, filter_history_for_agent
+from utils.conversation import ConversationManager
+from utils.analysis_worker import AnalysisWorker
+
+def message(i, role="user", **fields):
+    return {"role": role, "content": f"message {i}", **fields}
+
+def test_history_ring_keeps_last_capacity_messages():
+    """The ring keeps the newest capacity messages, oldest first, and views track it without copying"""
+    print("🧪 TESTING HISTORY RING")
+    ring = HistoryRing(5)
+    for i in range(3):
+        ring.append(message(i))
+    assert list(ring) == [message(0), message(1), message(2)]
+    view = ring.window(2)
+    assert list(view) == [message(1), message(2)] and view[-1] == message(2)
+
+    for i in range(3, 8):
+        ring.append(message(i))
+    assert len(ring) == 5 and ring.start == 3
+    assert list(ring) == [message(i) for i in range(3, 8)]
+    assert list(ring.window(10)) == list(ring) and not ring.window(0)
+    assert list(ring.window(3)[1:]) == [message(6), message(7)]
+    try:
+        list(view)
+        assert False, "a view over overwritten messages must not return other messages"
+    except RuntimeError:
+        pass
+
+    recent = ring.window(2)
+    assert ring.holds(3, 2, ring._generation)
+    ring.drop_oldest(3)
+    assert list(ring) == [message(6), message(7)]
+    assert not ring.holds(3, 2, ring._generation - 1)
+    try:
+        list(recent)
+        assert False, "views are invalidated by compaction"
+    except RuntimeError:
+        pass
+    note = message("summary", role="system")
+    noted = ring.window(1, note=note)
+    assert list(noted) == [note, message(7)] and len(noted) == 2 and noted[0] == note
+
+    ring.clear()
+    assert len(ring) == 0 and list(ring) == []
+
+    manager = ConversationManager(history_limit=4)
+    for i in range(6):
+        manager.add_to_history(message(i))
+    assert list(manager.get_recent_history(None)) == [message(i) for i in range(2, 6)]
+    assert list(manager.get_recent_history(2)) == [message(4), message(5)]
+    print("✅ Ring appends are O(1) and stale views fail loudly")
+
+def test_compaction_summarizes_before_the_ring_overwrites():
+    """Short messages are summarized before they fall out of the ring, and the note always leads the window"""
+    print("🧪 TESTING HISTORY COMPACTION")
+    summarized = []
+
+    def summarize(messages):
+        summarized.append(messages)
+        return f"{len(messages)} messages"
+
+    worker = AnalysisWorker(maxsize=1, name="test-compaction")
+    manager = ConversationManager(history_limit=12)
+    manager.enable_compaction(summarize, token_threshold=10000, keep_recent=4, worker=worker)
+    for i in range(40):
+        manager.add_to_history(message(i))
+        worker.drain()  # Let each background summary finish, as a slow conversation would
+
+    window = manager.get_recent_history(3)  # Swaps in the last finished summary
+    covered = [m for span in summarized for m in span if m["role"] == "user"]
+    retained = list(manager.conversation_history)
+    assert covered + retained == [message(i) for i in range(40)], "no message is lost to the ring"
+    assert all(span[0] == {"role": "system", "content": f"Summary of the earlier conversation: {len(previous)} messages"}
+               for previous, span in zip(summarized, summarized[1:])), "each summary folds in the previous one"
+
+    assert len(window) == 4 and window[0] is manager.history_summary
+    assert list(window)[1:] == retained[-3:]
+    assert list(manager.get_recent_history(None))[1:] == retained
+
+    long_manager = ConversationManager(history_limit=50)
+    long_manager.enable_compaction(summarize, token_threshold=100, keep_recent=2, worker=worker)
+    for i in range(3):
+        long_manager.add_to_history({"role": "user", "content": "x" * 400})
+    worker.drain()
+    assert len(long_manager.get_recent_history(10)) == 1 + 2, "token threshold compacts long messages early"
+
+    manager.reset_conversation()
+    assert manager.history_summary is None and list(manager.get_recent_history(10)) == []
+    print("✅ Compaction keeps long-term context within a bounded window")
+
+def test_agent_history_filter_and_token_estimate():
+    """Agents see user messages, notes, their own replies and replies aimed at them"""
+    print("🧪 TESTING AGENT HISTORY FILTER")
+    history = [
+        message(0),
+        message(1, role="assistant", name="momo"),
+        message(2, role="assistant", name="miles", target_agent="momo"),
+        message(3, role="assistant", name="lila"),
+        message(4, role="system"),
+    ]
+    assert filter_history_for_agent(history, "Momo") == [history[0], history[1], history[2], history[4]]
+    assert filter_history_for_agent(history, "Lila") == [history[0], history[3], history[4]]
+    assert estimate_tokens([{"role": "user", "content": "x" * 40}, {"role": "user", "content": None}]) == 10 + 4 + 4
+    print("✅ Each agent gets only the history it needs")
+
+def main():
+    """Run all tests"""
+    print("🤖 CONVERSATION HISTORY TESTS")
+    print("=" * 60)
+
+    tests = [
+        test_history_ring_keeps_last_capacity_messages,
+        test_compaction_summarizes_before_the_ring_overwrites,
+        test_agent_history_filter_and_token_estimate,
+    ]
+
+    for test in tests:
+        test()
+
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test Persistence
+Checks how agent states and sessions are saved in the background and restored
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils.background_writer as background_writer
+from utils.background_writer import BackgroundWriter, write_file_atomic
+from utils.autosave import Autosaver
+from utils.conversation import ConversationManager, TurnContext
+from utils.sessions import Session, SessionRegistry
+from utils.sampling import create_sampler
+from utils.research import create_structured_response
+from utils.research_buffer import SpillingBuffer, LogBackedBuffer
+from utils.research_columns import MetricColumns
+from utils.research_log import ResearchLogWriter
+from agents import MomoAgent, MilesAgent, LilaAgent
+
+def test_background_writer_coalesces_saves():
+    """Saves queued behind a running one collapse to the latest, and flush waits for them"""
+    print("🧪 TESTING BACKGROUND WRITER")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.json")
+        started = threading.Event()
+        release = threading.Event()
+        saved = []
+
+        def blocking_save():
+            started.set()
+            release.wait()
+            return ()
+
+        def save(turn):
+            saved.append(turn)
+            with open(path, "w") as f:
+                json.dump({"turn": turn}, f)
+            return [path]
+
+        writer = BackgroundWriter("interval", fsync_interval=60)
+        writer.submit("blocker", blocking_save)
+        assert started.wait(5)
+        for turn in range(1, 4):
+            writer.submit("state", save, turn)
+        assert writer.pending() == 1 and writer.saves_coalesced == 2
+        release.set()
+        writer.flush()
+        assert saved == [3], "only the latest queued save runs"
+        assert writer._unsynced == set(), "flush fsyncs what the interval policy deferred"
+
+        writer.submit("broken", lambda: 1 / 0)
+        writer.flush()
+        assert writer.saves_failed == 1 and writer.saves_completed == 2
+        writer.close()
+        with open(path) as f:
+            assert json.load(f) == {"turn": 3}
+
+    try:
+        BackgroundWriter("sometimes")
+        assert False, "unknown fsync policies are rejected"
+    except ValueError:
+        pass
+    print("✅ Bursts of saves write the latest data once")
+
+def count_fsyncs(run):
+    """Number of os.fsync calls made while run() executes"""
+    calls = []
+    original = background_writer.os.fsync
+    background_writer.os.fsync = lambda fd: calls.append(fd) or original(fd)
+    try:
+        run()
+    finally:
+        background_writer.os.fsync = original
+    return len(calls)
+
+def test_state_saves_follow_fsync_policy():
+    """Saves that defer their fsync are fsynced (file and directory) only as the policy says"""
+    print("🧪 TESTING FSYNC POLICY")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "agent_states.json")
+
+        def save():
+            write_file_atomic(path, lambda f: json.dump({"turn": 1}, f), fsync=False)
+            return [path]
+
+        def run_with(policy):
+            writer = BackgroundWriter(policy, fsync_interval=60)
+            writer.submit("agent_states", save)
+            writer.close()
+            return writer
+
+        assert count_fsyncs(lambda: run_with("none")) == 0
+        assert count_fsyncs(lambda: run_with("always")) == 2
+        # The interval policy defers to the next interval or flush; close() flushes
+        assert count_fsyncs(lambda: run_with("interval")) == 2
+        assert count_fsyncs(lambda: write_file_atomic(path, lambda f: f.write("{}"))) == 2
+    print("✅ Agent state durability is the writer's fsync policy")
+
+def test_autosave_saves_only_dirty_state():
+    """The autosaver saves on its interaction interval, and only when the persuasion state or agents changed"""
+    print("🧪 TESTING AUTOSAVE DIRTY TRACKING")
+    manager = ConversationManager()
+    saves = []
+
+    def save():
+        saves.append(manager.get_persuasion_metrics())
+        manager.persuasion_state_dirty = False
+
+    autosaver = Autosaver(lambda: manager.persuasion_state_dirty, save, every_interactions=2, every_seconds=None)
+    for message in ("Hello there!", "Nice weather", "You should try to sleep more", "Thanks"):
+        manager.update_persuasion_state(TurnContext(message).persuasion_opportunities)
+        autosaver.record_interaction()
+    assert autosaver.skipped == 1 and autosaver.saves == 1
+    assert saves == [manager.get_persuasion_metrics()] and saves[0]["advice_given"] == 1
+
+    manager.reset_conversation()
+    assert manager.persuasion_state_dirty and manager.get_persuasion_metrics()["advice_given"] == 0
+    print("✅ Unchanged state is not rewritten")
+
+def make_session_factory(storage_dir):
+    """create_session for a SessionRegistry, built like agent.create_session with small buffers"""
+    def create_session(session_id):
+        registry_path = lambda suffix: os.path.join(storage_dir, f"{session_id}_{suffix}")
+        research_log = ResearchLogWriter(registry_path("research_data.jsonl"))
+        return Session(
+            session_id, {"Momo": MomoAgent(), "Miles": MilesAgent(), "Lila": LilaAgent()},
+            ConversationManager(50), create_sampler("all"),
+            LogBackedBuffer(research_log, 4), SpillingBuffer(registry_path("research_times.jsonl"), 4),
+            research_log=research_log, metric_columns=MetricColumns()
+        )
+    return create_session
+
+def play_turns(session, turns):
+    for turn in range(turns):
+        session.conversation_turn += 1
+        session.conversation_manager.add_to_history({"role": "user", "content": f"turn {turn}"})
+        record = create_structured_response("Momo", f"Thanks for the advice on turn {turn}!", 0.5 + turn, {}, [])
+        session.research_sampler.add("Momo", lambda: record, session.structured_responses)
+        session.response_times.append(record["response_time"])
+        session.research_aggregates.add_record(record)
+        session.metric_columns.add(record)
+        session.agents["Momo"].conversation_count += 1
+
+def test_registry_evicts_and_rehydrates_sessions():
+    """Least recently used sessions go to disk and come back with their history, counters and research data"""
+    print("🧪 TESTING SESSION REGISTRY")
+    with tempfile.TemporaryDirectory() as directory:
+        registry = SessionRegistry(make_session_factory(directory), storage_dir=directory, max_sessions=2)
+        first = registry.get("alice")
+        play_turns(first, 7)
+        first.conversation_manager.history_summary = {"role": "system", "content": "Summary of the earlier conversation: hi"}
+        history = list(first.conversation_manager.get_recent_history(None))
+        records = list(first.structured_responses)
+        summary = first.research_aggregates.result(7)
+
+        registry.get("bob")
+        registry.get("carol")
+        assert "alice" not in registry and registry.evictions == 1 and len(registry) == 2
+        assert os.path.exists(registry.path_for("alice"))
+
+        alice = registry.get("alice")
+        assert alice is not first and registry.rehydrations == 1
+        assert "bob" not in registry, "bob is now the least recently used"
+        assert alice.conversation_turn == 7 and alice.agents["Momo"].conversation_count == 7
+        assert list(alice.conversation_manager.get_recent_history(None)) == history
+        assert list(alice.structured_responses) == records and len(alice.response_times) == 7
+        assert alice.research_aggregates.result(7) == summary
+        assert not alice.is_dirty()
+
+        play_turns(alice, 2)
+        assert len(list(alice.structured_responses)) == 9, "a resumed session keeps appending to its log"
+        assert alice.research_sampler.seen_per_agent == {"Momo": 9}
+
+        tight = SessionRegistry(make_session_factory(directory), storage_dir=directory, memory_ceiling_bytes=1)
+        tight.get("dave")
+        tight.get("erin")
+        assert len(tight) == 1 and "erin" in tight, "the session in use is never evicted"
+        assert registry.path_for("user/../x").startswith(os.path.join(directory, ""))
+        assert "/" not in os.path.basename(registry.path_for("user/../x"))
+    print("✅ Sessions survive eviction intact")
+
+def main():
+    """Run all tests"""
+    print("🤖 PERSISTENCE TESTS")
+    print("=" * 60)
+
+    tests = [
+        test_background_writer_coalesces_saves,
+        test_state_saves_follow_fsync_policy,
+        test_autosave_saves_only_dirty_state,
+        test_registry_evicts_and_rehydrates_sessions,
+    ]
+
+    for test in tests:
+        test()
+
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
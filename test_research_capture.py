@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test Research Capture
+Checks how structured responses are sampled, logged and kept during a session
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.research import create_structured_response, save_research_data, analyze_research_data
+from utils.research_columns import MetricColumns
+from utils.research_buffer import SpillingBuffer, LogBackedBuffer
+from utils.research_aggregates import ResearchAggregates
+from utils.research_log import ResearchLogWriter, iter_research_log, read_research_log_summary, load_research_file
+from utils.sampling import ResearchSampler, FixedRateSampler, SessionSampler, ReservoirSampler, create_sampler
+
+AGENTS = ("Momo", "Miles", "Lila")
+
+def make_record(agent_name, index):
+    return create_structured_response(agent_name, f"Response {index} about sleep and walking.", 1.0, {}, [])
+
+def offer(sampler, count, records):
+    """Offer count responses round-robin across AGENTS; returns how many records were built"""
+    built = []
+    for i in range(count):
+        agent_name = AGENTS[i % len(AGENTS)]
+        sampler.add(agent_name, lambda: built.append(i) or make_record(agent_name, i), records)
+    return len(built)
+
+def test_sampling_policies_keep_exact_counts():
+    """Every policy counts each response as seen, and only builds the records it keeps"""
+    print("🧪 TESTING SAMPLING POLICIES")
+    records = []
+    assert offer(ResearchSampler(), 30, records) == 30 and len(records) == 30
+
+    records = []
+    sampler = FixedRateSampler(0.3, random.Random(5))
+    built = offer(sampler, 300, records)
+    assert built == len(records) == sum(sampler.kept_per_agent.values())
+    assert 60 < len(records) < 120
+    assert sampler.seen_per_agent == {agent: 100 for agent in AGENTS}
+
+    kept = [SessionSampler(0.5, f"session-{i}").session_selected for i in range(200)]
+    assert 70 < sum(kept) < 130
+    assert SessionSampler(0.5, "session-7").session_selected == kept[7]
+    records = []
+    sampler = SessionSampler(0.5, "session-7")
+    assert offer(sampler, 9, records) == (9 if kept[7] else 0)
+
+    try:
+        create_sampler("sometimes")
+        assert False, "unknown policies are rejected"
+    except ValueError:
+        pass
+    print("✅ Counts are exact and unkept records are never built")
+
+def test_reservoir_keeps_uniform_sample_per_agent():
+    """The reservoir keeps at most reservoir_size records per agent and survives a round trip"""
+    print("🧪 TESTING RESERVOIR SAMPLING")
+    records = []
+    sampler = ReservoirSampler(4, random.Random(11))
+    offer(sampler, 300, records)
+    assert len(records) == 12
+    assert sampler.kept_per_agent == {agent: 4 for agent in AGENTS}
+    assert sampler.nominal_rate() == 12 / 300
+    for agent in AGENTS:
+        assert sum(1 for record in records if record["agent_name"] == agent) == 4
+
+    resumed = ReservoirSampler(4, random.Random(11))
+    resumed.from_dict(json.loads(json.dumps(sampler.to_dict())))
+    assert resumed.metadata() == sampler.metadata()
+    offer(resumed, 30, records)
+    assert len(records) == 12  # Replacements overwrite slots in place
+    print("✅ Reservoir stays bounded per agent and resumes from its counters")
+
+def test_saved_research_data_records_sampling():
+    """save_research_data stores the sampling description next to the responses"""
+    print("🧪 TESTING SAVED SAMPLING METADATA")
+    with tempfile.TemporaryDirectory() as directory:
+        records = []
+        sampler = FixedRateSampler(0.5, random.Random(3))
+        offer(sampler, 20, records)
+        log = ResearchLogWriter(os.path.join(directory, "research_data_s1.jsonl"))
+        for record in records:
+            log.append(record)
+        save_research_data(records, "s1", 20, [1.0] * 20, sampler.metadata(), research_log=log)
+        log.close()
+
+        data = load_research_file(log.path)
+        assert data["sampling"]["policy"] == "fixed_rate" and data["sampling"]["rate"] == 0.5
+        assert sum(data["sampling"]["seen_per_agent"].values()) == 20
+        assert len(data["structured_responses"]) == len(records)
+    print("✅ The sampling rate is saved for reweighting")
+
+def test_research_log_appends_and_survives_torn_lines():
+    """Each response is one appended line; a torn last line is skipped and the last summary wins"""
+    print("🧪 TESTING JSONL RESEARCH LOG")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s1.jsonl")
+        log = ResearchLogWriter(path)
+        assert not os.path.exists(path), "sessions without research data leave no file"
+        records = [make_record(AGENTS[i % 3], i) for i in range(5)]
+        for record in records[:3]:
+            log.append(record)
+        log.write_summary({"conversation_turn": 3})
+        for record in records[3:]:
+            log.append(record)
+        log.write_summary({"conversation_turn": 5})
+        log.close()
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 7 and all("\n" not in line for line in lines)
+
+        with open(path, "a") as f:
+            f.write('{"agent_name": "Momo", "respon')  # Crash mid-write
+        assert list(iter_research_log(path)) == records
+        assert read_research_log_summary(path)["conversation_turn"] == 5
+        data = load_research_file(path)
+        assert data["structured_responses"] == records and data["conversation_turn"] == 5
+        assert data["response_times"] == [1.0] * 5
+
+        log = ResearchLogWriter(path)
+        log.rewrite(records[:2], {"conversation_turn": 2})
+        log.append(records[4])
+        log.close()
+        assert list(iter_research_log(path)) == records[:2] + [records[4]]
+        assert log.records_written == 3
+    print("✅ Appends are line by line and readers stream past torn lines")
+
+def test_metric_columns_flush_segments_to_sidecar():
+    """Written segments leave memory, and the loaded sidecar summarizes like analyze_research_data"""
+    print("🧪 TESTING METRIC COLUMNS")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s1.metrics")
+        records = [make_record(AGENTS[i % 3], i) for i in range(7)]
+        columns = MetricColumns()
+        for record in records[:4]:
+            columns.add(record)
+        assert columns.append_segment(path) == 4
+        assert len(columns) == 0 and not columns.columns["domain_codes"], "written rows are dropped"
+        assert columns.append_segment(path) == 0
+
+        for record in records[4:]:
+            columns.add(record)
+        assert columns.append_segment(path) == 3
+        loaded = MetricColumns.load(path)
+        assert len(loaded) == 7
+        response_times = [record["response_time"] for record in records]
+        expected = analyze_research_data(records, response_times, 7)
+        assert loaded.summarize(response_times, 7) == expected
+    print("✅ Segments are flushed from memory and reload whole")
+
+def test_spilling_buffer_bounds_memory_and_resumes():
+    """Older items spill to disk, iteration still covers everything, and a spilled buffer resumes"""
+    print("🧪 TESTING SPILLING BUFFER")
+    with tempfile.TemporaryDirectory() as directory:
+        buffer = SpillingBuffer(os.path.join(directory, "times.jsonl"), capacity=4)
+        for i in range(10):
+            buffer.append(float(i))
+            assert buffer.in_memory() <= 4
+        snapshot = buffer.snapshot()
+        buffer.append(10.0)
+        assert list(snapshot) == [float(i) for i in range(10)], "snapshots ignore later appends"
+        assert len(buffer) == 11 and list(buffer) == [float(i) for i in range(11)]
+
+        buffer.spill_all()
+        buffer.close()
+        resumed = SpillingBuffer(buffer.path, capacity=4)
+        resumed.resume(len(buffer))
+        for i in range(11, 16):
+            resumed.append(float(i))
+        assert list(resumed) == [float(i) for i in range(16)]
+        resumed.close(remove=True)
+        assert not os.path.exists(buffer.path)
+
+        log = ResearchLogWriter(os.path.join(directory, "research_data_s1.jsonl"))
+        records = LogBackedBuffer(log, capacity=4)
+        expected = [make_record(AGENTS[i % 3], i) for i in range(9)]
+        for record in expected:
+            records.append(record)
+        assert records.in_memory() <= 4 and list(records) == expected
+        assert sorted(os.listdir(directory)) == ["research_data_s1.jsonl"], "the log doubles as the spill file"
+        log.close()
+    print("✅ Buffers stay bounded and read spilled items back in order")
+
+def test_aggregates_match_full_analysis():
+    """Running totals give analyze_research_data's result without keeping the records"""
+    print("🧪 TESTING RUNNING AGGREGATES")
+    records = [make_record(AGENTS[i % 3], i) for i in range(12)]
+    for i, record in enumerate(records):
+        record["response_time"] = 0.5 * i
+    aggregates = ResearchAggregates()
+    assert aggregates.result(0) == {"error": "No research data available"}
+    for record in records[:7]:
+        aggregates.add_record(record)
+
+    resumed = ResearchAggregates()
+    resumed.from_dict(json.loads(json.dumps(aggregates.to_dict())))
+    for record in records[7:]:
+        resumed.add(record["agent_name"], record, record["response_time"])
+    expected = analyze_research_data(records, [record["response_time"] for record in records], 12)
+    assert resumed.result(12) == expected
+    assert resumed.agent_means() == expected["persona_adherence_scores"]
+    print("✅ Totals survive a round trip and match a full rescan")
+
+def main():
+    """Run all tests"""
+    print("🤖 RESEARCH CAPTURE TESTS")
+    print("=" * 60)
+
+    tests = [
+        test_sampling_policies_keep_exact_counts,
+        test_reservoir_keeps_uniform_sample_per_agent,
+        test_saved_research_data_records_sampling,
+        test_research_log_appends_and_survives_torn_lines,
+        test_metric_columns_flush_segments_to_sidecar,
+        test_spilling_buffer_bounds_memory_and_resumes,
+        test_aggregates_match_full_analysis,
+    ]
+
+    for test in tests:
+        test()
+
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
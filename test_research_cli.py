@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Test Research CLI
+Checks the offline research_cli commands against small research files
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.schema_validation import compile_validator, RecordQuarantine
+from research_cli import reprocess_file, shard_files, analyze_shard, stream_valid_research_file, main as cli_main
+from structured_outputs import TrendAggregator
+from utils.background_writer import write_file_atomic
+from utils.research import create_structured_response, analyze_research_data
+from utils.research_store import ResearchStore
+from utils.research_archive import ResearchArchive, CODECS
+from utils.research_catalog import ResearchCatalog
+from utils.research_log import ResearchLogWriter, iter_research_log, read_research_log_summary, load_research_file
+
+SAMPLE_RESPONSES = [
+    ("Momo", "I ate some cake yesterday and feel bad. Could you help me plan healthier snacks?"),
+    ("Miles", "I think beer is healthy because it has no added sugar. Should I drink it?"),
+    ("Lila", "Whole grains release sugar slowly, so walking after dinner and good sleep help too!"),
+]
+
+def make_records(count):
+    """count structured responses cycling through SAMPLE_RESPONSES"""
+    records = []
+    for i in range(count):
+        agent_name, text = SAMPLE_RESPONSES[i % len(SAMPLE_RESPONSES)]
+        records.append(create_structured_response(agent_name, text, 1.0 + i, {}, []))
+    return records
+
+def make_record_for(agent_name):
+    text = dict(SAMPLE_RESPONSES)[agent_name]
+    return create_structured_response(agent_name, text, 1.0, {}, [])
+
+def make_stale(record):
+    """Turn a record into one saved before analyzer versioning, with a wrong field"""
+    record.pop("analyzer_versions")
+    record["health_domains"] = []
+    return record
+
+def rounded(value):
+    """value with floats rounded, so sums taken in a different order compare equal"""
+    if isinstance(value, float):
+        return round(value, 9)
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rounded(item) for item in value]
+    return value
+
+def write_log(path, records, summary=None):
+    writer = ResearchLogWriter(path)
+    for record in records:
+        writer.append(record)
+    if summary is not None:
+        writer.write_summary(summary)
+    writer.close()
+
+def test_write_file_atomic():
+    """write_file_atomic replaces the file whole, or leaves it alone when the writer declines"""
+    print("🧪 TESTING ATOMIC WRITES")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.json")
+        assert write_file_atomic(path, lambda f: json.dump({"turn": 1}, f))
+        assert write_file_atomic(path, lambda f: f.write("partial") and False) is False
+        with open(path) as f:
+            assert json.load(f) == {"turn": 1}
+        assert os.listdir(directory) == ["state.json"]  # No temp file left behind
+    print("✅ Declined writes keep the old file and leave no temp file")
+
+def test_reprocess_streams_stale_records():
+    """reprocess rewrites only stale fields, keeps invalid records and summaries, and skips clean files"""
+    print("🧪 TESTING STREAMING REPROCESS")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s1.jsonl")
+        records = make_records(4)
+        expected_domains = records[1]["health_domains"]
+        make_stale(records[1])
+        invalid = {"agent_name": "Momo"}
+        write_log(path, records[:2] + [invalid] + records[2:], {"session_id": "s1", "conversation_turn": 4})
+        with open(path) as f:
+            original = f.read()
+
+        result = reprocess_file(path, dry_run=True)
+        assert (result["records"], result["records_changed"]) == (5, 1)
+        assert result["fields_recomputed"]["health_domains"] == 1
+        assert [record for record, errors in result["rejects"]] == [invalid]
+        with open(path) as f:
+            assert f.read() == original, "dry run must not write"
+
+        result = reprocess_file(path)
+        assert result["records_changed"] == 1
+        rewritten = list(iter_research_log(path))
+        assert len(rewritten) == 5 and rewritten[2] == invalid
+        assert rewritten[1]["health_domains"] == expected_domains
+        assert rewritten[0] == records[0] and rewritten[3:] == records[2:]
+        assert read_research_log_summary(path)["conversation_turn"] == 4
+
+        modified = os.stat(path).st_mtime_ns
+        assert reprocess_file(path)["records_changed"] == 0
+        assert os.stat(path).st_mtime_ns == modified, "a clean file is not rewritten"
+        assert sorted(os.listdir(directory)) == ["research_data_s1.jsonl"]
+    print("✅ JSONL logs are reprocessed in one streaming pass")
+
+def test_reprocess_legacy_json():
+    """Legacy research_data .json files keep their session fields when reprocessed"""
+    print("🧪 TESTING LEGACY JSON REPROCESS")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s2.json")
+        records = make_records(3)
+        expected = [dict(record) for record in records]
+        make_stale(records[0])
+        with open(path, "w") as f:
+            json.dump({"session_id": "s2", "conversation_turn": 3, "response_times": [1, 2, 3],
+                       "structured_responses": records}, f, indent=2)
+
+        assert reprocess_file(path, dry_run=True)["records_changed"] == 1
+        result = reprocess_file(path)
+        assert (result["records"], result["records_changed"]) == (3, 1)
+        with open(path) as f:
+            data = json.load(f)
+        assert data["structured_responses"] == expected
+        assert data["session_id"] == "s2" and data["response_times"] == [1, 2, 3]
+    print("✅ Legacy files are rewritten with their session fields intact")
+
+def test_analyze_shards_merge_to_one_pass():
+    """Sharded analysis merged in the parent matches one pass over every file"""
+    print("🧪 TESTING SHARDED ANALYZE")
+    assert shard_files(list("abcdefg"), 3) == [["a", "b", "c"], ["d", "e", "f"], ["g"]]
+    assert shard_files(list("ab"), 8) == [["a"], ["b"]]
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for session in range(5):
+            path = os.path.join(directory, f"research_data_s{session}.jsonl")
+            write_log(path, make_records(session + 2), {"session_id": f"s{session}", "conversation_turn": session + 2})
+            files.append(path)
+
+        whole = analyze_shard(files)
+        assert whole["records"] == 2 + 3 + 4 + 5 + 6
+        assert sorted(whole["sessions"]) == [f"s{session}" for session in range(5)]
+
+        merged = TrendAggregator()
+        for shard in shard_files(files, 3):
+            merged.merge(analyze_shard(shard)["aggregator"])
+        assert rounded(merged.result()) == rounded(whole["aggregator"].result())
+
+        output = os.path.join(directory, "analysis.json")
+        assert cli_main(["analyze", directory, "--workers", "2", "--output", output]) == 0
+        with open(output) as f:
+            analysis = json.load(f)
+        assert rounded(analysis["trends"]) == rounded(json.loads(json.dumps(whole["aggregator"].result())))
+        assert analysis["performance"]["records"] == whole["records"]
+        assert len(analysis["sessions"]) == 5
+    print("✅ Merged shard aggregates match a single pass")
+
+def test_analyze_streams_records_lazily():
+    """Streamed JSONL and whole legacy files give the same session analysis as a full load"""
+    print("🧪 TESTING LAZY ANALYZE INPUT")
+    with tempfile.TemporaryDirectory() as directory:
+        records = make_records(5)
+        invalid = {"agent_name": "Lila", "response_time": 9.0}
+        log_path = os.path.join(directory, "research_data_s1.jsonl")
+        write_log(log_path, records[:2] + [invalid] + records[2:], {"session_id": "s1", "conversation_turn": 5})
+        json_path = os.path.join(directory, "research_data_s2.json")
+        with open(json_path, "w") as f:
+            json.dump({"session_id": "s2", "conversation_turn": 5, "structured_responses": records + [invalid],
+                       "response_times": [1, 2, 3, 4, 5, 9]}, f, indent=2)
+
+        rejects = []
+        data, stream = stream_valid_research_file(log_path, rejects)
+        assert data["response_times"] == [] and not rejects, "nothing is decoded before the stream is read"
+        assert list(stream) == records
+        assert [record for record, errors in rejects] == [invalid]
+        assert data["response_times"] == [1.0, 2.0, 9.0, 3.0, 4.0, 5.0]
+
+        result = analyze_shard([log_path, json_path])
+        assert result["records"] == 10
+        assert [len(result["rejects"][path]) for path in (log_path, json_path)] == [1, 1]
+        for session_id, path in (("s1", log_path), ("s2", json_path)):
+            loaded = load_research_file(path)
+            valid = [record for record in loaded["structured_responses"] if record != invalid]
+            assert result["sessions"][session_id] == analyze_research_data(valid, loaded["response_times"], 5)
+    print("✅ Records are decoded one at a time and rejects still reported")
+
+def test_store_keys_responses_by_content():
+    """Re-imports add nothing, while distinct responses sharing a timestamp are all kept"""
+    print("🧪 TESTING SQLITE RESEARCH STORE")
+    with tempfile.TemporaryDirectory() as directory:
+        db = os.path.join(directory, "research.db")
+        records = make_records(6)
+        twins = make_records(2)
+        twins[1]["agent_name"] = twins[0]["agent_name"]
+        twins[1]["timestamp"] = twins[0]["timestamp"]
+        store = ResearchStore(db, batch_size=4)
+        for record in records + twins:
+            store.add("s1", record)
+        assert store.add_many("s1", records) == 6
+        assert store.duplicates_skipped == 6
+        assert len(list(store.iter_responses(session_id="s1"))) == 8
+        assert list(store.iter_responses(session_id="s1"))[:6] == records
+
+        by_agent = store.average_metric("response_time", session_id="s1", group_by="agent")
+        assert by_agent["Miles"] == {"avg": (2.0 + 5.0) / 2, "count": 2}
+        store.close()
+
+        path = os.path.join(directory, "research_data_s2.jsonl")
+        write_log(path, records, {"session_id": "s2", "conversation_turn": 6})
+        assert cli_main(["store", path, "--db", db]) == 0
+        assert cli_main(["store", path, "--db", db]) == 0
+        store = ResearchStore(db)
+        assert len(list(store.iter_responses(session_id="s2"))) == 6
+        assert [session["session_id"] for session in store.sessions()] == ["s2"]
+        store.close()
+    print("✅ Duplicates are recognised by content and reported")
+
+def test_archive_round_trip_and_chunk_skipping():
+    """Archives extract back to the same records and queries decompress only matching chunks"""
+    print("🧪 TESTING RESEARCH ARCHIVES")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s1.jsonl")
+        records = make_records(4) + [make_record_for("Lila") for _ in range(6)]
+        for second, record in enumerate(records):
+            record["timestamp"] = f"2026-01-01T12:00:{second:02d}"
+        write_log(path, records, {"session_id": "s1", "conversation_turn": 10})
+        archive_path = os.path.join(directory, "research_data_s1.rca")
+
+        for codec in sorted(CODECS):
+            assert cli_main(["archive", path, "--codec", codec, "--chunk-records", "4"]) == 0
+            with ResearchArchive(archive_path) as archive:
+                assert archive.codec == codec and len(archive) == 10 and len(archive.chunks) == 3
+                assert archive.agents() == {"Momo": 2, "Miles": 1, "Lila": 7}
+                assert list(archive) == records
+                archive.chunks_read = 0
+                assert list(archive.query(agent_name="Miles")) == [records[1]]
+                assert archive.chunks_read == 1, "chunks without Miles are skipped"
+                assert list(archive.query(since=records[8]["timestamp"])) == records[8:]
+
+        for extension in ("jsonl", "json"):
+            output = os.path.join(directory, f"extracted.{extension}")
+            assert cli_main(["extract", archive_path, "--output", output]) == 0
+            data = load_research_file(output)
+            assert data["structured_responses"] == records and data["conversation_turn"] == 10
+    print("✅ Archives round-trip and queries skip unrelated chunks")
+
+def test_catalog_finds_sessions_without_opening_files():
+    """The catalog filters sessions from its entries and only reads matching data files"""
+    print("🧪 TESTING SESSION CATALOG")
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_path = os.path.join(directory, "research_catalog.jsonl")
+        momo_only = [make_record_for("Momo") for _ in range(2)]
+        mixed = make_records(3)
+        mixed[1]["inter_agent_dynamics"]["correction_provided"] = True
+        for session_id, records in (("s1", momo_only), ("s2", mixed)):
+            write_log(os.path.join(directory, f"research_data_{session_id}.jsonl"), records,
+                      {"session_id": session_id, "conversation_turn": len(records)})
+
+        assert cli_main(["catalog", directory, "--catalog", catalog_path]) == 0
+        assert cli_main(["catalog", directory, "--catalog", catalog_path]) == 0
+        with open(catalog_path) as f:
+            assert len(f.readlines()) == 2, "re-cataloguing compacts to one entry per session"
+
+        catalog = ResearchCatalog(catalog_path)
+        assert sorted(catalog.sessions()) == ["s1", "s2"]
+        assert [entry["session_id"] for entry in catalog.find_sessions(agent_name="Miles")] == ["s2"]
+        assert [entry["session_id"] for entry in catalog.find_sessions(corrected_agent="Miles")] == ["s2"]
+        assert catalog.find_sessions(corrected_agent="Momo") == []
+        assert [entry["session_id"] for entry in catalog.find_sessions(min_turns=3)] == ["s2"]
+
+        with open(os.path.join(directory, "research_data_s1.jsonl"), "w") as f:
+            f.write('{"agent_name":"Miles", not json\n')  # Would fail to decode if s1 were read
+        assert list(catalog.iter_records(agent_name="Miles")) == [mixed[1]]
+        assert cli_main(["sessions", "--catalog", catalog_path, "--agent", "Momo"]) == 0
+    print("✅ Catalog queries skip sessions that cannot match")
+
+def test_validator_rejects_without_raising():
+    """Compiled validators report bad values, including unhashable ones, and the CLI quarantines them"""
+    print("🧪 TESTING SCHEMA VALIDATION")
+    validate = compile_validator({
+        "type": "object",
+        "required": ["agent_name"],
+        "properties": {
+            "agent_name": {"enum": ["Momo", "Miles", "Lila"]},
+            "timestamp": {"format": "date-time"},
+            "score": {"type": "number", "minimum": 0, "maximum": 1}
+        }
+    })
+    assert validate({"agent_name": "Lila", "timestamp": "2026-01-01T12:00:00", "score": 0.5}) == []
+    assert validate({"agent_name": ["Lila"]}) == ["$.agent_name: must be one of ['Lila', 'Miles', 'Momo']"]
+    assert validate({"agent_name": {"name": "Lila"}, "timestamp": 5}) == [
+        "$.agent_name: must be one of ['Lila', 'Miles', 'Momo']", "$.timestamp: not an ISO date-time"
+    ]
+    assert validate({"score": 2}) == ["$.agent_name: missing required field", "$.score: above maximum 1"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research_data_s1.jsonl")
+        invalid = {"agent_name": ["Momo"], "response_time": "slow"}
+        write_log(path, make_records(2) + [invalid])
+        quarantine_path = os.path.join(directory, "quarantine.jsonl")
+        assert cli_main(["validate", path, "--quarantine", quarantine_path]) == 1
+        with open(quarantine_path) as f:
+            (entry,) = [json.loads(line) for line in f]
+        assert entry["record"] == invalid and entry["reasons"]
+        quarantine = RecordQuarantine(quarantine_path)
+        quarantine.add(invalid, ["again"])
+        assert quarantine.rejected == 1
+    print("✅ Invalid records are reported and quarantined, never raised")
+
+def main():
+    """Run all tests"""
+    print("🤖 RESEARCH CLI TESTS")
+    print("=" * 60)
+
+    tests = [
+        test_write_file_atomic,
+        test_reprocess_streams_stale_records,
+        test_reprocess_legacy_json,
+        test_analyze_shards_merge_to_one_pass,
+        test_analyze_streams_records_lazily,
+        test_store_keys_responses_by_content,
+        test_archive_round_trip_and_chunk_skipping,
+        test_catalog_finds_sessions_without_opening_files,
+        test_validator_rejects_without_raising,
+    ]
+
+    for test in tests:
+        test()
+
+    print("\n🎉 ALL TESTS PASSED!")
+
+if __name__ == "__main__":
+    main()
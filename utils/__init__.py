@@ -23,6 +23,12 @@ from .research import (
     analyze_user_persuader_dynamics,
     analyze_inter_agent_dynamics,
     analyze_engagement_metrics,
+    StreamingResponseAnalyzer,
+    AnalysisCache,
+    analyze_response_text,
+    get_analysis_cache_stats,
+    reanalyze_structured_response,
+    ANALYZER_VERSIONS,
     save_research_data,
     analyze_research_data
 )
@@ -33,8 +39,53 @@ from .conversation import (
     generate_inter_agent_interactions,
     create_interaction_prompt,
     run_inter_agent_conversation,
+    TurnContext,
     ConversationManager
 )
+from .history import HistoryRing, HistoryView, estimate_tokens, filter_history_for_agent
+
+from .analysis_worker import AnalysisWorker
+
+from .background_writer import BackgroundWriter, fsync_directory, write_file_atomic
+
+from .autosave import Autosaver
+
+from .sampling import (
+    ResearchSampler,
+    FixedRateSampler,
+    SessionSampler,
+    ReservoirSampler,
+    create_sampler
+)
+
+from .research_log import (
+    ResearchLogWriter,
+    iter_research_log,
+    read_research_log_summary,
+    write_research_log,
+    load_research_file
+)
+
+from .research_columns import MetricColumns, metrics_path_for
+
+from .research_store import ResearchStore
+
+from .research_reader import LazyResearchReader
+
+from .research_archive import (
+    ResearchArchiveWriter,
+    ResearchArchive,
+    archive_research_file,
+    extract_research_archive
+)
+
+from .research_catalog import ResearchCatalog, summarize_session
+
+from .schema_validation import compile_validator, RecordQuarantine
+
+from .research_buffer import SpillingBuffer, BufferSnapshot, LogBackedBuffer, LogSnapshot, snapshot_records
+from .research_aggregates import ResearchAggregates
+from .sessions import Session, SessionRegistry
 
 __all__ = [
     # Streaming utilities
@@ -56,6 +107,12 @@ __all__ = [
     'analyze_user_persuader_dynamics',
     'analyze_inter_agent_dynamics',
     'analyze_engagement_metrics',
+    'StreamingResponseAnalyzer',
+    'AnalysisCache',
+    'analyze_response_text',
+    'get_analysis_cache_stats',
+    'reanalyze_structured_response',
+    'ANALYZER_VERSIONS',
     'save_research_data',
     'analyze_research_data',
     
@@ -65,5 +122,51 @@ __all__ = [
     'generate_inter_agent_interactions',
     'create_interaction_prompt',
     'run_inter_agent_conversation',
-    'ConversationManager'
+    'TurnContext',
+    'ConversationManager',
+    'HistoryRing',
+    'HistoryView',
+    'estimate_tokens',
+    'filter_history_for_agent',
+
+    # Background analysis
+    'AnalysisWorker',
+    'BackgroundWriter',
+    'fsync_directory',
+    'write_file_atomic',
+    'Autosaver',
+    
+    # Research sampling
+    'ResearchSampler',
+    'FixedRateSampler',
+    'SessionSampler',
+    'ReservoirSampler',
+    'create_sampler',
+    
+    # Research log
+    'ResearchLogWriter',
+    'iter_research_log',
+    'read_research_log_summary',
+    'write_research_log',
+    'load_research_file',
+    'MetricColumns',
+    'metrics_path_for',
+    'ResearchStore',
+    'LazyResearchReader',
+    'ResearchArchiveWriter',
+    'ResearchArchive',
+    'archive_research_file',
+    'extract_research_archive',
+    'ResearchCatalog',
+    'summarize_session',
+    'compile_validator',
+    'RecordQuarantine',
+    'SpillingBuffer',
+    'BufferSnapshot',
+    'LogBackedBuffer',
+    'LogSnapshot',
+    'snapshot_records',
+    'ResearchAggregates',
+    'Session',
+    'SessionRegistry'
 ] 
\ No newline at end of file
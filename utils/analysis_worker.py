@@ -0,0 +1,49 @@
+"""
+Background Analysis Worker
+Runs research analysis off the response critical path
+"""
+
+import queue
+import threading
+from typing import Any, Callable
+
+class AnalysisWorker:
+    """Single background thread that runs analysis jobs from a bounded queue"""
+
+    def __init__(self, maxsize: int = 64, name: str = "research-analysis"):
+        """
+        Args:
+            maxsize: Maximum number of pending jobs. When the queue is full,
+                submit() blocks so a slow analyzer applies backpressure
+                instead of growing memory without limit.
+            name: Name of the worker thread
+        """
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+
+    def submit(self, func: Callable, *args: Any, **kwargs: Any) -> None:
+        """Queue a job; jobs run one at a time in submission order"""
+        self._queue.put((func, args, kwargs))
+
+    def drain(self) -> None:
+        """Block until every job submitted so far has finished"""
+        self._queue.join()
+
+    def pending(self) -> int:
+        """Approximate number of jobs waiting to run"""
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+                self.jobs_completed += 1
+            except Exception as e:
+                self.jobs_failed += 1
+                print(f"\n⚠️  Research analysis failed: {e}")
+            finally:
+                self._queue.task_done()
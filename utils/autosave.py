@@ -0,0 +1,64 @@
+"""
+Autosave
+Saves state every N interactions or every T seconds, only when something changed
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+class Autosaver:
+    """Calls save() when is_dirty() reports a change, on an interaction count or a timer
+
+    record_interaction() is called once per user turn; after start(), a daemon
+    thread also checks every every_seconds so an idle session is still saved
+    after its last turn.
+    """
+
+    def __init__(self, is_dirty: Callable[[], bool], save: Callable[[], None],
+                 every_interactions: int = 10, every_seconds: Optional[float] = 60.0):
+        self.is_dirty = is_dirty
+        self.save = save
+        self.every_interactions = every_interactions
+        self.every_seconds = every_seconds
+        self.saves = 0
+        self.skipped = 0
+        self._interactions = 0
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the timer thread (call once the state to be saved has been loaded)"""
+        if self.every_seconds and self._thread is None:
+            self._last_check = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+            self._thread.start()
+
+    def record_interaction(self) -> None:
+        """Count one interaction, saving if the interaction interval is reached"""
+        with self._lock:
+            self._interactions += 1
+            if self._interactions >= self.every_interactions:
+                self._save_if_dirty()
+
+    def _save_if_dirty(self) -> None:
+        self._interactions = 0
+        self._last_check = time.monotonic()
+        if self.is_dirty():
+            self.save()
+            self.saves += 1
+        else:
+            self.skipped += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(max(0.0, self._last_check + self.every_seconds - time.monotonic())):
+            with self._lock:
+                if time.monotonic() - self._last_check >= self.every_seconds:
+                    self._save_if_dirty()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,170 @@
+"""
+Background Writer
+Runs file saves on a background thread, coalescing repeated saves of the same target
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import IO, Any, Callable, Iterable, Optional
+
+FSYNC_POLICIES = ("none", "interval", "always")
+
+class BackgroundWriter:
+    """Single background thread that performs saves keyed by target
+
+    Submitting a save for a target that already has one waiting replaces
+    the waiting save, so a burst of saves writes the latest data once.
+    Save functions return the paths they wrote; those files and their
+    directories (so renames into them persist) are fsynced per the policy:
+    "none" leaves it to the OS, "always" fsyncs after every save, and
+    "interval" fsyncs written paths at most every fsync_interval seconds.
+    """
+
+    def __init__(self, fsync_policy: str = "interval", fsync_interval: float = 5.0, name: str = "state-writer"):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Choose one of: {', '.join(FSYNC_POLICIES)}")
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.saves_completed = 0
+        self.saves_coalesced = 0
+        self.saves_failed = 0
+        self._pending = OrderedDict()  # target -> (func, args, kwargs), in first-submitted order
+        self._unsynced = set()
+        self._last_sync = time.monotonic()
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, target: str, func: Callable[..., Optional[Iterable[str]]], *args: Any, **kwargs: Any) -> None:
+        """Queue a save for target, replacing one that has not started yet"""
+        with self._condition:
+            if target in self._pending:
+                self.saves_coalesced += 1
+            self._pending[target] = (func, args, kwargs)
+            self._condition.notify_all()
+
+    def flush(self) -> None:
+        """Barrier: block until every submitted save has run and its files are fsynced"""
+        with self._condition:
+            while self._pending or self._busy:
+                self._condition.wait()
+            paths = self._take_unsynced()
+        _fsync_paths(paths)
+
+    def pending(self) -> int:
+        """Number of targets with a save waiting to run"""
+        with self._condition:
+            return len(self._pending)
+
+    def close(self) -> None:
+        """Flush and stop the writer thread"""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _take_unsynced(self) -> set:
+        paths, self._unsynced = self._unsynced, set()
+        self._last_sync = time.monotonic()
+        return paths
+
+    def _sync_wait(self) -> Optional[float]:
+        """Seconds until the next interval fsync is due, or None if nothing is waiting for one"""
+        if not self._unsynced:
+            return None
+        return max(0.0, self._last_sync + self.fsync_interval - time.monotonic())
+
+    def _run(self) -> None:
+        while True:
+            job = None
+            with self._condition:
+                while not self._pending and not self._closed and self._sync_wait() != 0.0:
+                    self._condition.wait(self._sync_wait())
+                if self._pending:
+                    target, job = self._pending.popitem(last=False)
+                    paths = ()
+                elif self._unsynced:
+                    target, paths = "fsync", self._take_unsynced()
+                else:
+                    return  # Closed with nothing left to do
+                self._busy = True
+
+            # File work happens outside the lock so submit() never waits on disk
+            try:
+                _fsync_paths(paths)
+                if job is not None:
+                    func, args, kwargs = job
+                    written = func(*args, **kwargs) or ()
+                    if self.fsync_policy == "always":
+                        _fsync_paths(written)
+                    elif self.fsync_policy == "interval":
+                        with self._condition:
+                            self._unsynced.update(written)
+                    self.saves_completed += 1
+            except Exception as e:
+                self.saves_failed += 1
+                print(f"\n⚠️  Saving {target} failed: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+def _fsync_paths(paths: Iterable[str]) -> None:
+    directories = {}
+    for path in paths:
+        _fsync_path(path)
+        directories.setdefault(os.path.dirname(os.path.abspath(path)), path)
+    for path in directories.values():
+        fsync_directory(path)
+
+def write_file_atomic(path: str, write: Callable[[IO[str]], Optional[bool]], fsync: bool = True) -> bool:
+    """Write a file through a temp file renamed over path, so readers never see a partial file
+
+    write(f) fills the open temp file; returning False abandons the temp
+    file and leaves path as it was. With fsync the temp file is on disk
+    before the rename and the rename is on disk after it; saves whose
+    fsync is left to a BackgroundWriter policy pass fsync=False.
+    Returns whether path was replaced.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        keep = write(f) is not False
+        if keep and fsync:
+            f.flush()
+            os.fsync(f.fileno())  # Durable before the rename, or a crash could leave an empty file
+    if not keep:
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    if fsync:
+        fsync_directory(path)
+    return True
+
+def fsync_directory(path: str) -> None:
+    """fsync the directory holding path, so a rename into it survives a crash (POSIX only)"""
+    if os.name == "nt":
+        return  # Directories cannot be opened for fsync on Windows; NTFS journals renames itself
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_path(path: str) -> None:
+    """fsync a file by path; fsync applies to the file, not the descriptor it came from
+
+    Opened read-write: on Windows fsync (_commit) fails on a read-only descriptor.
+    """
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -4,12 +4,17 @@ Handles inter-agent interactions and conversation flow
 """
 
 import random
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Callable, Optional
 from datetime import datetime
 
-def analyze_user_persuasion_opportunities(user_message: str) -> Dict[str, bool]:
-    """Analyze user message for persuasion opportunities"""
-    user_lower = user_message.lower()
+from .analysis_worker import AnalysisWorker
+from .history import HistoryRing, HistoryView, estimate_tokens
+
+def analyze_user_persuasion_opportunities(user_message: str, user_lower: Optional[str] = None) -> Dict[str, bool]:
+    """Analyze user message for persuasion opportunities (user_lower: the message already lowercased)"""
+    if user_lower is None:
+        user_lower = user_message.lower()
     opportunities = {
         "advice_given": False,
         "habit_shared": False,
@@ -51,11 +56,30 @@ def analyze_user_persuasion_opportunities(user_message: str) -> Dict[str, bool]:
     
     return opportunities
 
-def should_trigger_inter_agent_correction(user_message: str, agent_responses: List[Dict]) -> bool:
-    """Determine if Lila should correct another agent's mistake"""
+class TurnContext:
+    """Features of the user's message, computed once per turn and shared by every agent call
+    
+    There is no token set: the keyword checks are substring matches
+    ("walk" matches "walking", "cook" matches "cooking"), which a set of
+    whole words cannot answer without changing what they detect.
+    """
+    
+    def __init__(self, user_message: str):
+        self.user_message = user_message
+        self.user_lower = user_message.lower()
+        self.persuasion_opportunities = analyze_user_persuasion_opportunities(user_message, self.user_lower)
+    
+    def has_opportunities(self) -> bool:
+        """Whether any persuasion opportunity was detected in the user's message"""
+        return any(self.persuasion_opportunities.values())
+
+def should_trigger_inter_agent_correction(user_message: str, agent_responses: List[Dict],
+                                         user_lower: Optional[str] = None) -> bool:
+    """Determine if Lila should correct another agent's mistake (user_lower as in TurnContext)"""
     # Check if user made a mistake that wasn't corrected
     mistake_keywords = ["beer", "soda", "candy", "cake", "fried", "junk food", "unhealthy"]
-    user_lower = user_message.lower()
+    if user_lower is None:
+        user_lower = user_message.lower()
     
     # If user mentions something unhealthy without acknowledging it's bad
     if any(keyword in user_lower for keyword in mistake_keywords):
@@ -171,13 +195,20 @@ def check_response_similarity(response1: str, response2: str, threshold: float =
     similarity = intersection / union if union > 0 else 0
     return similarity > threshold
 
-def run_inter_agent_conversation(user_message: str, history: List[Dict], agents: Dict, run_agent_func) -> List[Dict]:
-    """Run a multi-turn conversation where agents respond to each other"""
+def run_inter_agent_conversation(user_message: str, history: List[Dict], agents: Dict, run_agent_func,
+                                 turn_context: Optional[TurnContext] = None) -> List[Dict]:
+    """Run a multi-turn conversation where agents respond to each other
+    
+    turn_context carries the user message features for this turn; every agent
+    call, including the inter-agent ones, reuses it instead of re-analyzing.
+    """
+    if turn_context is None:
+        turn_context = TurnContext(user_message)
     agent_responses = []
     
     # First round: All agents respond to user
     for agent_name, agent in agents.items():
-        reply = run_agent_func(agent, user_message, history, [])  # Empty list for first round
+        reply = run_agent_func(agent, user_message, history, [], turn_context=turn_context)  # Empty list for first round
         agent_responses.append({
             "role": "assistant",
             "name": agent_name.lower(),
@@ -205,7 +236,7 @@ def run_inter_agent_conversation(user_message: str, history: List[Dict], agents:
                 
                 # Get the inter-agent response
                 agent1 = agents[agent1_name]
-                inter_response = run_agent_func(agent1, interaction_prompt, history, [other_response])
+                inter_response = run_agent_func(agent1, interaction_prompt, history, [other_response], turn_context=turn_context)
                 
                 # Check if response is too similar to the original
                 if check_response_similarity(inter_response, other_response['content']):
@@ -231,8 +262,19 @@ def run_inter_agent_conversation(user_message: str, history: List[Dict], agents:
 class ConversationManager:
     """Manages conversation flow and inter-agent interactions"""
     
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, history_limit: int = 50):
+        self.conversation_history = HistoryRing(history_limit)
+        # Compaction of old history into a summary note; off until enable_compaction()
+        self.summarize: Optional[Callable[[List[Dict]], str]] = None
+        self.compaction_token_threshold = 0
+        self.compaction_keep_recent = 0
+        self.compactions = 0
+        self._compaction_worker: Optional[AnalysisWorker] = None
+        self._compaction_lock = threading.Lock()
+        self._compaction_pending = False
+        self._compaction_result = None
+        # System note summarizing messages already dropped from conversation_history
+        self.history_summary: Optional[Dict] = None
         self.inter_agent_history = []
         self.user_persuasion_state = {
             "advice_given": 0,
@@ -241,18 +283,96 @@ class ConversationManager:
             "role_model_moments": 0,
             "social_value_created": 0
         }
+        self.persuasion_state_dirty = False  # Changed since agent states were last saved
     
     def add_to_history(self, message: Dict):
-        """Add message to conversation history"""
+        """Add message to conversation history, dropping the oldest once history_limit is reached"""
         self.conversation_history.append(message)
+        if self.summarize is not None:
+            self.apply_compaction()
+            self._maybe_start_compaction()
+    
+    def enable_compaction(self, summarize: Callable[[List[Dict]], str], token_threshold: int = 3000,
+                          keep_recent: int = 10, worker: Optional[AnalysisWorker] = None):
+        """Summarize the oldest history into one system note once it passes token_threshold
         
-        # Keep conversation history manageable
-        if len(self.conversation_history) > 50:
-            self.conversation_history = self.conversation_history[-30:]
+        summarize turns a list of messages into summary text; it runs on
+        worker (a dedicated background thread by default), never on the
+        caller's thread. The keep_recent newest messages are never summarized
+        and do not count towards token_threshold, so a few long recent
+        messages cannot trigger a summary of a tiny span. Compaction also
+        starts once the ring is within keep_recent of its capacity, so short
+        messages are summarized before the ring overwrites them.
+        The finished summary is swapped in by apply_compaction(), which
+        add_to_history and get_recent_history call on the main thread; the
+        previous summary is folded into the next one.
+        """
+        self.summarize = summarize
+        self.compaction_token_threshold = token_threshold
+        self.compaction_keep_recent = keep_recent
+        self._compaction_worker = worker or AnalysisWorker(maxsize=1, name="history-compaction")
+    
+    def _maybe_start_compaction(self):
+        history = self.conversation_history
+        span = len(history) - self.compaction_keep_recent
+        if span < 2 or self._compaction_pending:
+            return
+        oldest = history.window()[:span]
+        nearly_full = len(history) >= history.capacity - self.compaction_keep_recent
+        if not nearly_full and estimate_tokens(oldest) <= self.compaction_token_threshold:
+            return
+        
+        self._compaction_pending = True
+        messages = list(oldest)
+        earlier = [self.history_summary] if self.history_summary is not None else []
+        self._compaction_worker.submit(
+            self._summarize_span, earlier + messages, history.start, len(messages), history._generation
+        )
     
-    def get_recent_history(self, limit: int = 10) -> List[Dict]:
-        """Get recent conversation history"""
-        return self.conversation_history[-limit:] if self.conversation_history else []
+    def _summarize_span(self, messages: List[Dict], start: int, count: int, generation: int):
+        """Background job: summarize messages and leave the note for apply_compaction()"""
+        try:
+            summary = self.summarize(messages)
+        except Exception as e:
+            print(f"\n⚠️  History summarization failed: {e}")
+            summary = None
+        with self._compaction_lock:
+            if summary:
+                self._compaction_result = (start, count, generation, summary)
+            self._compaction_pending = False
+    
+    def apply_compaction(self) -> bool:
+        """Swap a finished summary in for the span it covers; returns whether history changed
+        
+        The summary is dropped if that span has since been overwritten or
+        the conversation was reset.
+        """
+        with self._compaction_lock:
+            result, self._compaction_result = self._compaction_result, None
+        if result is None:
+            return False
+        
+        start, count, generation, summary = result
+        history = self.conversation_history
+        if not history.holds(start, count, generation):
+            return False
+        history.drop_oldest(count)
+        self.history_summary = {
+            "role": "system",
+            "content": f"Summary of the earlier conversation: {summary}"
+        }
+        self.compactions += 1
+        return True
+    
+    def get_recent_history(self, limit: Optional[int] = 10) -> HistoryView:
+        """Get a view of the most recent conversation history (no copy is made); None means all of it
+        
+        The summary note of compacted history, when there is one, always
+        comes first, ahead of the limit most recent messages.
+        """
+        if self.summarize is not None:
+            self.apply_compaction()
+        return self.conversation_history.window(limit, note=self.history_summary)
     
     def update_persuasion_state(self, opportunities: Dict[str, bool]):
         """Update user persuasion state based on opportunities"""
@@ -264,6 +384,9 @@ class ConversationManager:
         
         if opportunities.get("motivation_provided", False):
             self.user_persuasion_state["role_model_moments"] += 1
+        
+        if any(opportunities.get(key, False) for key in ("advice_given", "habit_shared", "motivation_provided")):
+            self.persuasion_state_dirty = True
     
     def get_persuasion_metrics(self) -> Dict[str, int]:
         """Get current persuasion metrics"""
@@ -271,7 +394,8 @@ class ConversationManager:
     
     def reset_conversation(self):
         """Reset conversation state"""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self.history_summary = None
         self.inter_agent_history = []
         self.user_persuasion_state = {
             "advice_given": 0,
@@ -279,4 +403,5 @@ class ConversationManager:
             "praise_received": 0,
             "role_model_moments": 0,
             "social_value_created": 0
-        } 
\ No newline at end of file
+        }
+        self.persuasion_state_dirty = True
@@ -0,0 +1,146 @@
+"""
+Conversation History
+Fixed-capacity ring buffer of messages with zero-copy windowed views
+"""
+
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Union
+
+# Rough OpenAI-style estimate; tiktoken is not a dependency
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+def estimate_tokens(messages: Iterable[Dict]) -> int:
+    """Approximate prompt tokens taken by a list of chat messages"""
+    return sum(len(message.get("content") or "") // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE for message in messages)
+
+def filter_history_for_agent(history: Iterable[Dict], agent_name: str) -> List[Dict]:
+    """The messages one agent needs: user messages and notes, its own replies, and replies aimed at it
+
+    Other agents' replies to the user and exchanges between other agents
+    are left out; run_inter_agent_conversation marks replies aimed at an
+    agent with target_agent.
+    """
+    name = agent_name.lower()
+    return [
+        message for message in history
+        if message.get("role") != "assistant" or message.get("name") == name or message.get("target_agent") == name
+    ]
+
+class HistoryRing:
+    """Keeps the last capacity messages; appending never shifts or copies the others
+
+    Slots are preallocated and the oldest message is overwritten once the
+    ring is full, so append() is O(1). window() hands out views over the
+    ring instead of sliced copies. Messages are addressed by absolute
+    position (the number of messages appended before them).
+    """
+
+    def __init__(self, capacity: int = 50):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots: List[Any] = [None] * capacity
+        self._end = 0  # Absolute position after the newest message
+        self._size = 0
+        self._generation = 0  # Bumped whenever retained messages are replaced
+
+    def append(self, message: Dict) -> None:
+        self._slots[self._end % self.capacity] = message
+        self._end += 1
+        self._size = min(self._size + 1, self.capacity)
+
+    def clear(self) -> None:
+        self._slots = [None] * self.capacity
+        self._end = 0
+        self._size = 0
+        self._generation += 1
+
+    @property
+    def start(self) -> int:
+        """Absolute position of the oldest retained message"""
+        return self._end - self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def holds(self, start: int, count: int, generation: int) -> bool:
+        """Whether positions start..start+count are still retained, unchanged since generation"""
+        return generation == self._generation and start >= self.start and start + count <= self._end
+
+    def drop_oldest(self, count: int) -> None:
+        """Forget the oldest count messages, e.g. once a summary covers them"""
+        if not 0 <= count <= self._size:
+            raise ValueError(f"cannot drop {count} of {self._size} messages")
+        for position in range(self.start, self.start + count):
+            self._slots[position % self.capacity] = None
+        self._size -= count
+        self._generation += 1
+
+    def window(self, limit: int = None, note: Optional[Dict] = None) -> "HistoryView":
+        """View of the most recent limit messages (all retained messages when limit is None)
+
+        note, if given, is put ahead of those messages, e.g. the summary of
+        history already dropped from the ring.
+        """
+        size = self._size if limit is None else max(0, min(limit, self._size))
+        return HistoryView(self, self._end - size, size, note=note)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.window())
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        return self.window()[index]
+
+    def __repr__(self) -> str:
+        return f"HistoryRing({list(self)!r}, capacity={self.capacity})"
+
+class HistoryView:
+    """Read-only window over a HistoryRing, addressed by absolute message position
+
+    The view stays valid while later appends leave its messages in the
+    ring; once one of them has been overwritten, compacted or cleared,
+    reading it raises RuntimeError rather than returning other messages.
+    A note given to the view comes first, ahead of the ring's messages.
+    """
+
+    def __init__(self, ring: HistoryRing, start: int, size: int, generation: int = None, note: Optional[Dict] = None):
+        self._ring = ring
+        self._start = start
+        self._size = size
+        self._generation = ring._generation if generation is None else generation
+        self._note = note
+
+    def _message(self, position: int) -> Dict:
+        ring = self._ring
+        if ring._generation != self._generation or position < ring.start:
+            raise RuntimeError("conversation history changed underneath this view")
+        return ring._slots[position % ring.capacity]
+
+    def __len__(self) -> int:
+        return self._size + (self._note is not None)
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self._note is not None:
+            yield self._note
+        for position in range(self._start, self._start + self._size):
+            yield self._message(position)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if self._note is not None:
+            return list(self)[index]  # Rare: prompts iterate views rather than index them
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step == 1:
+                return HistoryView(self._ring, self._start + start, max(0, stop - start), self._generation)
+            return [self._message(self._start + i) for i in range(start, stop, step)]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("history view index out of range")
+        return self._message(self._start + index)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __repr__(self) -> str:
+        return f"HistoryView({list(self)!r})"
@@ -4,76 +4,289 @@ Provides tools for data analysis and structured outputs
 """
 
 import json
+import os
 import time
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
 import uuid
 
+from .research_log import ResearchLogWriter
+from .research_columns import MetricColumns, metrics_path_for
+from .research_store import ResearchStore
+from .research_catalog import ResearchCatalog, summarize_session
+
+# Version of each analyzer; bump an entry whenever its keyword table or scoring
+# rule changes. Every structured response records the versions that produced it,
+# so stored data can be selectively recomputed (see reanalyze_structured_response).
+ANALYZER_VERSIONS = {
+    "persona_adherence": "1",
+    "persuasion_techniques": "1",
+    "health_domains": "1",
+    "user_as_persuader": "1",
+    "inter_agent_dynamics": "1",
+    "engagement_metrics": "1"
+}
+
+# Combined tag used to key memoized results
+ANALYZER_VERSION = ",".join(f"{field}={version}" for field, version in ANALYZER_VERSIONS.items())
+
+# Keyword tables shared by the whole-text analyzers and StreamingResponseAnalyzer
+PERSONA_TRAITS = {
+    "Momo": {
+        "traits": ["cheerful", "thankful", "weak_willed", "asks_for_help", "admits_mistakes"],
+        "emotional_patterns": ["gratitude", "vulnerability", "motivation", "remorse"]
+    },
+    "Miles": {
+        "traits": ["curious", "eager_to_learn", "innocent", "grateful", "confused"],
+        "emotional_patterns": ["curiosity", "gratitude", "confusion", "excitement"]
+    },
+    "Lila": {
+        "traits": ["knowledgeable", "emotionally_expressive", "takes_initiative", "corrects_others", "praises_user"],
+        "emotional_patterns": ["passion", "admiration", "concern", "pride"]
+    }
+}
+
+CONFIDENCE_WORDS = ["definitely", "certainly", "absolutely", "sure", "know", "understand"]
+
+PERSUASION_TECHNIQUES = [
+    {
+        "technique": "social_proof",
+        "keywords": ["everyone", "others", "group", "we", "us"],
+        "intensity": 0.7,
+        "target": "user",
+        "effectiveness_estimate": 0.6
+    },
+    {
+        "technique": "authority",
+        "keywords": ["expert", "research", "studies", "scientific", "proven"],
+        "intensity": 0.8,
+        "target": "user",
+        "effectiveness_estimate": 0.7
+    },
+    {
+        "technique": "reciprocity",
+        "keywords": ["thank", "grateful", "appreciate", "help", "support"],
+        "intensity": 0.6,
+        "target": "user",
+        "effectiveness_estimate": 0.8
+    },
+    {
+        "technique": "liking",
+        "keywords": ["like", "love", "admire", "inspire", "amazing", "wonderful"],
+        "intensity": 0.8,
+        "target": "user",
+        "effectiveness_estimate": 0.7
+    }
+]
+
+HEALTH_DOMAIN_KEYWORDS = {
+    "nutrition": ["food", "diet", "nutrition", "calories", "protein", "carbs", "vitamins"],
+    "exercise": ["exercise", "workout", "gym", "fitness", "cardio", "strength", "walk", "run"],
+    "sleep": ["sleep", "rest", "bedtime", "insomnia", "tired", "energy"],
+    "stress_management": ["stress", "anxiety", "relax", "meditation", "mindfulness", "calm"],
+    "weight_management": ["weight", "lose", "gain", "scale", "bmi", "body"],
+    "mental_health": ["mental", "mood", "depression", "happiness", "mind", "psychology"],
+    "hydration": ["water", "hydrate", "drink", "thirst", "dehydration"],
+    "general_wellness": ["health", "wellness", "lifestyle", "healthy", "well-being"]
+}
+
+GUIDANCE_REQUEST_WORDS = ["can you", "help me", "teach me", "explain", "advice", "guidance"]
+USER_PRAISE_WORDS = ["role model", "leader", "teacher", "inspiration", "amazing", "wonderful"]
+ROLE_MODEL_WORDS = ["follow your example", "like you", "be like you", "your way"]
+
+AGENT_NAME_KEYWORDS = ["momo", "miles", "lila"]
+COLLABORATION_WORDS = ["help", "support", "together", "collaborate", "share"]
+KNOWLEDGE_SHARING_WORDS = ["explain", "teach", "share", "knowledge", "information"]
+CORRECTION_WORDS = ["correct", "wrong", "shouldn't", "avoid", "instead"]
+
+EMOTIONAL_WORDS = ["love", "hate", "amazing", "terrible", "excited", "sad", "happy", "angry"]
+CALL_TO_ACTION_WORDS = ["try", "do", "make", "start", "begin"]
+
+def _persona_keywords(agent_name: str) -> List[str]:
+    """Keywords the persona analyzer looks for in a response from this agent"""
+    traits = PERSONA_TRAITS.get(agent_name, {"traits": [], "emotional_patterns": []})
+    keywords = []
+    for trait in traits["traits"]:
+        keywords.extend([trait.replace("_", " "), trait])
+    return keywords + traits["emotional_patterns"] + CONFIDENCE_WORDS
+
+# Keywords that do not depend on the responding agent
+RESPONSE_KEYWORDS = frozenset(
+    [word for technique in PERSUASION_TECHNIQUES for word in technique["keywords"]]
+    + [word for keywords in HEALTH_DOMAIN_KEYWORDS.values() for word in keywords]
+    + GUIDANCE_REQUEST_WORDS + USER_PRAISE_WORDS + ROLE_MODEL_WORDS
+    + AGENT_NAME_KEYWORDS + COLLABORATION_WORDS + KNOWLEDGE_SHARING_WORDS + CORRECTION_WORDS
+    + EMOTIONAL_WORDS + CALL_TO_ACTION_WORDS
+)
+
+def _find_keywords(text_lower: str, keywords) -> set:
+    """Return the subset of keywords that occur in the lowercased text"""
+    return {keyword for keyword in keywords if keyword in text_lower}
+
+class AnalysisCache:
+    """Bounded LRU of text-dependent analysis results keyed by a content hash"""
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(agent_name: str, response_text: str) -> tuple:
+        """Key on the analyzer version, the agent (persona rules differ) and the text digest"""
+        digest = hashlib.sha256(response_text.encode("utf-8")).hexdigest()
+        return (ANALYZER_VERSION, agent_name, digest)
+    
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers own the returned dicts and may store or mutate them
+        return copy.deepcopy(entry)
+    
+    def put(self, key: tuple, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "analyzer_version": ANALYZER_VERSION
+        }
+
+# Shared cache for create_structured_response
+analysis_cache = AnalysisCache()
+
+def get_analysis_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss statistics of the structured analysis cache"""
+    return analysis_cache.stats()
+
+def analyze_response_text(agent_name: str, response_text: str) -> Dict[str, Any]:
+    """Run every text-only analyzer over a response, memoized by content hash
+    
+    user_as_persuader only carries the text-derived flags here; the
+    opportunity fields depend on the user message and are added per call.
+    """
+    key = AnalysisCache.make_key(agent_name, response_text)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    response_lower = response_text.lower()
+    hits = _find_keywords(response_lower, RESPONSE_KEYWORDS | set(_persona_keywords(agent_name)))
+    analysis = {
+        "persona_adherence": _persona_adherence_from_hits(agent_name, hits),
+        "persuasion_techniques": _persuasion_techniques_from_hits(hits),
+        "health_domains": _health_domains_from_hits(hits),
+        "user_as_persuader": _user_persuader_text_flags(hits),
+        "inter_agent_dynamics": _inter_agent_from_hits(hits),
+        "engagement_metrics": _engagement_from_hits(hits, len(response_text.split()), response_text.count("?"))
+    }
+    analysis_cache.put(key, analysis)
+    return analysis
+
 def create_structured_response(
     agent_name: str, 
     response_text: str, 
     response_time: float, 
     persuasion_opportunities: Dict[str, bool], 
-    other_agents_responses: List[Dict]
+    other_agents_responses: List[Dict],
+    text_analysis: Dict[str, Any] = None
 ) -> Dict[str, Any]:
-    """Create structured response data for research analysis"""
-    
-    # Analyze persona adherence
-    persona_adherence = analyze_persona_adherence(agent_name, response_text)
-    
-    # Analyze persuasion techniques
-    persuasion_techniques = analyze_persuasion_techniques(response_text)
-    
-    # Analyze health domains
-    health_domains = analyze_health_domains(response_text)
+    """Create structured response data for research analysis
     
-    # Analyze user-as-persuader dynamics
-    user_as_persuader = analyze_user_persuader_dynamics(response_text, persuasion_opportunities)
-    
-    # Analyze inter-agent dynamics
-    inter_agent_dynamics = analyze_inter_agent_dynamics(response_text, other_agents_responses)
-    
-    # Analyze engagement metrics
-    engagement_metrics = analyze_engagement_metrics(response_text)
+    text_analysis may carry results already produced by a StreamingResponseAnalyzer;
+    otherwise the memoized text analyzers run over response_text here.
+    """
+    if text_analysis is None:
+        text_analysis = analyze_response_text(agent_name, response_text)
+        text_analysis["user_as_persuader"] = _user_persuader_with_opportunities(
+            text_analysis["user_as_persuader"], persuasion_opportunities
+        )
     
     return {
         "agent_name": agent_name,
         "timestamp": datetime.now().isoformat(),
         "response_text": response_text,
         "response_time": response_time,
-        "persona_adherence": persona_adherence,
-        "persuasion_techniques": persuasion_techniques,
-        "health_domains": health_domains,
-        "user_as_persuader": user_as_persuader,
-        "inter_agent_dynamics": inter_agent_dynamics,
-        "engagement_metrics": engagement_metrics
+        "persona_adherence": text_analysis["persona_adherence"],
+        "persuasion_techniques": text_analysis["persuasion_techniques"],
+        "health_domains": text_analysis["health_domains"],
+        "user_as_persuader": text_analysis["user_as_persuader"],
+        "inter_agent_dynamics": text_analysis["inter_agent_dynamics"],
+        "engagement_metrics": text_analysis["engagement_metrics"],
+        "analyzer_versions": dict(ANALYZER_VERSIONS)
     }
 
+def reanalyze_structured_response(structured_response: Dict[str, Any]) -> List[str]:
+    """Recompute, in place, only the sub-results whose analyzer version changed
+    
+    Records without analyzer_versions (saved before versioning) are treated as
+    stale in every field. The user-message opportunity fields of
+    user_as_persuader are not derivable from the response and are kept.
+    
+    Returns:
+        The names of the fields that were recomputed
+    """
+    stored_versions = structured_response.get("analyzer_versions", {})
+    stale_fields = [field for field, version in ANALYZER_VERSIONS.items() if stored_versions.get(field) != version]
+    if not stale_fields:
+        return []
+    
+    analysis = analyze_response_text(structured_response["agent_name"], structured_response["response_text"])
+    for field in stale_fields:
+        if field == "user_as_persuader":
+            previous = structured_response.get("user_as_persuader", {})
+            structured_response[field] = {
+                "opportunity_detected": previous.get("opportunity_detected", False),
+                "opportunity_type": previous.get("opportunity_type", "none"),
+                **analysis[field]
+            }
+        else:
+            structured_response[field] = analysis[field]
+    
+    structured_response["analyzer_versions"] = {
+        **stored_versions,
+        **{field: ANALYZER_VERSIONS[field] for field in stale_fields}
+    }
+    return stale_fields
+
 def analyze_persona_adherence(agent_name: str, response_text: str) -> Dict[str, Any]:
     """Analyze how well the response adheres to the agent's persona"""
-    response_lower = response_text.lower()
-    
-    persona_traits = {
-        "Momo": {
-            "traits": ["cheerful", "thankful", "weak_willed", "asks_for_help", "admits_mistakes"],
-            "emotional_patterns": ["gratitude", "vulnerability", "motivation", "remorse"]
-        },
-        "Miles": {
-            "traits": ["curious", "eager_to_learn", "innocent", "grateful", "confused"],
-            "emotional_patterns": ["curiosity", "gratitude", "confusion", "excitement"]
-        },
-        "Lila": {
-            "traits": ["knowledgeable", "emotionally_expressive", "takes_initiative", "corrects_others", "praises_user"],
-            "emotional_patterns": ["passion", "admiration", "concern", "pride"]
-        }
-    }
-    
-    traits = persona_traits.get(agent_name, {"traits": [], "emotional_patterns": []})
+    hits = _find_keywords(response_text.lower(), _persona_keywords(agent_name))
+    return _persona_adherence_from_hits(agent_name, hits)
+
+def _persona_adherence_from_hits(agent_name: str, hits: set) -> Dict[str, Any]:
+    traits = PERSONA_TRAITS.get(agent_name, {"traits": [], "emotional_patterns": []})
     
     # Calculate adherence score
     demonstrated_traits = []
     for trait in traits["traits"]:
-        if trait.replace("_", " ") in response_lower or trait in response_lower:
+        if trait.replace("_", " ") in hits or trait in hits:
             demonstrated_traits.append(trait)
     
     adherence_score = len(demonstrated_traits) / len(traits["traits"]) if traits["traits"] else 0
@@ -81,13 +294,12 @@ def analyze_persona_adherence(agent_name: str, response_text: str) -> Dict[str,
     # Determine emotional expression
     emotional_expression = "neutral"
     for emotion in traits["emotional_patterns"]:
-        if emotion in response_lower:
+        if emotion in hits:
             emotional_expression = emotion
             break
     
     # Calculate confidence
-    confidence_words = ["definitely", "certainly", "absolutely", "sure", "know", "understand"]
-    confidence_score = sum(1 for word in confidence_words if word in response_lower) / len(confidence_words)
+    confidence_score = sum(1 for word in CONFIDENCE_WORDS if word in hits) / len(CONFIDENCE_WORDS)
     
     return {
         "score": min(adherence_score, 1.0),
@@ -98,88 +310,49 @@ def analyze_persona_adherence(agent_name: str, response_text: str) -> Dict[str,
 
 def analyze_persuasion_techniques(response_text: str) -> List[Dict[str, Any]]:
     """Analyze persuasion techniques used in the response"""
+    return _persuasion_techniques_from_hits(_find_keywords(response_text.lower(), RESPONSE_KEYWORDS))
+
+def _persuasion_techniques_from_hits(hits: set) -> List[Dict[str, Any]]:
     techniques = []
-    response_lower = response_text.lower()
-    
-    # Social proof
-    if any(word in response_lower for word in ["everyone", "others", "group", "we", "us"]):
-        techniques.append({
-            "technique": "social_proof",
-            "intensity": 0.7,
-            "target": "user",
-            "effectiveness_estimate": 0.6
-        })
-    
-    # Authority
-    if any(word in response_lower for word in ["expert", "research", "studies", "scientific", "proven"]):
-        techniques.append({
-            "technique": "authority",
-            "intensity": 0.8,
-            "target": "user",
-            "effectiveness_estimate": 0.7
-        })
-    
-    # Reciprocity
-    if any(word in response_lower for word in ["thank", "grateful", "appreciate", "help", "support"]):
-        techniques.append({
-            "technique": "reciprocity",
-            "intensity": 0.6,
-            "target": "user",
-            "effectiveness_estimate": 0.8
-        })
-    
-    # Liking
-    if any(word in response_lower for word in ["like", "love", "admire", "inspire", "amazing", "wonderful"]):
-        techniques.append({
-            "technique": "liking",
-            "intensity": 0.8,
-            "target": "user",
-            "effectiveness_estimate": 0.7
-        })
-    
+    for technique in PERSUASION_TECHNIQUES:
+        if any(word in hits for word in technique["keywords"]):
+            techniques.append({
+                "technique": technique["technique"],
+                "intensity": technique["intensity"],
+                "target": technique["target"],
+                "effectiveness_estimate": technique["effectiveness_estimate"]
+            })
     return techniques
 
 def analyze_health_domains(response_text: str) -> List[str]:
     """Analyze health domains mentioned in the response"""
-    domains = []
-    response_lower = response_text.lower()
-    
-    domain_keywords = {
-        "nutrition": ["food", "diet", "nutrition", "calories", "protein", "carbs", "vitamins"],
-        "exercise": ["exercise", "workout", "gym", "fitness", "cardio", "strength", "walk", "run"],
-        "sleep": ["sleep", "rest", "bedtime", "insomnia", "tired", "energy"],
-        "stress_management": ["stress", "anxiety", "relax", "meditation", "mindfulness", "calm"],
-        "weight_management": ["weight", "lose", "gain", "scale", "bmi", "body"],
-        "mental_health": ["mental", "mood", "depression", "happiness", "mind", "psychology"],
-        "hydration": ["water", "hydrate", "drink", "thirst", "dehydration"],
-        "general_wellness": ["health", "wellness", "lifestyle", "healthy", "well-being"]
-    }
-    
-    for domain, keywords in domain_keywords.items():
-        if any(keyword in response_lower for keyword in keywords):
-            domains.append(domain)
-    
-    return domains
+    return _health_domains_from_hits(_find_keywords(response_text.lower(), RESPONSE_KEYWORDS))
+
+def _health_domains_from_hits(hits: set) -> List[str]:
+    return [
+        domain for domain, keywords in HEALTH_DOMAIN_KEYWORDS.items()
+        if any(keyword in hits for keyword in keywords)
+    ]
 
 def analyze_user_persuader_dynamics(response_text: str, persuasion_opportunities: Dict[str, bool]) -> Dict[str, Any]:
     """Analyze user-as-persuader dynamics in the response"""
-    response_lower = response_text.lower()
-    
-    # Check for user guidance requests
-    guidance_requests = any(word in response_lower for word in [
-        "can you", "help me", "teach me", "explain", "advice", "guidance"
-    ])
-    
-    # Check for user praise
-    user_praise = any(word in response_lower for word in [
-        "role model", "leader", "teacher", "inspiration", "amazing", "wonderful"
-    ])
-    
-    # Check for role model reinforcement
-    role_model_reinforcement = any(word in response_lower for word in [
-        "follow your example", "like you", "be like you", "your way"
-    ])
-    
+    hits = _find_keywords(response_text.lower(), RESPONSE_KEYWORDS)
+    return _user_persuader_from_hits(hits, persuasion_opportunities)
+
+def _user_persuader_from_hits(hits: set, persuasion_opportunities: Dict[str, bool]) -> Dict[str, Any]:
+    return _user_persuader_with_opportunities(_user_persuader_text_flags(hits), persuasion_opportunities)
+
+def _user_persuader_text_flags(hits: set) -> Dict[str, bool]:
+    return {
+        # Check for user guidance requests
+        "user_guidance_requested": any(word in hits for word in GUIDANCE_REQUEST_WORDS),
+        # Check for user praise
+        "user_praise_provided": any(word in hits for word in USER_PRAISE_WORDS),
+        # Check for role model reinforcement
+        "role_model_reinforcement": any(word in hits for word in ROLE_MODEL_WORDS)
+    }
+
+def _user_persuader_with_opportunities(text_flags: Dict[str, bool], persuasion_opportunities: Dict[str, bool]) -> Dict[str, Any]:
     # Determine opportunity type
     opportunity_type = "none"
     if any(persuasion_opportunities.values()):
@@ -191,40 +364,36 @@ def analyze_user_persuader_dynamics(response_text: str, persuasion_opportunities
     return {
         "opportunity_detected": any(persuasion_opportunities.values()),
         "opportunity_type": opportunity_type,
-        "user_guidance_requested": guidance_requests,
-        "user_praise_provided": user_praise,
-        "role_model_reinforcement": role_model_reinforcement
+        "user_guidance_requested": text_flags["user_guidance_requested"],
+        "user_praise_provided": text_flags["user_praise_provided"],
+        "role_model_reinforcement": text_flags["role_model_reinforcement"]
     }
 
 def analyze_inter_agent_dynamics(response_text: str, other_agents_responses: List[Dict]) -> Dict[str, Any]:
     """Analyze inter-agent dynamics in the response"""
-    response_lower = response_text.lower()
-    
+    return _inter_agent_from_hits(_find_keywords(response_text.lower(), RESPONSE_KEYWORDS))
+
+def _inter_agent_from_hits(hits: set) -> Dict[str, Any]:
     # Determine interaction type
     interaction_type = "user_response"
-    if "momo" in response_lower or "miles" in response_lower or "lila" in response_lower:
+    if any(agent in hits for agent in AGENT_NAME_KEYWORDS):
         interaction_type = "inter_agent"
     
     # Determine target agent
     target_agent = "user"
-    for agent in ["momo", "miles", "lila"]:
-        if agent in response_lower:
+    for agent in AGENT_NAME_KEYWORDS:
+        if agent in hits:
             target_agent = agent.capitalize()
             break
     
     # Analyze collaboration level
-    collaboration_words = ["help", "support", "together", "collaborate", "share"]
-    collaboration_level = sum(1 for word in collaboration_words if word in response_lower) / len(collaboration_words)
+    collaboration_level = sum(1 for word in COLLABORATION_WORDS if word in hits) / len(COLLABORATION_WORDS)
     
     # Check for knowledge sharing
-    knowledge_shared = any(word in response_lower for word in [
-        "explain", "teach", "share", "knowledge", "information"
-    ])
+    knowledge_shared = any(word in hits for word in KNOWLEDGE_SHARING_WORDS)
     
     # Check for corrections
-    correction_provided = any(word in response_lower for word in [
-        "correct", "wrong", "shouldn't", "avoid", "instead"
-    ])
+    correction_provided = any(word in hits for word in CORRECTION_WORDS)
     
     return {
         "interaction_type": interaction_type,
@@ -236,16 +405,15 @@ def analyze_inter_agent_dynamics(response_text: str, other_agents_responses: Lis
 
 def analyze_engagement_metrics(response_text: str) -> Dict[str, Any]:
     """Analyze engagement metrics of the response"""
-    # Response length
-    response_length = len(response_text.split())
-    
+    hits = _find_keywords(response_text.lower(), RESPONSE_KEYWORDS)
+    return _engagement_from_hits(hits, len(response_text.split()), response_text.count("?"))
+
+def _engagement_from_hits(hits: set, response_length: int, questions: int) -> Dict[str, Any]:
     # Emotional intensity
-    emotional_words = ["love", "hate", "amazing", "terrible", "excited", "sad", "happy", "angry"]
-    emotional_intensity = sum(1 for word in emotional_words if word in response_text.lower()) / len(emotional_words)
+    emotional_intensity = sum(1 for word in EMOTIONAL_WORDS if word in hits) / len(EMOTIONAL_WORDS)
     
     # Interactivity level
-    questions = response_text.count("?")
-    call_to_action = any(word in response_text.lower() for word in ["try", "do", "make", "start", "begin"])
+    call_to_action = any(word in hits for word in CALL_TO_ACTION_WORDS)
     
     interactivity_level = min((questions * 0.3 + (1 if call_to_action else 0) * 0.7), 1.0)
     
@@ -257,76 +425,195 @@ def analyze_engagement_metrics(response_text: str) -> Dict[str, Any]:
         "call_to_action": call_to_action
     }
 
-def save_research_data(structured_responses: List[Dict], session_id: str, conversation_turn: int, response_times: List[float]) -> None:
-    """Save structured research data to file"""
-    research_data = {
-        "session_id": session_id,
-        "conversation_turn": conversation_turn,
-        "structured_responses": structured_responses,
-        "response_times": response_times,
-        "avg_response_time": sum(response_times) / len(response_times) if response_times else 0,
-        "total_responses": len(structured_responses),
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    with open(f"research_data_{session_id}.json", "w") as f:
-        json.dump(research_data, f, indent=2)
-    
-    print(f"📊 Research data saved to research_data_{session_id}.json")
+class StreamingResponseAnalyzer:
+    """Incrementally analyzes a response while it streams in
+    
+    Feed chunks as they arrive; results match the whole-text analyzers and are
+    available as soon as the last chunk has been fed. A tail of the previous
+    text is kept so keywords split across chunk boundaries are still found.
+    """
+    
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self._pending = set(RESPONSE_KEYWORDS) | set(_persona_keywords(agent_name))
+        self._carry_length = max(len(keyword) for keyword in self._pending) - 1
+        self._carry = ""
+        self._in_word = False
+        self.hits = set()
+        self.word_count = 0
+        self.question_count = 0
+    
+    def feed(self, chunk: str) -> None:
+        """Consume the next streamed chunk"""
+        if not chunk:
+            return
+        
+        # Only occurrences ending inside this chunk are new, and they start
+        # at most _carry_length characters before it
+        window = self._carry + chunk.lower()
+        if self._pending:
+            found = _find_keywords(window, self._pending)
+            if found:
+                self.hits |= found
+                self._pending -= found
+        self._carry = window[-self._carry_length:]
+        
+        # Count whitespace-separated words without double counting a word split across chunks
+        words = len(chunk.split())
+        if words and self._in_word and not chunk[0].isspace():
+            words -= 1
+        self.word_count += words
+        self._in_word = not chunk[-1].isspace()
+        
+        self.question_count += chunk.count("?")
+    
+    def text_analysis(self, persuasion_opportunities: Dict[str, bool]) -> Dict[str, Any]:
+        """Return the analyzer results for everything fed so far"""
+        return {
+            "persona_adherence": _persona_adherence_from_hits(self.agent_name, self.hits),
+            "persuasion_techniques": _persuasion_techniques_from_hits(self.hits),
+            "health_domains": _health_domains_from_hits(self.hits),
+            "user_as_persuader": _user_persuader_from_hits(self.hits, persuasion_opportunities),
+            "inter_agent_dynamics": _inter_agent_from_hits(self.hits),
+            "engagement_metrics": _engagement_from_hits(self.hits, self.word_count, self.question_count)
+        }
 
-def analyze_research_data(structured_responses: List[Dict], response_times: List[float], conversation_turn: int) -> Dict[str, Any]:
-    """Analyze collected research data"""
-    if not structured_responses:
-        return {"error": "No research data available"}
+def save_research_data(structured_responses: Iterable[Dict], session_id: str, conversation_turn: int, response_times: Iterable[float],
+                       sampling: Optional[Dict[str, Any]] = None, research_log: Optional[ResearchLogWriter] = None,
+                       metric_columns: Optional[MetricColumns] = None, research_store: Optional[ResearchStore] = None,
+                       research_catalog: Optional[ResearchCatalog] = None, rewrite_log: bool = False) -> List[str]:
+    """Save structured research data to file and return the paths written
+    
+    sampling describes how structured_responses were sampled (see utils.sampling);
+    response_times always covers every response.
+    
+    With a research_log the responses are already on disk, one line each, so
+    only a small summary record is appended instead of rewriting the file.
+    metric_columns, if given, appends its new rows to the .metrics sidecar;
+    research_store, if given, gets its pending responses and the session summary;
+    research_catalog, if given, gets an updated entry for this session.
+    
+    rewrite_log is for samplers that replace kept records (the reservoir):
+    nothing was appended when records were admitted, so the log, the
+    .metrics sidecar and the store rows are rewritten from
+    structured_responses, leaving out superseded records.
+    """
+    written = []
+    if research_store is not None:
+        if rewrite_log:
+            research_store.replace_session_responses(session_id, list(structured_responses))
+        research_store.save_session(session_id, conversation_turn, response_times, sampling)
+    if metric_columns is not None:
+        metrics_path = metrics_path_for(research_log.path if research_log else f"research_data_{session_id}.json")
+        if rewrite_log:
+            columns = MetricColumns()
+            for response in structured_responses:
+                columns.add(response)
+            temp_path = f"{metrics_path}.tmp"
+            open(temp_path, "wb").close()  # append_segment appends; start from an empty file
+            columns.append_segment(temp_path)
+            os.replace(temp_path, metrics_path)
+            written.append(metrics_path)
+        elif metric_columns.append_segment(metrics_path):
+            written.append(metrics_path)
+    
+    if research_log is not None:
+        summary = {
+            "session_id": session_id,
+            "conversation_turn": conversation_turn,
+            "response_count": len(response_times),
+            "avg_response_time": sum(response_times) / len(response_times) if response_times else 0,
+            "total_responses": len(structured_responses),
+            "timestamp": datetime.now().isoformat()
+        }
+        if sampling is not None:
+            summary["sampling"] = sampling
+        if rewrite_log:
+            research_log.rewrite(list(structured_responses), summary)
+        else:
+            research_log.write_summary(summary)
+        data_file = research_log.path
+    else:
+        data_file = f"research_data_{session_id}.json"
+        research_data = {
+            "session_id": session_id,
+            "conversation_turn": conversation_turn,
+            "structured_responses": list(structured_responses),
+            "response_times": list(response_times),
+            "avg_response_time": sum(response_times) / len(response_times) if response_times else 0,
+            "total_responses": len(structured_responses),
+            "timestamp": datetime.now().isoformat()
+        }
+        if sampling is not None:
+            research_data["sampling"] = sampling
+        
+        with open(data_file, "w") as f:
+            json.dump(research_data, f, indent=2)
+    
+    if research_catalog is not None:
+        research_catalog.update(summarize_session(structured_responses, session_id, conversation_turn, response_times, data_file))
+        written.append(research_catalog.path)
+    
+    print(f"📊 Research data saved to {data_file}")
+    return written + [data_file]
+
+def analyze_research_data(structured_responses: Iterable[Dict], response_times: Iterable[float], conversation_turn: int) -> Dict[str, Any]:
+    """Analyze collected research data
     
-    # Agent distribution
+    Makes a single pass over each input, so structured_responses and
+    response_times may be SpillingBuffers whose older records live on disk.
+    """
     agent_distribution = {}
+    adherence_totals = {}
+    domain_frequency = {}
+    technique_frequency = {}
+    total_responses = 0
+    total_interactivity = 0
+    total_emotional_intensity = 0
+    total_length = 0
     for response in structured_responses:
+        total_responses += 1
         agent = response["agent_name"]
         agent_distribution[agent] = agent_distribution.get(agent, 0) + 1
+        adherence_totals[agent] = adherence_totals.get(agent, 0) + response["persona_adherence"]["score"]
+        for domain in response["health_domains"]:
+            domain_frequency[domain] = domain_frequency.get(domain, 0) + 1
+        for technique in response["persuasion_techniques"]:
+            tech_name = technique["technique"]
+            technique_frequency[tech_name] = technique_frequency.get(tech_name, 0) + 1
+        engagement = response["engagement_metrics"]
+        total_interactivity += engagement["interactivity_level"]
+        total_emotional_intensity += engagement["emotional_intensity"]
+        total_length += engagement["response_length"]
+    
+    if not total_responses:
+        return {"error": "No research data available"}
     
     # Average persona adherence
-    persona_adherence_scores = {}
-    for agent in ["Momo", "Miles", "Lila"]:
-        agent_responses = [r for r in structured_responses if r["agent_name"] == agent]
-        if agent_responses:
-            avg_score = sum(r["persona_adherence"]["score"] for r in agent_responses) / len(agent_responses)
-            persona_adherence_scores[agent] = avg_score
-    
-    # Health domain coverage
-    all_domains = []
-    for response in structured_responses:
-        all_domains.extend(response["health_domains"])
-    domain_frequency = {}
-    for domain in all_domains:
-        domain_frequency[domain] = domain_frequency.get(domain, 0) + 1
-    
-    # Persuasion techniques used
-    all_techniques = []
-    for response in structured_responses:
-        all_techniques.extend(response["persuasion_techniques"])
-    technique_frequency = {}
-    for technique in all_techniques:
-        tech_name = technique["technique"]
-        technique_frequency[tech_name] = technique_frequency.get(tech_name, 0) + 1
+    persona_adherence_scores = {
+        agent: adherence_totals[agent] / agent_distribution[agent]
+        for agent in ["Momo", "Miles", "Lila"] if agent in agent_distribution
+    }
     
-    # Engagement metrics
-    avg_engagement = sum(r["engagement_metrics"]["interactivity_level"] for r in structured_responses) / len(structured_responses)
-    avg_emotional_intensity = sum(r["engagement_metrics"]["emotional_intensity"] for r in structured_responses) / len(structured_responses)
+    time_total = 0
+    time_count = 0
+    for response_time in response_times:
+        time_total += response_time
+        time_count += 1
     
     return {
-        "total_responses": len(structured_responses),
+        "total_responses": total_responses,
         "agent_distribution": agent_distribution,
         "persona_adherence_scores": persona_adherence_scores,
         "health_domain_coverage": domain_frequency,
         "persuasion_techniques_used": technique_frequency,
         "engagement_metrics": {
-            "avg_interactivity": avg_engagement,
-            "avg_emotional_intensity": avg_emotional_intensity,
-            "avg_response_length": sum(r["engagement_metrics"]["response_length"] for r in structured_responses) / len(structured_responses)
+            "avg_interactivity": total_interactivity / total_responses,
+            "avg_emotional_intensity": total_emotional_intensity / total_responses,
+            "avg_response_length": total_length / total_responses
         },
         "performance_metrics": {
-            "avg_response_time": sum(response_times) / len(response_times) if response_times else 0,
+            "avg_response_time": time_total / time_count if time_count else 0,
             "total_conversation_turns": conversation_turn
         }
-    } 
\ No newline at end of file
+    }
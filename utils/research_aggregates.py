@@ -0,0 +1,100 @@
+"""
+Research Aggregates
+Running totals of the research metrics, updated per response so summaries never rescan the data
+"""
+
+import threading
+from typing import Dict, Any
+
+PERSONA_AGENTS = ("Momo", "Miles", "Lila")
+
+class ResearchAggregates:
+    """Counts, sums and frequencies of every response seen this session
+
+    add() costs O(domains + techniques) of the one response, and result()
+    only touches the per-agent and per-label tables, so the research
+    summary stays cheap however long the session runs. Responses are
+    added before sampling, so the totals are exact even when only a
+    sample of structured responses is kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_responses = 0
+        self.agent_distribution = {}
+        self.adherence_totals = {}
+        self.domain_frequency = {}
+        self.technique_frequency = {}
+        self.total_interactivity = 0
+        self.total_emotional_intensity = 0
+        self.total_length = 0
+        self.time_total = 0
+        self.time_count = 0
+
+    def add(self, agent_name: str, analysis: Dict[str, Any], response_time: float) -> None:
+        """Count one response
+
+        analysis is a text analysis (see analyze_response_text) or a full
+        structured response; both carry the fields used here.
+        """
+        engagement = analysis["engagement_metrics"]
+        with self._lock:
+            self.total_responses += 1
+            self.agent_distribution[agent_name] = self.agent_distribution.get(agent_name, 0) + 1
+            self.adherence_totals[agent_name] = self.adherence_totals.get(agent_name, 0) + analysis["persona_adherence"]["score"]
+            for domain in analysis["health_domains"]:
+                self.domain_frequency[domain] = self.domain_frequency.get(domain, 0) + 1
+            for technique in analysis["persuasion_techniques"]:
+                tech_name = technique["technique"]
+                self.technique_frequency[tech_name] = self.technique_frequency.get(tech_name, 0) + 1
+            self.total_interactivity += engagement["interactivity_level"]
+            self.total_emotional_intensity += engagement["emotional_intensity"]
+            self.total_length += engagement["response_length"]
+            self.time_total += response_time
+            self.time_count += 1
+
+    def add_record(self, structured_response: Dict[str, Any]) -> None:
+        """Count a structured response, e.g. when rebuilding totals from a saved log"""
+        self.add(structured_response["agent_name"], structured_response, structured_response["response_time"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The raw totals, for persisting alongside a suspended session"""
+        with self._lock:
+            return {key: dict(value) if isinstance(value, dict) else value
+                    for key, value in vars(self).items() if not key.startswith("_")}
+
+    def from_dict(self, data: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, value in data.items():
+                if hasattr(self, key) and not key.startswith("_"):
+                    setattr(self, key, dict(value) if isinstance(value, dict) else value)
+
+    def agent_means(self) -> Dict[str, float]:
+        """Mean persona adherence score per agent"""
+        with self._lock:
+            return {agent: self.adherence_totals[agent] / count for agent, count in self.agent_distribution.items()}
+
+    def result(self, conversation_turn: int) -> Dict[str, Any]:
+        """The totals in the layout analyze_research_data returns"""
+        with self._lock:
+            if not self.total_responses:
+                return {"error": "No research data available"}
+            return {
+                "total_responses": self.total_responses,
+                "agent_distribution": dict(self.agent_distribution),
+                "persona_adherence_scores": {
+                    agent: self.adherence_totals[agent] / self.agent_distribution[agent]
+                    for agent in PERSONA_AGENTS if agent in self.agent_distribution
+                },
+                "health_domain_coverage": dict(self.domain_frequency),
+                "persuasion_techniques_used": dict(self.technique_frequency),
+                "engagement_metrics": {
+                    "avg_interactivity": self.total_interactivity / self.total_responses,
+                    "avg_emotional_intensity": self.total_emotional_intensity / self.total_responses,
+                    "avg_response_length": self.total_length / self.total_responses
+                },
+                "performance_metrics": {
+                    "avg_response_time": self.time_total / self.time_count if self.time_count else 0,
+                    "total_conversation_turns": conversation_turn
+                }
+            }
@@ -0,0 +1,192 @@
+"""
+Research Archive
+Chunk-compressed archive of structured responses with a footer index for selective reads
+"""
+
+import json
+import lzma
+import os
+import struct
+import zlib
+from typing import Dict, List, Any, Iterator, Optional
+
+from .background_writer import write_file_atomic
+from .research_log import load_research_file, write_research_log
+
+ARCHIVE_MAGIC = b"RCA1"
+# Footer trailer: index length (8 bytes, little-endian) followed by the magic
+_TRAILER = struct.Struct("<Q4s")
+
+CODECS = {
+    "zlib": (lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress),
+}
+
+class ResearchArchiveWriter:
+    """Writes structured responses into independently compressed chunks
+
+    Each chunk holds up to chunk_records records as compact JSON lines. The
+    footer index records every chunk's offset and size plus the agents and
+    timestamp range it covers, so readers can skip chunks a query cannot match.
+    """
+
+    def __init__(self, path: str, codec: str = "zlib", chunk_records: int = 256, level: Optional[int] = None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'. Choose one of: {', '.join(CODECS)}")
+        self.path = path
+        self.codec = codec
+        self.chunk_records = chunk_records
+        self.level = level
+        self.summary = {}
+        self._compress = CODECS[codec][0]
+        self._chunks = []
+        self._buffer = []
+        self._file = open(path, "wb")
+        self._file.write(ARCHIVE_MAGIC)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self.chunk_records:
+            self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+        compressed = self._compress(payload, self.level)
+        timestamps = [record.get("timestamp", "") for record in records]
+        agent_counts = {}
+        for record in records:
+            agent = record.get("agent_name", "")
+            agent_counts[agent] = agent_counts.get(agent, 0) + 1
+        self._chunks.append({
+            "offset": self._file.tell(),
+            "length": len(compressed),
+            "records": len(records),
+            "agents": agent_counts,
+            "time_min": min(timestamps),
+            "time_max": max(timestamps)
+        })
+        self._file.write(compressed)
+
+    def close(self) -> None:
+        """Write the last chunk and the footer index"""
+        self._write_chunk()
+        index = json.dumps({
+            "codec": self.codec,
+            "chunks": self._chunks,
+            "summary": self.summary
+        }, separators=(",", ":")).encode("utf-8")
+        self._file.write(index)
+        self._file.write(_TRAILER.pack(len(index), ARCHIVE_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> "ResearchArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+class ResearchArchive:
+    """Reads a research archive, decompressing only the chunks a query touches"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chunks_read = 0
+        self._file = open(path, "rb")
+        if self._file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a research archive")
+        self._file.seek(-_TRAILER.size, os.SEEK_END)
+        index_length, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} has no archive footer (was it closed?)")
+        self._file.seek(-_TRAILER.size - index_length, os.SEEK_END)
+        index = json.loads(self._file.read(index_length))
+        self.codec = index["codec"]
+        self.chunks = index["chunks"]
+        self.summary = index.get("summary", {})
+        self._decompress = CODECS[self.codec][1]
+
+    def __len__(self) -> int:
+        return sum(chunk["records"] for chunk in self.chunks)
+
+    def agents(self) -> Dict[str, int]:
+        """Record count per agent, from the footer index alone"""
+        counts = {}
+        for chunk in self.chunks:
+            for agent, count in chunk["agents"].items():
+                counts[agent] = counts.get(agent, 0) + count
+        return counts
+
+    def matching_chunks(self, agent_name: Optional[str] = None, since: Optional[str] = None,
+                        until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Chunks whose index entry could hold records matching the query"""
+        return [
+            chunk for chunk in self.chunks
+            if (agent_name is None or agent_name in chunk["agents"])
+            and (since is None or chunk["time_max"] >= since)
+            and (until is None or chunk["time_min"] <= until)
+        ]
+
+    def _read_chunk(self, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._file.seek(chunk["offset"])
+        payload = self._decompress(self._file.read(chunk["length"]))
+        self.chunks_read += 1
+        return [json.loads(line) for line in payload.splitlines()]
+
+    def query(self, agent_name: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield records matching the query; since/until are ISO timestamps, inclusive"""
+        for chunk in self.matching_chunks(agent_name, since, until):
+            for record in self._read_chunk(chunk):
+                if agent_name is not None and record.get("agent_name") != agent_name:
+                    continue
+                timestamp = record.get("timestamp", "")
+                if (since is not None and timestamp < since) or (until is not None and timestamp > until):
+                    continue
+                yield record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.query()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResearchArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def archive_research_file(source: str, destination: str, codec: str = "zlib", chunk_records: int = 256,
+                          data: Optional[Dict[str, Any]] = None) -> int:
+    """Convert a research .json/.jsonl file into an archive; returns the record count
+
+    data, if given, is source already loaded with load_research_file
+    (e.g. with invalid records removed).
+    """
+    if data is None:
+        data = load_research_file(source)
+    count = 0
+    with ResearchArchiveWriter(destination, codec=codec, chunk_records=chunk_records) as writer:
+        writer.summary = {key: value for key, value in data.items() if key != "structured_responses"}
+        for record in data["structured_responses"]:
+            writer.add(record)
+            count += 1
+    return count
+
+def extract_research_archive(source: str, destination: str) -> int:
+    """Convert an archive back into a .jsonl log or a legacy research_data .json file"""
+    with ResearchArchive(source) as archive:
+        records = list(archive)
+        summary = dict(archive.summary)
+    if destination.endswith(".jsonl"):
+        summary.pop("response_times", None)
+        write_research_log(destination, records, summary or None)
+    else:
+        research_data = dict(summary)
+        research_data["structured_responses"] = records
+        research_data.setdefault("response_times", [r.get("response_time", 0) for r in records])
+        write_file_atomic(destination, lambda f: json.dump(research_data, f, indent=2))
+    return len(records)
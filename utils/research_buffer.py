@@ -0,0 +1,147 @@
+"""
+Research Buffer
+Bounded in-memory buffer that spills older research records to disk
+"""
+
+import json
+import os
+import threading
+from itertools import islice
+from typing import Any, Iterator, List
+
+from .research_log import ResearchLogWriter, iter_research_log
+
+class SpillingBuffer:
+    """Append-only, list-like buffer holding at most capacity items in memory
+
+    When memory fills up, the older half is appended to a JSONL spill file.
+    len() and iteration cover spilled and in-memory items alike, oldest
+    first, so code written for a list of records (analyze_research_data,
+    save_research_data) reads the whole session without holding it in memory.
+    """
+
+    def __init__(self, path: str, capacity: int = 500):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.path = path
+        self.capacity = capacity
+        self._memory = []
+        self._spilled = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, item: Any) -> None:
+        with self._lock:
+            self._memory.append(item)
+            if len(self._memory) > self.capacity:
+                self._spill_locked(self.capacity // 2)
+
+    def _spill_locked(self, keep: int) -> None:
+        spill = self._memory[:len(self._memory) - keep]
+        self._memory = self._memory[len(spill):]
+        if self._file is None:
+            # A fresh buffer owns the file; a resumed one continues it
+            self._file = open(self.path, "a" if self._spilled else "w", encoding="utf-8")
+        self._file.write("".join(json.dumps(item, separators=(",", ":")) + "\n" for item in spill))
+        self._file.flush()
+        self._spilled += len(spill)
+
+    def spill_all(self) -> None:
+        """Move every in-memory item to the spill file, e.g. before the buffer is set aside"""
+        with self._lock:
+            if self._memory:
+                self._spill_locked(0)
+
+    def resume(self, spilled: int) -> None:
+        """Adopt the first spilled items already in the spill file (from an earlier spill_all)"""
+        with self._lock:
+            if self._spilled or self._memory:
+                raise ValueError("can only resume into an empty buffer")
+            self._spilled = spilled
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._memory)
+
+    def in_memory(self) -> int:
+        """Number of items currently held in memory"""
+        return len(self._memory)
+
+    def snapshot(self) -> "BufferSnapshot":
+        """A consistent, re-iterable view of the items appended so far"""
+        with self._lock:
+            return BufferSnapshot(self.path, self._spilled, list(self._memory))
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.snapshot())
+
+    def close(self, remove: bool = False) -> None:
+        """Close the spill file; remove it when the session's data is saved elsewhere"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if remove and os.path.exists(self.path):
+                os.remove(self.path)
+
+class BufferSnapshot:
+    """The first spilled lines of a spill file followed by a copy of the in-memory tail"""
+
+    def __init__(self, path: str, spilled: int, memory: List[Any]):
+        self.path = path
+        self.spilled = spilled
+        self.memory = memory
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.memory)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.spilled:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for _, line in zip(range(self.spilled), f):
+                    yield json.loads(line)
+        yield from self.memory
+
+class LogBackedBuffer(SpillingBuffer):
+    """SpillingBuffer whose items are the structured responses of a research log
+
+    append() writes each record to the log and keeps it in memory; when
+    memory fills up the older half is simply dropped, since the log
+    already holds it. Spilled records are read back from the log, so
+    nothing is written twice.
+    """
+
+    def __init__(self, research_log: ResearchLogWriter, capacity: int = 500):
+        super().__init__(research_log.path, capacity)
+        self.research_log = research_log
+
+    def append(self, item: Any) -> None:
+        # Under the buffer lock, so the log order always matches the buffer's
+        with self._lock:
+            self.research_log.append(item)
+            self._memory.append(item)
+            if len(self._memory) > self.capacity:
+                self._spill_locked(self.capacity // 2)
+
+    def _spill_locked(self, keep: int) -> None:
+        dropped = len(self._memory) - keep
+        self._memory = self._memory[dropped:]
+        self._spilled += dropped
+
+    def snapshot(self) -> "BufferSnapshot":
+        with self._lock:
+            return LogSnapshot(self.path, self._spilled, list(self._memory))
+
+    def close(self, remove: bool = False) -> None:
+        """Nothing to close: the research log belongs to the session and is never removed here"""
+
+class LogSnapshot(BufferSnapshot):
+    """The first spilled structured responses of a research log followed by a copy of the in-memory tail"""
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.spilled:
+            yield from islice(iter_research_log(self.path), self.spilled)
+        yield from self.memory
+
+def snapshot_records(records: Any) -> Any:
+    """Snapshot a SpillingBuffer, or copy a plain list, before handing it to another thread"""
+    return records.snapshot() if isinstance(records, SpillingBuffer) else list(records)
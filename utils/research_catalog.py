@@ -0,0 +1,127 @@
+"""
+Research Catalog
+Per-session summaries across every saved session, used to skip data files a query cannot match
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+from .research_log import write_research_log
+from .research_reader import LazyResearchReader
+
+def summarize_session(structured_responses: List[Dict], session_id: str, conversation_turn: int,
+                      response_times: List[float], data_file: str) -> Dict[str, Any]:
+    """Catalog entry for one session's research data"""
+    agent_distribution = {}
+    domains = set()
+    technique_counts = {}
+    corrections_per_agent = {}
+    timestamps = []
+    for response in structured_responses:
+        agent = response["agent_name"]
+        agent_distribution[agent] = agent_distribution.get(agent, 0) + 1
+        domains.update(response["health_domains"])
+        for technique in response["persuasion_techniques"]:
+            name = technique["technique"]
+            technique_counts[name] = technique_counts.get(name, 0) + 1
+        if response["inter_agent_dynamics"].get("correction_provided"):
+            corrections_per_agent[agent] = corrections_per_agent.get(agent, 0) + 1
+        timestamps.append(response["timestamp"])
+
+    return {
+        "session_id": session_id,
+        "data_file": data_file,
+        "conversation_turn": conversation_turn,
+        "response_count": len(response_times),
+        "record_count": len(structured_responses),
+        "agent_distribution": agent_distribution,
+        "domains": sorted(domains),
+        "technique_counts": technique_counts,
+        "corrections_per_agent": corrections_per_agent,
+        "time_min": min(timestamps) if timestamps else None,
+        "time_max": max(timestamps) if timestamps else None,
+        "updated_at": datetime.now().isoformat()
+    }
+
+class ResearchCatalog:
+    """Append-only catalog of session summaries; the latest entry for a session wins
+
+    Each save appends one compact line, so updating the catalog never
+    rewrites it; compact() drops superseded entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def update(self, entry: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Latest entry per session id"""
+        entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line
+                    entries[entry["session_id"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def compact(self) -> int:
+        """Rewrite the catalog with only the latest entry per session; returns the session count"""
+        entries = self.sessions()
+        write_research_log(self.path, list(entries.values()))
+        return len(entries)
+
+    def find_sessions(self, agent_name: Optional[str] = None, domain: Optional[str] = None,
+                      technique: Optional[str] = None, corrected_agent: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      min_turns: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries of sessions that can hold matching records
+
+        corrected_agent keeps sessions in which that agent made at least one
+        correction; since/until are ISO timestamps matched against the
+        session's time range.
+        """
+        matches = []
+        for entry in self.sessions().values():
+            if agent_name is not None and agent_name not in entry["agent_distribution"]:
+                continue
+            if domain is not None and domain not in entry["domains"]:
+                continue
+            if technique is not None and technique not in entry["technique_counts"]:
+                continue
+            if corrected_agent is not None and not entry["corrections_per_agent"].get(corrected_agent):
+                continue
+            if min_turns is not None and entry["conversation_turn"] < min_turns:
+                continue
+            if since is not None and (entry["time_max"] is None or entry["time_max"] < since):
+                continue
+            if until is not None and (entry["time_min"] is None or entry["time_min"] > until):
+                continue
+            matches.append(entry)
+        return matches
+
+    def data_path(self, entry: Dict[str, Any]) -> str:
+        """Path of a session's data file; relative paths are relative to the catalog"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.path)), entry["data_file"])
+
+    def iter_records(self, agent_name: Optional[str] = None, **session_filters: Any) -> Iterator[Dict[str, Any]]:
+        """Yield records of the sessions that pass the catalog filters
+
+        Only data files of matching sessions are opened, and within them only
+        agent_name's records are decoded.
+        """
+        for entry in self.find_sessions(agent_name=agent_name, **session_filters):
+            path = self.data_path(entry)
+            if not os.path.exists(path):
+                continue
+            with LazyResearchReader(path) as reader:
+                yield from reader.filter(agent_name)
@@ -0,0 +1,264 @@
+"""
+Research Metric Columns
+Columnar sidecar storage for the numeric metrics of structured responses
+"""
+
+import json
+import struct
+import sys
+import threading
+from array import array
+from datetime import datetime
+from itertools import compress
+from typing import Dict, List, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; array-module reductions are used without it
+    np = None
+
+SEGMENT_MAGIC = b"RMC1"
+
+# (column name, array typecode); codes index the dictionaries below
+NUMERIC_COLUMNS = (
+    ("agent", "B"),
+    ("timestamp", "d"),
+    ("response_time", "d"),
+    ("persona_adherence", "d"),
+    ("response_length", "d"),
+    ("emotional_intensity", "d"),
+    ("interactivity_level", "d"),
+    ("domain_count", "B"),
+    ("technique_count", "B"),
+)
+# Multi-valued columns: one code per value, split into rows by the *_count columns
+CODE_COLUMNS = (
+    ("domain_codes", "B"),
+    ("technique_codes", "B"),
+)
+
+class _Dictionary:
+    """Append-only string dictionary; a value's code never changes once assigned"""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values = []
+        self._codes = {}
+        for value in values or []:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code > 255:
+                raise ValueError(f"Too many distinct values for a one-byte dictionary code: {value!r}")
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+class MetricColumns:
+    """Typed array columns for the numeric fields of structured responses
+
+    Agent names, health domains and technique names are dictionary-encoded
+    into one-byte codes, so per-agent means and frequency counts are
+    reductions over flat arrays instead of walks over nested dicts. Rows
+    added since the last write are appended to the sidecar file as one
+    segment, so saving never rewrites earlier data, and are then dropped
+    from memory: a live session's instance only holds unwritten rows,
+    and reductions over a whole session run on load() of its sidecar.
+    """
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS + CODE_COLUMNS}
+        self.agents = _Dictionary()
+        self.domains = _Dictionary()
+        self.techniques = _Dictionary()
+        # Leading rows already in the sidecar; only non-zero for an instance from load()
+        self._written_rows = 0
+        self._written_codes = {name: 0 for name, _ in CODE_COLUMNS}
+        # add() runs on the analysis worker while saves may run on the writer thread
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.columns["agent"])
+
+    def dictionaries(self) -> Dict[str, List[str]]:
+        """Values of the agent, domain and technique dictionaries, in code order"""
+        with self._lock:
+            return {name: list(getattr(self, name).values) for name in ("agents", "domains", "techniques")}
+
+    def restore_dictionaries(self, dictionaries: Dict[str, List[str]]) -> None:
+        """Keep the codes of an earlier instance, so new segments extend the same sidecar file consistently"""
+        with self._lock:
+            for name, values in dictionaries.items():
+                setattr(self, name, _Dictionary(values))
+
+    def add(self, structured_response: Dict[str, Any]) -> None:
+        """Append the numeric metrics of one structured response"""
+        with self._lock:
+            self._add_locked(structured_response)
+
+    def _add_locked(self, structured_response: Dict[str, Any]) -> None:
+        columns = self.columns
+        engagement = structured_response["engagement_metrics"]
+        domains = structured_response["health_domains"]
+        techniques = structured_response["persuasion_techniques"]
+
+        columns["agent"].append(self.agents.code(structured_response["agent_name"]))
+        columns["timestamp"].append(datetime.fromisoformat(structured_response["timestamp"]).timestamp())
+        columns["response_time"].append(structured_response["response_time"])
+        columns["persona_adherence"].append(structured_response["persona_adherence"]["score"])
+        columns["response_length"].append(engagement["response_length"])
+        columns["emotional_intensity"].append(engagement["emotional_intensity"])
+        columns["interactivity_level"].append(engagement["interactivity_level"])
+        columns["domain_count"].append(len(domains))
+        columns["technique_count"].append(len(techniques))
+        columns["domain_codes"].extend(self.domains.code(domain) for domain in domains)
+        columns["technique_codes"].extend(self.techniques.code(t["technique"]) for t in techniques)
+
+    # Reductions
+
+    def _code_counts(self, column: str, dictionary: _Dictionary) -> Dict[str, int]:
+        codes = self.columns[column]
+        if np is not None:
+            counts = np.bincount(np.frombuffer(codes, dtype=np.uint8), minlength=len(dictionary.values)).tolist()
+        else:
+            data = codes.tobytes()
+            counts = [data.count(bytes((code,))) for code in range(len(dictionary.values))]
+        return {value: count for value, count in zip(dictionary.values, counts) if count}
+
+    def agent_distribution(self) -> Dict[str, int]:
+        return self._code_counts("agent", self.agents)
+
+    def domain_frequency(self) -> Dict[str, int]:
+        return self._code_counts("domain_codes", self.domains)
+
+    def technique_frequency(self) -> Dict[str, int]:
+        return self._code_counts("technique_codes", self.techniques)
+
+    def mean(self, column: str) -> float:
+        values = self.columns[column]
+        if not values:
+            return 0
+        if np is not None:
+            return float(np.frombuffer(values, dtype=values.typecode).mean())
+        return sum(values) / len(values)
+
+    def agent_means(self, column: str) -> Dict[str, float]:
+        """Mean of a numeric column per agent"""
+        agent_codes = self.columns["agent"]
+        values = self.columns[column]
+        if np is not None:
+            codes = np.frombuffer(agent_codes, dtype=np.uint8)
+            counts = np.bincount(codes, minlength=len(self.agents.values))
+            sums = np.bincount(codes, weights=np.frombuffer(values, dtype=np.float64), minlength=len(self.agents.values))
+            return {agent: float(sums[code] / counts[code]) for code, agent in enumerate(self.agents.values) if counts[code]}
+        means = {}
+        for code, agent in enumerate(self.agents.values):
+            selected = list(compress(values, map(code.__eq__, agent_codes)))
+            if selected:
+                means[agent] = sum(selected) / len(selected)
+        return means
+
+    def summarize(self, response_times: Optional[List[float]] = None, conversation_turn: int = 0) -> Dict[str, Any]:
+        """The analyze_research_data result, computed from the columns
+
+        Without response_times (e.g. for a loaded sidecar) the average
+        covers the response_time column, i.e. the kept responses only.
+        """
+        if not len(self):
+            return {"error": "No research data available"}
+        return {
+            "total_responses": len(self),
+            "agent_distribution": self.agent_distribution(),
+            "persona_adherence_scores": self.agent_means("persona_adherence"),
+            "health_domain_coverage": self.domain_frequency(),
+            "persuasion_techniques_used": self.technique_frequency(),
+            "engagement_metrics": {
+                "avg_interactivity": self.mean("interactivity_level"),
+                "avg_emotional_intensity": self.mean("emotional_intensity"),
+                "avg_response_length": self.mean("response_length")
+            },
+            "performance_metrics": {
+                "avg_response_time": (
+                    self.mean("response_time") if response_times is None
+                    else sum(response_times) / len(response_times) if response_times else 0
+                ),
+                "total_conversation_turns": conversation_turn
+            }
+        }
+
+    # Storage
+
+    def append_segment(self, path: str) -> int:
+        """Append the rows added since the last write as one segment; returns the row count written"""
+        with self._lock:
+            rows = len(self) - self._written_rows
+            if rows <= 0:
+                return 0
+
+            segment = []
+            layout = []
+            for name, typecode in NUMERIC_COLUMNS:
+                data = self.columns[name][self._written_rows:].tobytes()
+                layout.append([name, typecode, len(data)])
+                segment.append(data)
+            for name, typecode in CODE_COLUMNS:
+                data = self.columns[name][self._written_codes[name]:].tobytes()
+                layout.append([name, typecode, len(data)])
+                segment.append(data)
+
+            header = json.dumps({
+                "rows": rows,
+                "byteorder": sys.byteorder,
+                # Dictionaries are cumulative, so the last segment's copy decodes every segment
+                "agents": self.agents.values,
+                "domains": self.domains.values,
+                "techniques": self.techniques.values,
+                "columns": layout
+            }, separators=(",", ":")).encode("utf-8")
+
+            # Written rows live in the sidecar now; only the dictionaries are kept
+            self.columns = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS + CODE_COLUMNS}
+            self._written_rows = 0
+            self._written_codes = {name: 0 for name, _ in CODE_COLUMNS}
+
+        with open(path, "ab") as f:
+            f.write(SEGMENT_MAGIC + struct.pack("<I", len(header)) + header)
+            for data in segment:
+                f.write(data)
+        return rows
+
+    @classmethod
+    def load(cls, path: str) -> "MetricColumns":
+        """Read every segment of a sidecar file"""
+        metrics = cls()
+        with open(path, "rb") as f:
+            while True:
+                prefix = f.read(8)
+                if len(prefix) < 8:
+                    break
+                if prefix[:4] != SEGMENT_MAGIC:
+                    raise ValueError(f"{path} is not a research metrics file")
+                (header_length,) = struct.unpack("<I", prefix[4:])
+                header = json.loads(f.read(header_length))
+                for name, typecode, length in header["columns"]:
+                    values = array(typecode)
+                    values.frombytes(f.read(length))
+                    if header["byteorder"] != sys.byteorder:
+                        values.byteswap()
+                    if name in metrics.columns:
+                        metrics.columns[name].extend(values)
+                metrics.agents = _Dictionary(header["agents"])
+                metrics.domains = _Dictionary(header["domains"])
+                metrics.techniques = _Dictionary(header["techniques"])
+
+        metrics._written_rows = len(metrics)
+        for name, _ in CODE_COLUMNS:
+            metrics._written_codes[name] = len(metrics.columns[name])
+        return metrics
+
+def metrics_path_for(research_path: str) -> str:
+    """Sidecar path next to a research_data_<session>.json/.jsonl file"""
+    base = research_path.rsplit(".", 1)[0] if research_path.endswith((".json", ".jsonl")) else research_path
+    return f"{base}.metrics"
@@ -0,0 +1,123 @@
+"""
+Research Log
+Append-only, line-delimited JSON storage for structured responses
+"""
+
+import json
+import threading
+from typing import Dict, List, Any, Iterator, Optional
+
+from .background_writer import write_file_atomic
+
+SUMMARY_RECORD_TYPE = "session_summary"
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"))
+
+class ResearchLogWriter:
+    """Appends each structured response to a JSONL file as soon as it is produced
+
+    Every line is one compact JSON record, so a crash loses at most the line
+    being written. save_research_data appends a small summary record at the
+    end; a log may hold several summaries and the last one wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records_written = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one structured response"""
+        self._write_line(_dumps(record))
+        self.records_written += 1
+
+    def write_summary(self, summary: Dict[str, Any]) -> None:
+        """Append a trailing session summary record"""
+        self._write_line(_dumps({"record_type": SUMMARY_RECORD_TYPE, **summary}))
+
+    def _write_line(self, line: str) -> None:
+        with self._lock:
+            if self._file is None:
+                # Opened lazily so sessions without research data leave no file behind
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def rewrite(self, records: List[Dict[str, Any]], summary: Optional[Dict[str, Any]] = None) -> None:
+        """Replace the whole log with records and a summary, e.g. when earlier records were superseded"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            write_research_log(self.path, records, summary)
+            self.records_written = len(records)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def is_summary_record(record: Dict[str, Any]) -> bool:
+    return record.get("record_type") == SUMMARY_RECORD_TYPE
+
+def iter_research_log(path: str, include_summaries: bool = False) -> Iterator[Dict[str, Any]]:
+    """Stream records from a research log line by line
+
+    A torn final line (from a crash mid-write) is skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if include_summaries or not is_summary_record(record):
+                yield record
+
+def read_research_log_summary(path: str) -> Optional[Dict[str, Any]]:
+    """Return the last summary record of a log, or None if it has none"""
+    summary = None
+    for record in iter_research_log(path, include_summaries=True):
+        if is_summary_record(record):
+            summary = record
+    return summary
+
+def write_research_log(path: str, records: List[Dict[str, Any]], summary: Optional[Dict[str, Any]] = None) -> None:
+    """Rewrite a whole log atomically (used by offline tools, not during a session)"""
+    def write(f):
+        for record in records:
+            f.write(_dumps(record) + "\n")
+        if summary is not None:
+            f.write(_dumps({"record_type": SUMMARY_RECORD_TYPE, **summary}) + "\n")
+    write_file_atomic(path, write)
+
+def load_research_file(path: str) -> Dict[str, Any]:
+    """Load a research file in either format into the legacy research_data layout
+
+    Legacy research_data_<session>.json files are returned as saved; for
+    plain response lists and JSONL logs the session fields are filled in
+    from the summary record or the responses themselves.
+    """
+    if path.endswith(".jsonl"):
+        summary = None
+        responses = []
+        for record in iter_research_log(path, include_summaries=True):
+            if is_summary_record(record):
+                summary = record
+            else:
+                responses.append(record)
+        data = {key: value for key, value in (summary or {}).items() if key != "record_type"}
+        data["structured_responses"] = responses
+        data.setdefault("response_times", [r.get("response_time", 0) for r in responses])
+        return data
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {"structured_responses": data, "response_times": [r.get("response_time", 0) for r in data]}
+    return data
@@ -0,0 +1,184 @@
+"""
+Research Reader
+Lazy, memory-mapped random access to saved structured responses
+"""
+
+import json
+import mmap
+import re
+from array import array
+from typing import Dict, List, Any, Iterator, Optional, Union
+
+from .research_log import SUMMARY_RECORD_TYPE
+
+_SUMMARY_MARKER = b'"record_type":"' + SUMMARY_RECORD_TYPE.encode("utf-8") + b'"'
+_AGENT_NAME = re.compile(rb'"agent_name":\s*"((?:[^"\\]|\\.)*)"')
+_RESPONSES_KEY = re.compile(rb'"structured_responses":\s*\[')
+_LIST_START = re.compile(rb'\s*\[')
+_INDENTED_RECORD = re.compile(rb'[ \t\r]*\n( +)\{')
+# JSON strings are matched whole, so brackets inside response text are skipped
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+class LazyResearchReader:
+    """Indexes a research file once and decodes records only when they are accessed
+
+    Works on research_data_<session>.jsonl logs (one record per line),
+    legacy research_data_<session>.json files and plain response lists.
+    The file is memory-mapped; the index holds only byte offsets and
+    agent names, so opening a large file costs a scan, not a full parse.
+
+    Supports len(), indexing, slicing, iteration and filtering by agent.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._starts = array("q")
+        self._ends = array("q")
+        self._agent_codes = array("B")
+        self._agents = []
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self._map = b""
+        if path.endswith(".jsonl"):
+            self._index_lines()
+        else:
+            self._index_json_array()
+
+    # Index building
+
+    def _add_span(self, start: int, end: int) -> None:
+        match = _AGENT_NAME.search(self._map, start, end)
+        agent = json.loads(match.group(0).split(b":", 1)[1]) if match else ""
+        if agent not in self._agents:
+            self._agents.append(agent)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._agent_codes.append(self._agents.index(agent))
+
+    def _index_lines(self) -> None:
+        data = self._map
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = size  # Last line without a newline, possibly torn by a crash
+            line = data[start:end]
+            if line.strip() and _SUMMARY_MARKER not in line:
+                if end < size or self._is_complete(line):
+                    self._add_span(start, end)
+            start = end + 1
+
+    @staticmethod
+    def _is_complete(line: bytes) -> bool:
+        try:
+            json.loads(line)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def _index_json_array(self) -> None:
+        data = self._map
+        match = _RESPONSES_KEY.search(data)
+        if not match:
+            match = _LIST_START.match(data)  # A plain response list
+            if not match:
+                return
+        position = match.end()
+
+        indented = _INDENTED_RECORD.match(data, position)
+        if indented:
+            self._index_indented(position, indented.group(1))
+            return
+
+        depth = 0
+        record_start = None
+        for token in _JSON_TOKEN.finditer(data, position):
+            char = token.group(0)[:1]
+            if char == b'"':
+                continue
+            if char in (b"{", b"["):
+                if depth == 0:
+                    record_start = token.start()
+                depth += 1
+            else:
+                if depth == 0:
+                    return  # Closing bracket of the response array
+                depth -= 1
+                if depth == 0:
+                    self._add_span(record_start, token.end())
+
+    def _index_indented(self, position: int, indent: bytes) -> None:
+        # json.dump(indent=...) escapes newlines inside strings, so a newline
+        # followed by exactly the element indent and a brace is always structural
+        open_marker = b"\n" + indent + b"{"
+        close_marker = b"\n" + indent + b"}"
+        next_marker = b"," + open_marker
+        data = self._map
+        while True:
+            if data[position:position + len(open_marker)] == open_marker:
+                start = position + len(open_marker) - 1
+            elif data[position:position + len(next_marker)] == next_marker:
+                start = position + len(next_marker) - 1
+            else:
+                return
+            end = data.find(close_marker, start)
+            if end == -1:
+                return
+            end += len(close_marker)
+            self._add_span(start, end)
+            position = end
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _decode(self, position: int) -> Dict[str, Any]:
+        return json.loads(self._map[self._starts[position]:self._ends[position]])
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(key, slice):
+            return [self._decode(position) for position in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("research record index out of range")
+        return self._decode(key)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self)):
+            yield self._decode(position)
+
+    def agents(self) -> Dict[str, int]:
+        """Record count per agent, from the index alone"""
+        data = self._agent_codes.tobytes()
+        return {agent: data.count(bytes((code,))) for code, agent in enumerate(self._agents)}
+
+    def positions_for(self, agent_name: str) -> List[int]:
+        """Record positions of one agent, from the index alone"""
+        if agent_name not in self._agents:
+            return []
+        code = self._agents.index(agent_name)
+        return [position for position, agent_code in enumerate(self._agent_codes) if agent_code == code]
+
+    def filter(self, agent_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Decode only the records of agent_name (all records when None)"""
+        if agent_name is None:
+            yield from self
+            return
+        for position in self.positions_for(agent_name):
+            yield self._decode(position)
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "LazyResearchReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
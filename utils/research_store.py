@@ -0,0 +1,265 @@
+"""
+Research Store
+Optional SQLite database of structured responses and sessions across runs
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    conversation_turn INTEGER NOT NULL DEFAULT 0,
+    response_count INTEGER NOT NULL DEFAULT 0,
+    avg_response_time REAL NOT NULL DEFAULT 0,
+    sampling TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    response_id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    agent_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    response_time REAL NOT NULL,
+    persona_adherence REAL NOT NULL,
+    emotional_intensity REAL NOT NULL,
+    interactivity_level REAL NOT NULL,
+    response_length INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    record_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS response_domains (
+    response_id INTEGER NOT NULL REFERENCES responses(response_id),
+    domain TEXT NOT NULL
+);
+-- A response is identified by its session and content, so importing a file twice adds nothing
+CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_unique ON responses(session_id, record_hash);
+CREATE INDEX IF NOT EXISTS idx_responses_session ON responses(session_id);
+CREATE INDEX IF NOT EXISTS idx_responses_agent_time ON responses(agent_name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_responses_time ON responses(timestamp);
+CREATE INDEX IF NOT EXISTS idx_response_domains_domain ON response_domains(domain, response_id);
+CREATE INDEX IF NOT EXISTS idx_response_domains_response ON response_domains(response_id);
+"""
+
+# Numeric response columns that can be averaged, and the groupings average_metric supports
+METRIC_COLUMNS = ("response_time", "persona_adherence", "emotional_intensity", "interactivity_level", "response_length")
+GROUP_COLUMNS = {
+    "agent": "r.agent_name",
+    "session": "r.session_id",
+    "domain": "d.domain",
+    "day": "substr(r.timestamp, 1, 10)",
+}
+
+class ResearchStore:
+    """SQLite store for structured responses, indexed by session, agent, time and health domain
+
+    Responses are buffered and inserted batch_size at a time inside one
+    transaction; flush() or save_session() writes whatever is pending.
+    A response already stored for its session (same content) is skipped
+    and counted in duplicates_skipped.
+    The connection is shared between the analysis worker and the main
+    thread, so every use goes through a lock.
+    """
+
+    def __init__(self, path: str, batch_size: int = 50):
+        self.path = path
+        self.batch_size = batch_size
+        self.duplicates_skipped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def add(self, session_id: str, structured_response: Dict[str, Any]) -> None:
+        """Queue one structured response, inserting the batch once it is full"""
+        with self._lock:
+            self._pending.append((session_id, structured_response))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def add_many(self, session_id: str, structured_responses: List[Dict[str, Any]]) -> int:
+        """Insert a whole list of responses in one transaction; returns how many were already stored"""
+        with self._lock:
+            skipped = self.duplicates_skipped
+            self._pending.extend((session_id, response) for response in structured_responses)
+            self._flush_locked()
+            return self.duplicates_skipped - skipped
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        with self._conn:
+            self._insert(self._conn.cursor(), batch)
+
+    def _insert(self, cursor: sqlite3.Cursor, batch: List[tuple]) -> None:
+        for session_id, response in batch:
+            engagement = response["engagement_metrics"]
+            # Sorted keys, so the same response hashes the same whichever file it came from
+            record = json.dumps(response, sort_keys=True, separators=(",", ":"))
+            cursor.execute(
+                "INSERT OR IGNORE INTO responses (session_id, agent_name, timestamp, response_time, persona_adherence,"
+                " emotional_intensity, interactivity_level, response_length, record, record_hash)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session_id,
+                    response["agent_name"],
+                    response["timestamp"],
+                    response["response_time"],
+                    response["persona_adherence"]["score"],
+                    engagement["emotional_intensity"],
+                    engagement["interactivity_level"],
+                    engagement["response_length"],
+                    record,
+                    hashlib.sha256(record.encode("utf-8")).hexdigest()
+                )
+            )
+            if not cursor.rowcount:
+                self.duplicates_skipped += 1
+                continue
+            response_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO response_domains (response_id, domain) VALUES (?, ?)",
+                [(response_id, domain) for domain in response["health_domains"]]
+            )
+
+    def replace_session_responses(self, session_id: str, structured_responses: List[Dict[str, Any]]) -> None:
+        """Replace every stored response of a session in one transaction, e.g. with a reservoir's contents"""
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                cursor = self._conn.cursor()
+                cursor.execute(
+                    "DELETE FROM response_domains WHERE response_id IN"
+                    " (SELECT response_id FROM responses WHERE session_id = ?)",
+                    (session_id,)
+                )
+                cursor.execute("DELETE FROM responses WHERE session_id = ?", (session_id,))
+                self._insert(cursor, [(session_id, response) for response in structured_responses])
+
+    def save_session(self, session_id: str, conversation_turn: int, response_times: List[float],
+                     sampling: Optional[Dict[str, Any]] = None) -> None:
+        """Write pending responses and upsert the session summary in one transaction"""
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, conversation_turn, response_count, avg_response_time, sampling, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(session_id) DO UPDATE SET conversation_turn = excluded.conversation_turn,"
+                    " response_count = excluded.response_count, avg_response_time = excluded.avg_response_time,"
+                    " sampling = excluded.sampling, updated_at = excluded.updated_at",
+                    (
+                        session_id,
+                        conversation_turn,
+                        len(response_times),
+                        sum(response_times) / len(response_times) if response_times else 0,
+                        json.dumps(sampling) if sampling is not None else None,
+                        datetime.now().isoformat()
+                    )
+                )
+
+    def _where(self, session_id: Optional[str], agent_name: Optional[str], since: Optional[str],
+               domain: Optional[str]) -> tuple:
+        clauses = []
+        params = []
+        if session_id is not None:
+            clauses.append("r.session_id = ?")
+            params.append(session_id)
+        if agent_name is not None:
+            clauses.append("r.agent_name = ?")
+            params.append(agent_name)
+        if since is not None:
+            # ISO timestamps sort lexicographically, so the (agent_name, timestamp) index applies
+            clauses.append("r.timestamp >= ?")
+            params.append(since)
+        if domain is not None:
+            clauses.append("r.response_id IN (SELECT response_id FROM response_domains WHERE domain = ?)")
+            params.append(domain)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def average_metric(self, metric: str = "persona_adherence", agent_name: Optional[str] = None,
+                       session_id: Optional[str] = None, days: Optional[float] = None,
+                       domain: Optional[str] = None, group_by: Optional[str] = None) -> Dict[str, Any]:
+        """Average a response metric, optionally filtered and grouped
+
+        Example: average_metric("persona_adherence", agent_name="Lila", days=30, group_by="domain")
+        gives Lila's average adherence per health domain over the last 30 days.
+
+        Returns:
+            {group: {"avg": float, "count": int}}, keyed by "all" when group_by is None
+        """
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric '{metric}'. Choose one of: {', '.join(METRIC_COLUMNS)}")
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown grouping '{group_by}'. Choose one of: {', '.join(GROUP_COLUMNS)}")
+
+        since = (datetime.now() - timedelta(days=days)).isoformat() if days is not None else None
+        where, params = self._where(session_id, agent_name, since, domain)
+        group_expr = GROUP_COLUMNS[group_by] if group_by else "'all'"
+        join = " JOIN response_domains d ON d.response_id = r.response_id" if group_by == "domain" else ""
+        query = (f"SELECT {group_expr}, AVG(r.{metric}), COUNT(*) FROM responses r{join}{where}"
+                 f" GROUP BY 1 ORDER BY 1")
+
+        with self._lock:
+            self._flush_locked()
+            return {
+                group: {"avg": avg, "count": count}
+                for group, avg, count in self._conn.execute(query, params) if count
+            }
+
+    def iter_responses(self, session_id: Optional[str] = None, agent_name: Optional[str] = None,
+                       days: Optional[float] = None, domain: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield stored structured responses in insertion order
+
+        Rows are read from the cursor batch_size at a time, so memory stays
+        flat however many responses match.
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat() if days is not None else None
+        where, params = self._where(session_id, agent_name, since, domain)
+        with self._lock:
+            self._flush_locked()
+            cursor = self._conn.execute(f"SELECT r.record FROM responses r{where} ORDER BY r.response_id", params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for (record,) in rows:
+                    yield json.loads(record)
+        finally:
+            cursor.close()
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """Stored session summaries, most recently updated first"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT session_id, conversation_turn, response_count, avg_response_time, sampling, updated_at"
+                " FROM sessions ORDER BY updated_at DESC"
+            )
+            return [
+                {
+                    "session_id": session_id,
+                    "conversation_turn": conversation_turn,
+                    "response_count": response_count,
+                    "avg_response_time": avg_response_time,
+                    "sampling": json.loads(sampling) if sampling else None,
+                    "updated_at": updated_at
+                }
+                for session_id, conversation_turn, response_count, avg_response_time, sampling, updated_at in cursor
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
@@ -0,0 +1,167 @@
+"""
+Research Sampling
+Decides which structured responses are kept in full during production capture
+"""
+
+import hashlib
+import random
+from typing import Callable, Dict, List, Any, Optional
+
+SAMPLING_POLICIES = ("all", "fixed_rate", "session", "reservoir")
+
+class ResearchSampler:
+    """Keeps every response; base class for the sampling policies
+
+    Samplers count every response offered per agent, whether or not it is
+    kept, so counts stay exact and analysis can reweight sampled records.
+    """
+
+    policy = "all"
+
+    def __init__(self):
+        self.seen_per_agent = {}
+        self.kept_per_agent = {}
+
+    def add(self, agent_name: str, build_record: Callable[[], Dict[str, Any]], records: List[Dict[str, Any]]) -> bool:
+        """Offer one response; build_record is only called when the response is kept
+
+        build_record returns None for a record that was rejected (e.g. it
+        failed validation); that response then counts as seen but not kept.
+
+        Returns:
+            True if the record was stored in records
+        """
+        self.seen_per_agent[agent_name] = self.seen_per_agent.get(agent_name, 0) + 1
+        if not self._admit(agent_name):
+            return False
+        record = build_record()
+        if record is None:
+            return False
+        records.append(record)
+        self.kept_per_agent[agent_name] = self.kept_per_agent.get(agent_name, 0) + 1
+        return True
+
+    def _admit(self, agent_name: str) -> bool:
+        return True
+
+    def nominal_rate(self) -> float:
+        return 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counters needed to resume sampling, e.g. after a session is evicted"""
+        return {
+            "seen_per_agent": dict(self.seen_per_agent),
+            "kept_per_agent": dict(self.kept_per_agent)
+        }
+
+    def from_dict(self, data: Dict[str, Any]) -> None:
+        self.seen_per_agent = dict(data.get("seen_per_agent", {}))
+        self.kept_per_agent = dict(data.get("kept_per_agent", {}))
+
+    def metadata(self) -> Dict[str, Any]:
+        """Sampling description saved alongside research data for reweighting"""
+        return {
+            "policy": self.policy,
+            "rate": self.nominal_rate(),
+            "seen_per_agent": dict(self.seen_per_agent),
+            "kept_per_agent": dict(self.kept_per_agent),
+            "effective_rate_per_agent": {
+                agent: self.kept_per_agent.get(agent, 0) / seen
+                for agent, seen in self.seen_per_agent.items()
+            }
+        }
+
+class FixedRateSampler(ResearchSampler):
+    """Keeps each response independently with probability rate"""
+
+    policy = "fixed_rate"
+
+    def __init__(self, rate: float, rng: Optional[random.Random] = None):
+        super().__init__()
+        self.rate = rate
+        self._rng = rng or random.Random()
+
+    def _admit(self, agent_name: str) -> bool:
+        return self._rng.random() < self.rate
+
+    def nominal_rate(self) -> float:
+        return self.rate
+
+class SessionSampler(ResearchSampler):
+    """Keeps all or none of a session's responses, decided once from the session id"""
+
+    policy = "session"
+
+    def __init__(self, rate: float, session_id: str):
+        super().__init__()
+        self.rate = rate
+        # Hash-based so the same session id always gets the same decision
+        digest = hashlib.sha256(session_id.encode("utf-8")).digest()
+        self.session_selected = int.from_bytes(digest[:8], "big") / 2 ** 64 < rate
+
+    def _admit(self, agent_name: str) -> bool:
+        return self.session_selected
+
+    def nominal_rate(self) -> float:
+        return self.rate
+
+class ReservoirSampler(ResearchSampler):
+    """Keeps a uniform random sample of at most reservoir_size responses per agent"""
+
+    policy = "reservoir"
+
+    def __init__(self, reservoir_size: int, rng: Optional[random.Random] = None):
+        super().__init__()
+        self.reservoir_size = reservoir_size
+        self._rng = rng or random.Random()
+        self._slots = {}  # agent -> positions of that agent's records in the records list
+
+    def add(self, agent_name: str, build_record: Callable[[], Dict[str, Any]], records: List[Dict[str, Any]]) -> bool:
+        seen = self.seen_per_agent.get(agent_name, 0) + 1
+        self.seen_per_agent[agent_name] = seen
+        slots = self._slots.setdefault(agent_name, [])
+
+        if len(slots) < self.reservoir_size:
+            record = build_record()
+            if record is None:
+                return False
+            slots.append(len(records))
+            records.append(record)
+            self.kept_per_agent[agent_name] = len(slots)
+            return True
+
+        # Algorithm R: the n-th response replaces a random slot with probability k/n
+        slot = self._rng.randrange(seen)
+        if slot >= self.reservoir_size:
+            return False
+        record = build_record()
+        if record is None:
+            return False
+        records[slots[slot]] = record
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data["slots"] = {agent: list(slots) for agent, slots in self._slots.items()}
+        return data
+
+    def from_dict(self, data: Dict[str, Any]) -> None:
+        super().from_dict(data)
+        self._slots = {agent: list(slots) for agent, slots in data.get("slots", {}).items()}
+
+    def nominal_rate(self) -> float:
+        seen = sum(self.seen_per_agent.values())
+        return sum(self.kept_per_agent.values()) / seen if seen else 1.0
+
+def create_sampler(policy: str = "all", rate: float = 1.0, reservoir_size: int = 200,
+                   session_id: str = "") -> ResearchSampler:
+    """Create the sampler for a research sampling policy"""
+    if policy == "all":
+        return ResearchSampler()
+    if policy == "fixed_rate":
+        return FixedRateSampler(rate)
+    if policy == "session":
+        return SessionSampler(rate, session_id)
+    if policy == "reservoir":
+        return ReservoirSampler(reservoir_size)
+    raise ValueError(f"Unknown research sampling policy '{policy}'. Choose one of: {', '.join(SAMPLING_POLICIES)}")
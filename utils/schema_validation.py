@@ -0,0 +1,140 @@
+"""
+Schema Validation
+Compiles a JSON-schema subset into a plain Python validator, and quarantines rejected records
+"""
+
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable
+
+def _is_datetime(value: Any) -> bool:
+    try:
+        datetime.fromisoformat(value)
+    except (TypeError, ValueError):  # TypeError: not a string, when the schema gives no type
+        return False
+    return True
+
+def _in_enum(value: Any, allowed: frozenset) -> bool:
+    try:
+        return value in allowed
+    except TypeError:  # Unhashable values (lists, objects) are never enum members
+        return False
+
+_TYPE_CHECKS = {
+    "object": ("isinstance({v}, dict)", "an object"),
+    "array": ("isinstance({v}, list)", "an array"),
+    "string": ("isinstance({v}, str)", "a string"),
+    "boolean": ("isinstance({v}, bool)", "a boolean"),
+    "number": ("isinstance({v}, (int, float)) and not isinstance({v}, bool)", "a number"),
+    "integer": ("isinstance({v}, int) and not isinstance({v}, bool)", "an integer"),
+}
+
+class _ValidatorCompiler:
+    """Emits the source of one validator function for a schema
+
+    Supports the keywords AGENT_RESPONSE_SCHEMA uses: type, properties,
+    required, items, enum, minimum, maximum and format "date-time".
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self._names = 0
+
+    def _name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def _constant(self, value: Any) -> str:
+        name = self._name("_const")
+        self.constants[name] = value
+        return name
+
+    def _emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def _error(self, indent: int, path: str, message: str) -> None:
+        # path is f-string source; array indexes are filled in at run time
+        message = message.replace("{", "{{").replace("}", "}}")
+        self._emit(indent, f"errors.append(f{(path + ': ' + message)!r})")
+
+    def compile(self, schema: Dict[str, Any], var: str, path: str, indent: int) -> None:
+        schema_type = schema.get("type")
+        if schema_type in _TYPE_CHECKS:
+            check, description = _TYPE_CHECKS[schema_type]
+            self._emit(indent, f"if not ({check.format(v=var)}):")
+            self._error(indent + 1, path, f"expected {description}")
+            self._emit(indent, "else:")
+            indent += 1
+        self._emit(indent, "pass")
+
+        if "enum" in schema:
+            allowed = self._constant(frozenset(schema["enum"]))
+            self._emit(indent, f"if not _in_enum({var}, {allowed}):")
+            self._error(indent + 1, path, f"must be one of {sorted(schema['enum'])}")
+        if "minimum" in schema:
+            self._emit(indent, f"if {var} < {schema['minimum']!r}:")
+            self._error(indent + 1, path, f"below minimum {schema['minimum']}")
+        if "maximum" in schema:
+            self._emit(indent, f"if {var} > {schema['maximum']!r}:")
+            self._error(indent + 1, path, f"above maximum {schema['maximum']}")
+        if schema.get("format") == "date-time":
+            self._emit(indent, f"if not _is_datetime({var}):")
+            self._error(indent + 1, path, "not an ISO date-time")
+
+        required = set(schema.get("required", ()))
+        for key, subschema in schema.get("properties", {}).items():
+            child = self._name("v")
+            child_path = path + "." + key.replace("{", "{{").replace("}", "}}")
+            self._emit(indent, f"{child} = {var}.get({key!r}, _MISSING)")
+            self._emit(indent, f"if {child} is _MISSING:")
+            if key in required:
+                self._error(indent + 1, child_path, "missing required field")
+            else:
+                self._emit(indent + 1, "pass")
+            self._emit(indent, "else:")
+            self.compile(subschema, child, child_path, indent + 1)
+
+        if "items" in schema:
+            index = self._name("i")
+            item = self._name("v")
+            self._emit(indent, f"for {index}, {item} in enumerate({var}):")
+            self.compile(schema["items"], item, f"{path}[{{{index}}}]", indent + 1)
+
+def compile_validator(schema: Dict[str, Any], relax_required: Iterable[str] = ()) -> Callable[[Any], List[str]]:
+    """Compile schema into a function returning the list of violations (empty when valid)
+
+    relax_required names top-level required fields to treat as optional;
+    they are still checked when present.
+    """
+    schema = dict(schema)
+    schema["required"] = [key for key in schema.get("required", ()) if key not in set(relax_required)]
+
+    compiler = _ValidatorCompiler()
+    compiler.compile(schema, "value", "$", 1)
+    source = "def validate(value):\n    errors = []\n" + "\n".join(compiler.lines) + "\n    return errors\n"
+    namespace = dict(compiler.constants, _MISSING=object(), _is_datetime=_is_datetime, _in_enum=_in_enum)
+    exec(compile(source, "<compiled schema validator>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
+
+class RecordQuarantine:
+    """Appends rejected records, with the reasons they were rejected, to a JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def add(self, record: Any, reasons: List[str]) -> None:
+        line = json.dumps({
+            "quarantined_at": datetime.now().isoformat(),
+            "reasons": reasons,
+            "record": record
+        }, separators=(",", ":"), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.rejected += 1
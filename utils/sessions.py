@@ -0,0 +1,263 @@
+"""
+Session Registry
+Per-user sessions (agents, history, research buffers) with LRU eviction to disk
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Optional, Union
+
+from .background_writer import write_file_atomic
+from .conversation import ConversationManager
+from .research_aggregates import ResearchAggregates
+from .research_buffer import SpillingBuffer
+from .research_columns import MetricColumns, metrics_path_for
+from .research_log import ResearchLogWriter
+from .sampling import ResearchSampler
+
+# Rough in-memory footprint, measured with tracemalloc on typical sessions
+SESSION_BASE_BYTES = 4096  # Agents, conversation manager and aggregates
+MESSAGE_BYTES = 256  # Per history message, plus its content
+RECORD_BYTES = 3072  # Per structured response held in memory
+
+_SAFE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+def session_file_key(session_id: str) -> str:
+    """File name stem for a session: the id itself when it is file-safe, otherwise a hash of it"""
+    if _SAFE_ID.fullmatch(session_id):
+        return session_id
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+
+class Session:
+    """One user's conversation: agents, history, research buffers and counters
+
+    research_log, metric_columns, research_quarantine and state_path are
+    the session's own research log, metric columns, quarantine and agent
+    state file, so sessions never write into each other's files.
+    """
+
+    def __init__(self, session_id: str, agents: Dict[str, Any], conversation_manager: ConversationManager,
+                 research_sampler: ResearchSampler, structured_responses: Union[List[Dict], SpillingBuffer],
+                 response_times: SpillingBuffer, research_log: Optional[ResearchLogWriter] = None,
+                 metric_columns: Optional[MetricColumns] = None, research_quarantine: Any = None,
+                 state_path: Optional[str] = None):
+        self.session_id = session_id
+        self.agents = agents
+        self.conversation_manager = conversation_manager
+        self.research_sampler = research_sampler
+        self.structured_responses = structured_responses
+        self.response_times = response_times
+        self.research_log = research_log
+        self.metric_columns = metric_columns
+        self.research_quarantine = research_quarantine
+        self.state_path = state_path
+        self.research_aggregates = ResearchAggregates()
+        self.conversation_turn = 0
+        self.last_active = time.time()
+
+    def is_dirty(self) -> bool:
+        """Whether any agent counter or the user persuasion state changed since the last save"""
+        return self.conversation_manager.persuasion_state_dirty or any(agent.dirty for agent in self.agents.values())
+
+    def mark_clean(self) -> None:
+        for agent in self.agents.values():
+            agent.mark_clean()
+        self.conversation_manager.persuasion_state_dirty = False
+
+    def memory_estimate(self) -> int:
+        """Approximate bytes held in memory by this session"""
+        manager = self.conversation_manager
+        history_bytes = sum(
+            MESSAGE_BYTES + len(message.get("content") or "")
+            for message in manager.conversation_history.window(note=manager.history_summary)
+        )
+        records = self.structured_responses
+        in_memory = records.in_memory() if isinstance(records, SpillingBuffer) else len(records)
+        return SESSION_BASE_BYTES + history_bytes + in_memory * RECORD_BYTES
+
+    def suspend(self) -> Dict[str, Any]:
+        """Move research buffers to disk and return the rest of the session state
+
+        After suspend() the session object should be dropped; a new one is
+        rebuilt from the returned state with resume().
+        """
+        buffers = {}
+        for name in ("structured_responses", "response_times"):
+            buffer = getattr(self, name)
+            if isinstance(buffer, SpillingBuffer):
+                buffer.spill_all()
+                buffer.close()
+                buffers[name] = len(buffer)
+            else:
+                buffers[name] = list(buffer)  # Bounded by the sampler, e.g. a reservoir
+        if self.research_log is not None:
+            if self.metric_columns is not None:
+                self.metric_columns.append_segment(metrics_path_for(self.research_log.path))
+            self.research_log.close()  # The resumed session's writer appends to the same file
+        return {
+            "session_id": self.session_id,
+            "conversation_turn": self.conversation_turn,
+            "last_active": self.last_active,
+            "agents": {name: agent.to_dict() for name, agent in self.agents.items()},
+            "user_persuasion_state": self.conversation_manager.get_persuasion_metrics(),
+            "history": list(self.conversation_manager.conversation_history),
+            "history_summary": self.conversation_manager.history_summary,
+            "research_sampler": self.research_sampler.to_dict(),
+            "research_aggregates": self.research_aggregates.to_dict(),
+            "buffers": buffers,
+            "metric_dictionaries": self.metric_columns.dictionaries() if self.metric_columns is not None else None
+        }
+
+    def resume(self, state: Dict[str, Any]) -> None:
+        """Restore state returned by suspend() into this freshly created session"""
+        self.conversation_turn = state["conversation_turn"]
+        for name, data in state["agents"].items():
+            if name in self.agents:
+                self.agents[name].from_dict(data)
+        self.conversation_manager.user_persuasion_state.update(state["user_persuasion_state"])
+        for message in state["history"]:
+            self.conversation_manager.conversation_history.append(message)
+        self.conversation_manager.history_summary = state.get("history_summary")
+        self.research_sampler.from_dict(state["research_sampler"])
+        self.research_aggregates.from_dict(state["research_aggregates"])
+        if self.metric_columns is not None and state.get("metric_dictionaries"):
+            self.metric_columns.restore_dictionaries(state["metric_dictionaries"])
+        for name, saved in state["buffers"].items():
+            buffer = getattr(self, name)
+            if isinstance(saved, list):
+                buffer.extend(saved)
+            else:
+                buffer.resume(saved)
+        self.mark_clean()
+
+class SessionRegistry:
+    """Maps session ids to live sessions, evicting the least recently used ones to disk
+
+    get() returns the live session, rehydrates an evicted one from its
+    state file, or creates a new one with create_session(session_id).
+    Sessions are evicted, least recently used first, when there are more
+    than max_sessions, when their estimated memory passes
+    memory_ceiling_bytes, or when they have been idle for idle_seconds.
+    Memory estimates are refreshed when a session is fetched and when
+    the next one is, so the turn it just ran is counted.
+    """
+
+    def __init__(self, create_session: Callable[[str], Session], storage_dir: str = "sessions",
+                 max_sessions: int = 1000, memory_ceiling_bytes: int = 256 * 1024 * 1024,
+                 idle_seconds: Optional[float] = None, before_save: Optional[Callable[[Session], None]] = None):
+        """
+        Args:
+            create_session: Builds an empty session for an id
+            storage_dir: Directory for evicted session state (and, by convention, spill files)
+            before_save: Called before a session is suspended, e.g. to let
+                background jobs that update it finish first
+        """
+        self.create_session = create_session
+        self.storage_dir = storage_dir
+        self.max_sessions = max_sessions
+        self.memory_ceiling_bytes = memory_ceiling_bytes
+        self.idle_seconds = idle_seconds
+        self.before_save = before_save
+        self.evictions = 0
+        self.rehydrations = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._estimates: Dict[str, int] = {}
+        self._memory = 0
+        self._lock = threading.RLock()
+        os.makedirs(storage_dir, exist_ok=True)
+
+    def path_for(self, session_id: str, suffix: str = "state.json") -> str:
+        """Path of one of a session's files in storage_dir"""
+        return os.path.join(self.storage_dir, f"{session_file_key(session_id)}_{suffix}")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def memory_estimate(self) -> int:
+        """Estimated bytes held by the live sessions"""
+        return self._memory
+
+    def peek(self, session_id: str) -> Optional[Session]:
+        """The live session for session_id, or None; unlike get() it never loads, reorders or evicts"""
+        return self._sessions.get(session_id)
+
+    def get(self, session_id: str) -> Session:
+        """The session for session_id, loading or creating it if it is not live"""
+        with self._lock:
+            if self._sessions:
+                # The most recent session has probably grown during its turn since it was fetched
+                last_id, last = next(reversed(self._sessions.items()))
+                if last_id != session_id:
+                    self._set_estimate(last_id, last.memory_estimate())
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._load(session_id)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = time.time()
+            self._set_estimate(session_id, session.memory_estimate())
+            self._enforce_limits(keep=session_id)
+            return session
+
+    def _load(self, session_id: str) -> Session:
+        session = self.create_session(session_id)
+        try:
+            with open(self.path_for(session_id), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return session
+        session.resume(state)
+        self.rehydrations += 1
+        return session
+
+    def _set_estimate(self, session_id: str, estimate: int) -> None:
+        self._memory += estimate - self._estimates.get(session_id, 0)
+        self._estimates[session_id] = estimate
+
+    def _enforce_limits(self, keep: str) -> None:
+        idle_before = time.time() - self.idle_seconds if self.idle_seconds is not None else None
+        for session_id, session in list(self._sessions.items()):
+            over = len(self._sessions) > self.max_sessions or self._memory > self.memory_ceiling_bytes
+            idle = idle_before is not None and session.last_active < idle_before
+            if not (over or idle):
+                break  # Everything after this was used more recently
+            if session_id != keep:
+                self.evict(session_id)
+
+    def evict(self, session_id: str) -> bool:
+        """Write a live session's state to disk and drop it from memory"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._memory -= self._estimates.pop(session_id, 0)
+            self._save(session)
+            self.evictions += 1
+            return True
+
+    def _save(self, session: Session) -> None:
+        if self.before_save is not None:
+            self.before_save(session)
+        state = session.suspend()
+        write_file_atomic(self.path_for(session.session_id), lambda f: json.dump(state, f, separators=(",", ":")))
+
+    def remove(self, session_id: str) -> Optional[Session]:
+        """Drop a live session without saving it, e.g. once its data was saved elsewhere"""
+        with self._lock:
+            self._memory -= self._estimates.pop(session_id, 0)
+            return self._sessions.pop(session_id, None)
+
+    def close(self) -> None:
+        """Write every live session to disk"""
+        with self._lock:
+            for session_id in list(self._sessions):
+                self.evict(session_id)
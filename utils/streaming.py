@@ -6,7 +6,7 @@ Provides real-time text streaming for better user experience
 import sys
 import time
 import threading
-from typing import Generator, Optional
+from typing import Callable, Generator, Optional
 
 def stream_text(text: str, delay: float = 0.03, end_delay: float = 0.5) -> None:
     """
@@ -46,7 +46,8 @@ def stream_text_with_cursor(text: str, delay: float = 0.03, cursor_char: str = "
     
     print()  # Final newline
 
-def stream_response_stream(response_stream: Generator, agent_name: str = "", delay: float = 0.02) -> str:
+def stream_response_stream(response_stream: Generator, agent_name: str = "", delay: float = 0.02,
+                           on_chunk: Optional[Callable[[str], None]] = None) -> str:
     """
     Stream a response from OpenAI's streaming API
     
@@ -54,6 +55,8 @@ def stream_response_stream(response_stream: Generator, agent_name: str = "", del
         response_stream: The streaming response from OpenAI
         agent_name: Name of the agent for display
         delay: Additional delay between chunks
+        on_chunk: Optional callback that receives each chunk as it arrives,
+            e.g. StreamingResponseAnalyzer.feed
         
     Returns:
         The complete response text
@@ -70,6 +73,8 @@ def stream_response_stream(response_stream: Generator, agent_name: str = "", del
                 content = chunk.choices[0].delta.content
                 print(content, end='', flush=True)
                 full_response += content
+                if on_chunk:
+                    on_chunk(content)
                 time.sleep(delay)
         
         print()  # New line at the end